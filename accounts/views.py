@@ -96,6 +96,7 @@ def logout_view(request):
 def dashboard_view(request):
     from courses.models import Enrollment, Section, Course, Assignment
     from grades.models import Grade, FinalGrade
+    from grades.queue import pending_counts
     from attendance.models import Attendance, AttendanceSession
     from django.db.models import Avg, Count
     from datetime import datetime, timedelta
@@ -158,8 +159,8 @@ def dashboard_view(request):
             # Count assignments
             assignments_count = Assignment.objects.filter(section__in=sections).count()
             
-            # Placeholder for pending grades (assignments without grades)
-            pending_grades = assignments_count  # Simplified
+            # Submissions still to grade, from the pending-submission index
+            pending_grades = pending_counts([teacher])[teacher.id]
             
             context.update({
                 'teacher': teacher,
@@ -1,3 +1,63 @@
-from django.contrib import admin
+import io
+
+from django.contrib import admin, messages
+from django.shortcuts import render
+from django.urls import path
+from .importer import IMPORT_COLUMNS, import_attendance_csv
+from .models import AttendanceAlert, AttendanceAlertThreshold, AttendanceSession
+from .services import set_alert_threshold
 
 # Register your models here.
+
+@admin.register(AttendanceSession)
+class AttendanceSessionAdmin(admin.ModelAdmin):
+    list_display = ['section', 'date', 'start_time', 'end_time', 'topic_covered']
+    list_filter = ['date', 'section__semester', 'section__course__department']
+    search_fields = ['section__course__code', 'topic_covered']
+    change_list_template = 'admin/attendance/attendancesession/change_list.html'
+
+    def get_urls(self):
+        return [
+            path('import/', self.admin_site.admin_view(self.import_view), name='attendance_import'),
+        ] + super().get_urls()
+
+    def import_view(self, request):
+        """Upload a card-reader CSV and stream it through the attendance importer"""
+        result = None
+        csv_file = request.FILES.get('csv_file')
+        if request.method == 'POST' and csv_file:
+            lines = io.TextIOWrapper(csv_file.file, encoding='utf-8-sig', newline='')
+            try:
+                result = import_attendance_csv(lines, request.user.get_full_name() or request.user.username)
+            except ValueError as error:
+                messages.error(request, f'Import failed: {error}')
+            else:
+                messages.success(
+                    request,
+                    f'Imported {result["rows"] - len(result["rejected"])} of {result["rows"]} rows '
+                    f'({result["created"]} created, {result["updated"]} updated).'
+                )
+
+        context = dict(
+            self.admin_site.each_context(request),
+            title='Import attendance',
+            opts=self.model._meta,
+            columns=IMPORT_COLUMNS,
+            result=result,
+        )
+        return render(request, 'admin/attendance/import_attendance.html', context)
+
+@admin.register(AttendanceAlertThreshold)
+class AttendanceAlertThresholdAdmin(admin.ModelAdmin):
+    list_display = ['section', 'threshold']
+    search_fields = ['section__course__code']
+
+    def save_model(self, request, obj, form, change):
+        # Re-check the whole section against its new threshold
+        set_alert_threshold(obj.section, obj.threshold)
+
+@admin.register(AttendanceAlert)
+class AttendanceAlertAdmin(admin.ModelAdmin):
+    list_display = ['student', 'section', 'raised_at']
+    list_filter = ['section__semester', 'section__course__department']
+    search_fields = ['student__profile__user__username', 'section__course__code']
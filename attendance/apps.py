@@ -1,6 +1,14 @@
+import atexit
+
 from django.apps import AppConfig
 
 
 class AttendanceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'attendance'
+
+    def ready(self):
+        from .checkin import checkin_buffer
+
+        # Write the check-ins still waiting in this process's buffer when it exits
+        atexit.register(checkin_buffer.stop)
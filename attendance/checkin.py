@@ -0,0 +1,178 @@
+import hashlib
+import hmac
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from .models import AttendanceSession
+from .services import mark_session
+
+logger = logging.getLogger(__name__)
+
+# Seconds each rotating check-in code is shown for; the previous code is still accepted
+CHECKIN_CODE_PERIOD = 30
+
+# Seconds a session stays open for self check-in once the teacher opens it
+CHECKIN_OPEN_SECONDS = 15 * 60
+
+# Minutes after the session start time from which a check-in counts as late
+CHECKIN_LATE_AFTER = 10
+
+# Buffered check-ins are written when this many are waiting or the oldest is this old
+CHECKIN_MAX_BATCH = 200
+CHECKIN_MAX_DELAY = 1.0
+
+
+def checkin_code(session_id, at=None):
+    """Six-digit code for a session, rotating every CHECKIN_CODE_PERIOD seconds"""
+    window = int((at if at is not None else time.time()) // CHECKIN_CODE_PERIOD)
+    digest = hmac.new(
+        settings.SECRET_KEY.encode(), f'checkin:{session_id}:{window}'.encode(), hashlib.sha256
+    ).hexdigest()
+    return f'{int(digest[:8], 16) % 1000000:06d}'
+
+
+def verify_checkin_code(session_id, code, at=None):
+    """Accept the current code and the one just before it, to allow for slow typing"""
+    now = at if at is not None else time.time()
+    return any(
+        hmac.compare_digest(checkin_code(session_id, now - offset), str(code))
+        for offset in (0, CHECKIN_CODE_PERIOD)
+    )
+
+
+def open_checkin(session):
+    """
+    Open a session for self check-in for CHECKIN_OPEN_SECONDS. The deadline
+    is stored on the session so that every worker process sees it.
+    """
+    session.checkin_open_until = timezone.now() + timedelta(seconds=CHECKIN_OPEN_SECONDS)
+    AttendanceSession.objects.filter(id=session.id).update(checkin_open_until=session.checkin_open_until)
+
+
+def checkin_section_id(session_id):
+    """Section id of a session open for check-in, or None when it is closed"""
+    return (
+        AttendanceSession.objects.filter(id=session_id, checkin_open_until__gt=timezone.now())
+        .values_list('section_id', flat=True).first()
+    )
+
+
+class CheckInBuffer:
+    """
+    In-process buffer that coalesces self check-ins into batched writes.
+
+    Requests only append to the buffer, so a lecture hall checking in at
+    once never queues on the database write lock. A background thread (or
+    an explicit flush()) writes everything waiting in one transaction as
+    soon as CHECKIN_MAX_BATCH check-ins are waiting or the oldest has
+    waited CHECKIN_MAX_DELAY seconds. A failed write puts the batch back
+    for the next flush. Buffers are per process, so each worker flushes its
+    own check-ins; stop() flushes what is left when a worker shuts down.
+    """
+
+    def __init__(self, max_batch=CHECKIN_MAX_BATCH, max_delay=CHECKIN_MAX_DELAY, background=True):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.background = background
+        self._pending = {}
+        self._oldest = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = None
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, session_id, student_id, checked_in_at=None):
+        """Queue a check-in; repeated check-ins by the same student keep the first"""
+        with self._lock:
+            self._pending.setdefault((session_id, student_id), checked_in_at or timezone.now())
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            full = len(self._pending) >= self.max_batch
+        if self.background:
+            self._ensure_thread()
+            if full:
+                self._wake.set()
+
+    def flush(self):
+        """Write every waiting check-in in one transaction; returns the number written"""
+        with self._lock:
+            pending, self._pending, self._oldest = self._pending, {}, None
+        if not pending:
+            return 0
+
+        by_session = defaultdict(dict)
+        for (session_id, student_id), checked_in_at in pending.items():
+            by_session[session_id][student_id] = checked_in_at
+        try:
+            with transaction.atomic():
+                sessions = AttendanceSession.objects.select_related('section').in_bulk(list(by_session))
+                for session_id, checkins in by_session.items():
+                    session = sessions.get(session_id)
+                    if session is not None:
+                        marks = {
+                            student_id: self._mark(session, checked_in_at)
+                            for student_id, checked_in_at in checkins.items()
+                        }
+                        mark_session(session, marks, 'Self check-in', overwrite=False)
+        except Exception:
+            # Nothing was written (e.g. the database is busy); put the check-ins back for the next flush
+            logger.exception('Self check-in flush failed, retrying %d check-ins', len(pending))
+            with self._lock:
+                for key, checked_in_at in pending.items():
+                    self._pending.setdefault(key, checked_in_at)
+                self._oldest = self._oldest or time.monotonic()
+            return 0
+        return len(pending)
+
+    @staticmethod
+    def _mark(session, checked_in_at):
+        arrival = timezone.localtime(checked_in_at)
+        status = 'present'
+        if session.start_time:
+            start = datetime.combine(arrival.date(), session.start_time)
+            if arrival.replace(tzinfo=None) > start + timedelta(minutes=CHECKIN_LATE_AFTER):
+                status = 'late'
+        return {'status': status, 'arrival_time': arrival.time().replace(microsecond=0)}
+
+    def stop(self):
+        """Stop the background thread and write whatever is still waiting"""
+        self._stopped = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.flush()
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name='checkin-flusher', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while not self._stopped:
+            self._wake.wait(self.max_delay)
+            self._wake.clear()
+            oldest = self._oldest
+            if oldest is not None and (
+                len(self._pending) >= self.max_batch or time.monotonic() - oldest >= self.max_delay
+            ):
+                close_old_connections()
+                try:
+                    self.flush()
+                except Exception:
+                    logger.exception('Self check-in flush failed')
+        connection.close()
+
+
+checkin_buffer = CheckInBuffer()
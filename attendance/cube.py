@@ -0,0 +1,164 @@
+import numpy as np
+from django.core.cache import cache
+
+from .matrix import NOT_RECORDED, STATUS_CODES, build_attendance_matrix
+
+# Seconds a section's cube stays cached; mark_session keeps it current meanwhile
+CUBE_CACHE_TIMEOUT = 3600
+
+ATTENDED_CODES = [STATUS_CODES['present'], STATUS_CODES['late']]
+
+
+class AttendanceCube:
+    """
+    Vectorised attendance analytics for one section.
+
+    ``codes`` is an int8 array of shape (students, sessions) holding the
+    status codes of attendance.matrix, with sessions in date order; the
+    status axis is the code itself and ``mask(status)`` expands it. Row and
+    column order follow ``student_ids`` and ``session_ids``.
+    """
+
+    def __init__(self, section_id, student_ids, session_ids, session_dates, codes):
+        self.section_id = section_id
+        self.student_ids = np.asarray(student_ids, dtype=np.int64)
+        self.session_ids = np.asarray(session_ids, dtype=np.int64)
+        self.session_dates = np.asarray(session_dates, dtype='datetime64[D]')
+        self.codes = np.asarray(codes, dtype=np.int8).reshape(len(student_ids), len(session_ids))
+
+    @classmethod
+    def from_matrix(cls, matrix):
+        return cls(
+            matrix.section.id,
+            [enrollment.student_id for enrollment in matrix.enrollments],
+            [session.id for session in matrix.sessions],
+            [session.date for session in matrix.sessions],
+            np.frombuffer(matrix.cells, dtype=np.int8),
+        )
+
+    @property
+    def nbytes(self):
+        """Memory held by the cube's arrays, in bytes"""
+        return (
+            self.codes.nbytes + self.student_ids.nbytes
+            + self.session_ids.nbytes + self.session_dates.nbytes
+        )
+
+    def mask(self, status):
+        """Boolean (students, sessions) array of cells with the given status"""
+        return self.codes == STATUS_CODES[status]
+
+    @property
+    def attended(self):
+        return np.isin(self.codes, ATTENDED_CODES)
+
+    @property
+    def recorded(self):
+        return self.codes != NOT_RECORDED
+
+    def attendance_rates(self):
+        """Overall attendance percentage per student (present and late count as attended)"""
+        recorded = self.recorded.sum(axis=1)
+        attended = self.attended.sum(axis=1)
+        return np.divide(attended * 100.0, recorded, out=np.zeros(len(recorded)), where=recorded > 0)
+
+    def rolling_rates(self, window):
+        """
+        Attendance percentage over the last ``window`` sessions, per student
+        and per session column; NaN where nothing was recorded in the window.
+        """
+        attended = np.cumsum(self.attended, axis=1, dtype=np.int32)
+        recorded = np.cumsum(self.recorded, axis=1, dtype=np.int32)
+        if window < attended.shape[1]:
+            attended[:, window:] = attended[:, window:] - attended[:, :-window].copy()
+            recorded[:, window:] = recorded[:, window:] - recorded[:, :-window].copy()
+        rates = np.full(attended.shape, np.nan)
+        np.divide(attended * 100.0, recorded, out=rates, where=recorded > 0)
+        return rates
+
+    def current_streaks(self, status='absent'):
+        """Length of each student's run of ``status`` ending at the latest session"""
+        other = ~self.mask(status)[:, ::-1]
+        width = other.shape[1]
+        return np.where(other.any(axis=1), other.argmax(axis=1), width)
+
+    def longest_streaks(self, status='absent'):
+        """Length of each student's longest run of ``status``"""
+        rows, width = self.codes.shape
+        padded = np.zeros((rows, width + 2), dtype=np.int8)
+        padded[:, 1:-1] = self.mask(status)
+        edges = np.diff(padded.ravel())
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        longest = np.zeros(rows, dtype=np.int64)
+        np.maximum.at(longest, starts // (width + 2), ends - starts)
+        return longest
+
+    def weekday_absence_rates(self):
+        """(students, 7) absence percentage by weekday, Monday first; NaN with no sessions"""
+        # Day 0 of datetime64 (1970-01-01) was a Thursday
+        weekdays = (self.session_dates.view('int64') + 3) % 7
+        by_weekday = np.zeros((len(self.session_ids), 7), dtype=np.int32)
+        by_weekday[np.arange(len(self.session_ids)), weekdays] = 1
+        absences = self.mask('absent').astype(np.int32) @ by_weekday
+        recorded = self.recorded.astype(np.int32) @ by_weekday
+        rates = np.full(absences.shape, np.nan)
+        np.divide(absences * 100.0, recorded, out=rates, where=recorded > 0)
+        return rates
+
+    def at_risk(self, threshold=75.0, window=None, max_absence_streak=3):
+        """
+        Student ids below ``threshold`` percent overall (or over the last
+        ``window`` sessions) or currently absent ``max_absence_streak``
+        sessions in a row.
+        """
+        if window:
+            rates = self.rolling_rates(window)[:, -1] if self.codes.shape[1] else np.zeros(len(self.student_ids))
+            rates = np.nan_to_num(rates, nan=100.0)
+        else:
+            rates = np.where(self.recorded.any(axis=1), self.attendance_rates(), 100.0)
+        risky = (rates < threshold) | (self.current_streaks('absent') >= max_absence_streak)
+        return self.student_ids[risky].tolist()
+
+    def apply_session(self, session_id, session_date, statuses):
+        """
+        Incrementally record a marked session: ``statuses`` maps student id
+        to status. A new session column is inserted in date order; students
+        not in the cube are ignored.
+        """
+        matches = np.flatnonzero(self.session_ids == session_id)
+        if matches.size:
+            column = matches[0]
+        else:
+            column = int(np.searchsorted(self.session_dates, np.datetime64(session_date, 'D'), side='right'))
+            self.session_ids = np.insert(self.session_ids, column, session_id)
+            self.session_dates = np.insert(self.session_dates, column, np.datetime64(session_date, 'D'))
+            self.codes = np.insert(self.codes, column, NOT_RECORDED, axis=1)
+
+        rows = {student_id: i for i, student_id in enumerate(self.student_ids.tolist())}
+        for student_id, status in statuses.items():
+            if student_id in rows:
+                self.codes[rows[student_id], column] = STATUS_CODES[status]
+
+
+def cube_cache_key(section_id):
+    return f'attendance:cube:{section_id}'
+
+
+def get_attendance_cube(section):
+    """The section's AttendanceCube, built from the attendance matrix and cached"""
+    key = cube_cache_key(section.id)
+    cube = cache.get(key)
+    if cube is None:
+        cube = AttendanceCube.from_matrix(build_attendance_matrix(section))
+        cache.set(key, cube, CUBE_CACHE_TIMEOUT)
+    return cube
+
+
+def update_cached_cube(session, statuses):
+    """Apply a marked session to the section's cached cube, if one is cached"""
+    key = cube_cache_key(session.section_id)
+    cube = cache.get(key)
+    if cube is not None:
+        cube.apply_session(session.id, session.date, statuses)
+        cache.set(key, cube, CUBE_CACHE_TIMEOUT)
@@ -0,0 +1,121 @@
+import csv
+
+from django.db.models import F, FilteredRelation, Q
+from django.http import StreamingHttpResponse
+
+from courses.models import Enrollment
+
+from .matrix import STATUS_CODES, STATUS_LABELS
+from .models import Attendance, AttendanceSession
+
+# Rows fetched per round trip from the server-side cursors
+CHUNK_SIZE = 2000
+
+SUMMARY_HEADER = ['Student ID', 'Student Name', 'Total Sessions', 'Present', 'Absent', 'Late', 'Excused', 'Attendance %']
+
+
+class Echo:
+    """File-like object whose write() hands the line back instead of buffering it"""
+
+    def write(self, value):
+        return value
+
+
+def attendance_csv_rows(sections, with_titles=False):
+    """
+    Yield the attendance export, one CSV row (a list) at a time.
+
+    Enrollments and attendance records are both read through server-side
+    cursors ordered by (section, student) and merged as they stream, so
+    the export costs four queries and holds only one student's row in
+    memory no matter how many sections or students it covers. With
+    ``with_titles`` each section's block starts with a title row and is
+    separated from the next by a blank row.
+    """
+    sections = list(sections.select_related('course').order_by('id'))
+    section_ids = [section.id for section in sections]
+
+    columns = {section_id: {} for section_id in section_ids}
+    dates = {section_id: [] for section_id in section_ids}
+    # Sparse sessions as (column, default status label, roster) for students without a row
+    implied = {section_id: [] for section_id in section_ids}
+    for section_id, session_id, session_date, default_status, roster in (
+        AttendanceSession.objects.held().filter(section_id__in=section_ids)
+        .order_by('section_id', 'date')
+        .values_list('section_id', 'id', 'date', 'default_status', 'roster')
+    ):
+        columns[section_id][session_id] = len(dates[section_id])
+        dates[section_id].append(session_date)
+        if default_status:
+            implied[section_id].append((
+                columns[section_id][session_id], STATUS_LABELS[STATUS_CODES[default_status]], set(roster),
+            ))
+
+    enrollments = (
+        Enrollment.objects.filter(section_id__in=section_ids, status='enrolled')
+        .annotate(summary=FilteredRelation(
+            'student__attendancesummary',
+            condition=Q(student__attendancesummary__section=F('section')),
+        ))
+        .order_by('section_id', 'student_id')
+        .values_list(
+            'section_id', 'student_id',
+            'student__profile__user__username',
+            'student__profile__user__first_name',
+            'student__profile__user__last_name',
+            'summary__total_sessions', 'summary__present_count', 'summary__absent_count',
+            'summary__late_count', 'summary__excused_count', 'summary__attendance_percentage',
+        )
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    records = (
+        Attendance.objects.filter(session__section_id__in=section_ids)
+        .order_by('session__section_id', 'student_id')
+        .values_list('session__section_id', 'student_id', 'session_id', 'status')
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    enrollment = next(enrollments, None)
+    record = next(records, None)
+
+    for index, section in enumerate(sections):
+        if with_titles:
+            if index:
+                yield []
+            yield [f"{section.course.code} - Section {section.section_number}"]
+        yield SUMMARY_HEADER + [f"{session_date}" for session_date in dates[section.id]]
+
+        section_columns = columns[section.id]
+        while enrollment is not None and enrollment[0] == section.id:
+            (section_id, student_id, username, first_name, last_name,
+             total, present, absent, late, excused, percentage) = enrollment
+            statuses = [STATUS_LABELS[0]] * len(dates[section_id])
+            for column, label, roster in implied[section_id]:
+                if student_id in roster:
+                    statuses[column] = label
+
+            # Skip records of students no longer enrolled, then take this student's
+            while record is not None and record[:2] < (section_id, student_id):
+                record = next(records, None)
+            while record is not None and record[:2] == (section_id, student_id):
+                # Records ahead of time (e.g. excused in advance) have no column yet
+                if record[2] in section_columns:
+                    statuses[section_columns[record[2]]] = STATUS_LABELS[STATUS_CODES[record[3]]]
+                record = next(records, None)
+
+            if total is None:
+                counts = [0, 0, 0, 0, 0, "0.0%"]
+            else:
+                counts = [total, present, absent, late, excused, f"{percentage:.1f}%"]
+            yield [username, f"{first_name} {last_name}".strip()] + counts + statuses
+            enrollment = next(enrollments, None)
+
+
+def stream_attendance_csv(sections, filename, with_titles=False):
+    """Build a StreamingHttpResponse that writes the export as it is produced"""
+    writer = csv.writer(Echo())
+    response = StreamingHttpResponse(
+        (writer.writerow(row) for row in attendance_csv_rows(sections, with_titles)),
+        content_type='text/csv',
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
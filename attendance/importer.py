@@ -0,0 +1,209 @@
+import csv
+from collections import defaultdict
+from itertools import islice
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.dateparse import parse_date, parse_time
+
+from accounts.models import Student
+from courses.models import Enrollment, Section
+
+from .cube import cube_cache_key
+from .models import Attendance, AttendanceSession
+from .rollups import rebuild_daily_rollups
+from .services import MARK_FIELDS, VALID_STATUSES, refresh_summaries
+
+# CSV rows read, validated and written per transaction
+IMPORT_CHUNK_SIZE = 1000
+
+IMPORT_COLUMNS = ['student_id', 'section', 'date', 'status', 'arrival_time', 'notes']
+REQUIRED_COLUMNS = ['student_id', 'section', 'date']
+
+
+class AttendanceImporter:
+    """
+    Stream attendance records from a CSV file into the database.
+
+    Each row needs ``student_id`` (the Student's student ID), ``section``
+    (the Section id) and ``date``; ``status`` defaults to present, and
+    ``arrival_time`` and ``notes`` are optional. The file is read
+    ``chunk_size`` rows at a time and each chunk is validated and written
+    in its own transaction with bulk operations. Student IDs are resolved
+    through a map loaded once; rosters and session dates are loaded once
+    per section, the first time a section appears. Sessions that do not
+    exist yet are created in bulk. Summaries, alerts and daily rollups are
+    refreshed once at the end, only for the students and days touched.
+    """
+
+    def __init__(self, marked_by='CSV import', chunk_size=IMPORT_CHUNK_SIZE):
+        self.marked_by = marked_by
+        self.chunk_size = chunk_size
+        self.students = None
+        self.sections = {}
+        self.rosters = {}
+        self.sessions = {}
+        self.touched = defaultdict(set)
+        self.touched_dates = set()
+        self.result = {
+            'rows': 0, 'created': 0, 'updated': 0, 'unchanged': 0,
+            'sessions_created': 0, 'summaries_refreshed': 0, 'rejected': [],
+        }
+
+    def run(self, lines, progress=None):
+        """Import every row of ``lines`` (an iterable of CSV text lines) and return the result"""
+        reader = csv.DictReader(lines)
+        missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f'Missing required column(s): {", ".join(missing)}')
+
+        self.students = dict(Student.objects.values_list('student_id', 'id'))
+        numbered = enumerate(reader, start=2)
+        while True:
+            chunk = list(islice(numbered, self.chunk_size))
+            if not chunk:
+                break
+            self.import_chunk(chunk)
+            self.result['rows'] += len(chunk)
+            if progress:
+                progress(self.result)
+
+        self.refresh_touched()
+        return self.result
+
+    def import_chunk(self, chunk):
+        marks = {}
+        for line, row in chunk:
+            try:
+                key, values = self.clean_row(row)
+            except ValueError as error:
+                self.result['rejected'].append({'line': line, 'error': str(error)})
+                continue
+            # A later row for the same student and session wins
+            marks[key] = values
+
+        with transaction.atomic():
+            self.create_missing_sessions({(section_id, day) for section_id, day, student_id in marks})
+            by_session = {}
+            for (section_id, day, student_id), values in marks.items():
+                by_session[(self.sessions[section_id][day], student_id)] = values
+            self.write_marks(by_session)
+
+        for section_id, day, student_id in marks:
+            self.touched[section_id].add(student_id)
+            self.touched_dates.add(day)
+
+    def clean_row(self, row):
+        """Validate one CSV row against the lookup maps; raises ValueError"""
+        student_id = self.students.get((row.get('student_id') or '').strip())
+        if student_id is None:
+            raise ValueError(f'Unknown student ID "{row.get("student_id")}"')
+
+        try:
+            section_id = int(row.get('section') or '')
+        except ValueError:
+            raise ValueError(f'Invalid section "{row.get("section")}"')
+        if student_id not in self.roster(section_id):
+            raise ValueError(f'Student is not enrolled in section {section_id}')
+
+        try:
+            day = parse_date((row.get('date') or '').strip())
+        except ValueError:
+            day = None
+        if day is None:
+            raise ValueError(f'Invalid date "{row.get("date")}"')
+
+        status = (row.get('status') or 'present').strip().lower()
+        if status not in VALID_STATUSES:
+            raise ValueError(f'Invalid status "{row.get("status")}"')
+
+        arrival_time = (row.get('arrival_time') or '').strip()
+        if arrival_time:
+            try:
+                arrival_time = parse_time(arrival_time)
+            except ValueError:
+                arrival_time = None
+            if arrival_time is None:
+                raise ValueError(f'Invalid arrival time "{row.get("arrival_time")}"')
+
+        return (section_id, day, student_id), {
+            'status': status,
+            'arrival_time': arrival_time or None,
+            'notes': (row.get('notes') or '').strip(),
+            'marked_by': self.marked_by,
+        }
+
+    def roster(self, section_id):
+        """Enrolled student ids of a section, loaded with its sessions on first use"""
+        if section_id not in self.rosters:
+            section = Section.objects.filter(id=section_id).first()
+            self.rosters[section_id] = None
+            if section is not None:
+                self.sections[section_id] = section
+                self.rosters[section_id] = set(
+                    Enrollment.objects.filter(section_id=section_id, status='enrolled')
+                    .values_list('student_id', flat=True)
+                )
+                self.sessions[section_id] = {}
+                for day, session_id in AttendanceSession.objects.filter(section_id=section_id).values_list('date', 'id'):
+                    # Keep the first session of a day, like the marking views
+                    self.sessions[section_id].setdefault(day, session_id)
+        if self.rosters[section_id] is None:
+            raise ValueError(f'Unknown section {section_id}')
+        return self.rosters[section_id]
+
+    def create_missing_sessions(self, keys):
+        missing = [(section_id, day) for section_id, day in keys if day not in self.sessions[section_id]]
+        if not missing:
+            return
+        AttendanceSession.objects.bulk_create([
+            AttendanceSession(section_id=section_id, date=day) for section_id, day in missing
+        ])
+        self.result['sessions_created'] += len(missing)
+        created = AttendanceSession.objects.filter(
+            section_id__in={section_id for section_id, day in missing},
+            date__in={day for section_id, day in missing},
+        ).values_list('section_id', 'date', 'id')
+        for section_id, day, session_id in created:
+            self.sessions[section_id].setdefault(day, session_id)
+
+    def write_marks(self, marks):
+        """Create or update Attendance rows for ``marks`` ((session_id, student_id) -> values)"""
+        existing = {
+            (record.session_id, record.student_id): record
+            for record in Attendance.objects.filter(
+                session_id__in={session_id for session_id, student_id in marks},
+                student_id__in={student_id for session_id, student_id in marks},
+            )
+        }
+        to_create = []
+        to_update = []
+        for (session_id, student_id), values in marks.items():
+            record = existing.get((session_id, student_id))
+            if record is None:
+                to_create.append(Attendance(session_id=session_id, student_id=student_id, **values))
+            elif any(getattr(record, field) != values[field] for field in MARK_FIELDS):
+                for field, value in values.items():
+                    setattr(record, field, value)
+                to_update.append(record)
+        Attendance.objects.bulk_create(to_create, batch_size=500)
+        Attendance.objects.bulk_update(to_update, MARK_FIELDS, batch_size=500)
+        self.result['created'] += len(to_create)
+        self.result['updated'] += len(to_update)
+        self.result['unchanged'] += len(marks) - len(to_create) - len(to_update)
+
+    def refresh_touched(self):
+        """Recount the summaries, alerts and daily rollups of what was imported"""
+        for section_id, student_ids in self.touched.items():
+            section = self.sections[section_id]
+            with transaction.atomic():
+                refresh_summaries(section, student_ids)
+            cache.delete(cube_cache_key(section_id))
+            self.result['summaries_refreshed'] += len(student_ids)
+        if self.touched:
+            rebuild_daily_rollups(min(self.touched_dates), max(self.touched_dates), list(self.touched))
+
+
+def import_attendance_csv(lines, marked_by='CSV import', chunk_size=IMPORT_CHUNK_SIZE, progress=None):
+    """Import attendance from CSV text lines; see AttendanceImporter"""
+    return AttendanceImporter(marked_by, chunk_size).run(lines, progress)
@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand, CommandError
+from courses.models import Section
+from attendance.reports import (
+    GROUPINGS, attendance_report, parse_bands, report_as_csv, report_as_json, report_bands,
+)
+
+
+class Command(BaseCommand):
+    help = 'Generate an attendance band report (for scheduled runs, e.g. from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--group',
+            choices=sorted(GROUPINGS),
+            default='section',
+            help='Group rows by section, department or semester',
+        )
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'json'],
+            default='csv',
+            help='Output format',
+        )
+        parser.add_argument(
+            '--bands',
+            help='Bands as name:low:high,... (e.g. "excellent:90:,good:75:90,poor::75")',
+        )
+        parser.add_argument('--semester', type=int, help='Only include sections of this semester id')
+        parser.add_argument('--department', help='Only include courses of this department')
+        parser.add_argument('--teacher', type=int, help='Only include sections of this teacher id')
+        parser.add_argument('--output', help='Write the report to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        try:
+            bands = parse_bands(options['bands']) if options['bands'] else report_bands()
+        except ValueError:
+            raise CommandError('Invalid --bands value. Use name:low:high, e.g. good:75:90')
+
+        sections = Section.objects.all()
+        if options['semester']:
+            sections = sections.filter(semester_id=options['semester'])
+        if options['department']:
+            sections = sections.filter(course__department=options['department'])
+        if options['teacher']:
+            sections = sections.filter(teacher_id=options['teacher'])
+
+        report = attendance_report(sections, bands=bands, group_by=options['group'])
+        if options['format'] == 'json':
+            content = report_as_json(report, bands=bands, group_by=options['group'])
+        else:
+            content = report_as_csv(report, bands=bands)
+
+        if options['output']:
+            with open(options['output'], 'w', newline='') as output:
+                output.write(content)
+            self.stdout.write(
+                self.style.SUCCESS(f'Wrote {len(report)} report rows to {options["output"]}')
+            )
+        else:
+            self.stdout.write(content)
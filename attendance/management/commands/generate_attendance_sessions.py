@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+from courses.models import Section, Semester
+from attendance.schedule import class_dates, generate_semester_sessions
+
+
+class Command(BaseCommand):
+    help = "Pre-generate a semester's attendance sessions from each section's schedule"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--semester',
+            help='Semester id or name (default: the current semester)',
+        )
+        parser.add_argument(
+            '--section',
+            type=int,
+            action='append',
+            dest='sections',
+            help='Only generate sessions for this section id (may be repeated)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report what would be created without writing anything',
+        )
+
+    def handle(self, *args, **options):
+        value = options['semester']
+        if value:
+            semesters = Semester.objects.filter(id=int(value)) if value.isdigit() else Semester.objects.filter(name=value)
+        else:
+            semesters = Semester.objects.filter(is_current=True)
+        semester = semesters.first()
+        if semester is None:
+            raise CommandError(f'No semester found for "{value}".' if value else 'No current semester is set.')
+
+        sections = Section.objects.filter(semester=semester)
+        if options['sections']:
+            sections = sections.filter(id__in=options['sections'])
+
+        result = generate_semester_sessions(semester, sections, dry_run=options['dry_run'])
+        for section, error in result['invalid']:
+            self.stdout.write(self.style.WARNING(f'  Skipped {section}: {error}'))
+
+        start_date, end_date = class_dates(semester)
+        action = 'would be created' if options['dry_run'] else 'created'
+        self.stdout.write(self.style.SUCCESS(
+            f'{semester.name} ({start_date} to {end_date}): {result["created"]} sessions {action}, '
+            f'{result["holidays"]} holiday meetings skipped, {len(result["invalid"])} sections skipped.'
+        ))
@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from attendance.rollups import rebuild_daily_rollups
+
+
+class Command(BaseCommand):
+    help = 'Backfill the daily attendance rollups used by the trend charts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--start',
+            help='First date to rebuild, YYYY-MM-DD (default: the earliest record)',
+        )
+        parser.add_argument(
+            '--end',
+            help='Last date to rebuild, YYYY-MM-DD (default: the latest record)',
+        )
+        parser.add_argument(
+            '--section',
+            type=int,
+            action='append',
+            dest='sections',
+            help='Only rebuild this section id (may be repeated)',
+        )
+
+    def handle(self, *args, **options):
+        dates = {}
+        for name in ('start', 'end'):
+            value = options[name]
+            try:
+                dates[name] = parse_date(value) if value else None
+            except ValueError:
+                dates[name] = None
+            if value and dates[name] is None:
+                raise CommandError(f'--{name} must be a date in YYYY-MM-DD format.')
+
+        started = time.monotonic()
+        written = rebuild_daily_rollups(dates['start'], dates['end'], options['sections'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {written} daily rollup rows in {time.monotonic() - started:.2f}s.'
+        ))
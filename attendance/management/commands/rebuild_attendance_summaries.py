@@ -0,0 +1,104 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from courses.models import Section
+from attendance.workers import init_worker, rebuild_chunk
+
+
+class Command(BaseCommand):
+    help = 'Recompute AttendanceSummary rows from attendance records, chunked by section'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--section',
+            type=int,
+            action='append',
+            dest='sections',
+            help='Only rebuild this section id (may be repeated)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=50,
+            help='Number of sections recounted per query (default: 50)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of processes to fan the chunks out to (default: 1)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report drifted summaries without writing anything',
+        )
+        parser.add_argument(
+            '--show',
+            type=int,
+            default=20,
+            help='Maximum number of drifted rows to list (default: 20)',
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1 or options['workers'] < 1:
+            raise CommandError('--chunk-size and --workers must be at least 1.')
+
+        sections = Section.objects.order_by('id')
+        if options['sections']:
+            sections = sections.filter(id__in=options['sections'])
+        section_ids = list(sections.values_list('id', flat=True))
+        size = options['chunk_size']
+        chunks = [section_ids[i:i + size] for i in range(0, len(section_ids), size)]
+        dry_run = options['dry_run']
+
+        if not chunks:
+            self.stdout.write(self.style.SUCCESS('No sections to rebuild.'))
+            return
+
+        started = time.monotonic()
+        checked = 0
+        drifted = []
+        for done, (chunk, result) in enumerate(self._run(chunks, dry_run, options['workers']), start=1):
+            checked += result['checked']
+            drifted.extend(result['drifted'])
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f'[{done}/{len(chunks)}] sections {chunk[0]}-{chunk[-1]}: '
+                f'{result["checked"]} summaries checked, {len(result["drifted"])} drifted '
+                f'({checked / elapsed if elapsed else checked:.0f} summaries/s)'
+            )
+
+        for section_id, student_id, stored, expected in sorted(drifted)[:options['show']]:
+            self.stdout.write(
+                f'  section {section_id} student {student_id}: '
+                f'stored {stored if stored else "missing"} -> expected {expected}'
+            )
+        if len(drifted) > options['show']:
+            self.stdout.write(f'  ... and {len(drifted) - options["show"]} more')
+
+        elapsed = time.monotonic() - started
+        action = 'would be rewritten' if dry_run else 'rewritten'
+        self.stdout.write(self.style.SUCCESS(
+            f'Checked {checked} summaries in {len(section_ids)} sections in {elapsed:.2f}s; '
+            f'{len(drifted)} {action}.'
+        ))
+
+    def _run(self, chunks, dry_run, workers):
+        """Yield (chunk, result) pairs as chunks finish"""
+        if workers == 1:
+            for chunk in chunks:
+                yield rebuild_chunk(chunk, dry_run)
+            return
+
+        # Spawned rather than forked: a fork would copy the parent's database
+        # connections and background threads such as the check-in flusher
+        connections.close_all()
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=init_worker) as executor:
+            futures = [executor.submit(rebuild_chunk, chunk, dry_run) for chunk in chunks]
+            for future in as_completed(futures):
+                yield future.result()
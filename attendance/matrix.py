@@ -0,0 +1,120 @@
+from courses.models import Enrollment
+
+from .models import Attendance, AttendanceSession
+
+# Integer codes stored in the matrix; 0 means no record for that session
+NOT_RECORDED = 0
+STATUS_CODES = {'present': 1, 'absent': 2, 'late': 3, 'excused': 4}
+STATUS_LABELS = ['Not Recorded'] + [label for value, label in Attendance.STATUS_CHOICES]
+STATUS_NAMES = [None] + [value for value, label in Attendance.STATUS_CHOICES]
+
+
+class AttendanceMatrix:
+    """
+    Students x sessions grid of integer-coded statuses for one section.
+
+    Cells live in a flat bytearray, one byte per student per session, with
+    ``row_index`` (student id -> row) and ``column_index`` (session id ->
+    column) to address them.
+    """
+
+    def __init__(self, section, enrollments, sessions):
+        self.section = section
+        self.enrollments = enrollments
+        self.sessions = sessions
+        self.row_index = {enrollment.student_id: i for i, enrollment in enumerate(enrollments)}
+        self.column_index = {session.id: j for j, session in enumerate(sessions)}
+        self.cells = bytearray(len(enrollments) * len(sessions))
+
+    @property
+    def shape(self):
+        return len(self.enrollments), len(self.sessions)
+
+    def set(self, student_id, session_id, status):
+        row = self.row_index.get(student_id)
+        column = self.column_index.get(session_id)
+        if row is not None and column is not None:
+            self.cells[row * len(self.sessions) + column] = STATUS_CODES[status]
+
+    def fill_column(self, session_id, status, student_ids=None):
+        """
+        Give every student (only ``student_ids`` if given) ``status`` for a
+        session, e.g. a sparse session's default for its roster.
+        """
+        if student_ids is None:
+            column = self.column_index[session_id]
+            width = len(self.sessions)
+            self.cells[column::width] = bytes([STATUS_CODES[status]]) * len(self.enrollments)
+        else:
+            for student_id in student_ids:
+                self.set(student_id, session_id, status)
+
+    def code(self, student_id, session_id):
+        """Status code for one cell"""
+        row = self.row_index[student_id]
+        return self.cells[row * len(self.sessions) + self.column_index[session_id]]
+
+    def row(self, student_id):
+        """Status codes of one student across every session, in column order"""
+        start = self.row_index[student_id] * len(self.sessions)
+        return self.cells[start:start + len(self.sessions)]
+
+    def rows(self):
+        """Yield (enrollment, status codes) for each student, in row order"""
+        width = len(self.sessions)
+        for i, enrollment in enumerate(self.enrollments):
+            yield enrollment, self.cells[i * width:(i + 1) * width]
+
+    def labelled_rows(self):
+        """Yield (enrollment, status labels) for display and export"""
+        for enrollment, codes in self.rows():
+            yield enrollment, [STATUS_LABELS[code] for code in codes]
+
+    def row_counts(self, student_id):
+        """Per-status counts for one student, keyed by status name"""
+        return self._count(self.row(student_id))
+
+    def column_counts(self, session_id):
+        """Per-status counts for one session, keyed by status name"""
+        column = self.column_index[session_id]
+        return self._count(self.cells[column::len(self.sessions)] if self.sessions else b'')
+
+    @staticmethod
+    def _count(codes):
+        return {name: codes.count(code) for name, code in STATUS_CODES.items()}
+
+
+def build_attendance_matrix(section, start_date=None, end_date=None, newest_first=False):
+    """
+    Build the AttendanceMatrix for a section's enrolled students.
+
+    ``start_date``/``end_date`` limit the window (both inclusive), so a
+    single month can be loaded without the rest of the term; sessions
+    scheduled after today are left out. All attendance
+    in the window is read with one values_list query; sessions stored
+    sparsely start from their default status for the students on their
+    roster.
+    """
+    sessions = AttendanceSession.objects.held().filter(section=section)
+    records = Attendance.objects.filter(session__section=section)
+    if start_date:
+        sessions = sessions.filter(date__gte=start_date)
+        records = records.filter(session__date__gte=start_date)
+    if end_date:
+        sessions = sessions.filter(date__lte=end_date)
+        records = records.filter(session__date__lte=end_date)
+
+    enrollments = list(
+        Enrollment.objects.filter(section=section, status='enrolled')
+        .select_related('student__profile__user')
+        .order_by('id')
+    )
+    sessions = list(sessions.order_by('-date' if newest_first else 'date'))
+
+    matrix = AttendanceMatrix(section, enrollments, sessions)
+    for session in sessions:
+        if session.default_status:
+            matrix.fill_column(session.id, session.default_status, session.roster)
+    for student_id, session_id, status in records.values_list('student_id', 'session_id', 'status'):
+        matrix.set(student_id, session_id, status)
+    return matrix
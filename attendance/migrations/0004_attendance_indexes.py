@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0003_alter_attendancesession_unique_together'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['session', 'status', 'student'], name='att_session_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['student', 'status', 'session'], name='att_student_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendancesummary',
+            index=models.Index(fields=['section', 'attendance_percentage'], name='att_summary_pct_idx'),
+        ),
+    ]
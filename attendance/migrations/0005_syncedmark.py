@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_profile_bio_profile_preferred_pronouns_and_more'),
+        ('attendance', '0004_attendance_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncedMark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('client_id', models.CharField(max_length=64, unique=True)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='attendance.attendancesession')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='accounts.student')),
+            ],
+            options={
+                'verbose_name': 'Synced Mark',
+                'verbose_name_plural': 'Synced Marks',
+            },
+        ),
+    ]
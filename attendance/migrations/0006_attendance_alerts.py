@@ -0,0 +1,55 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def raise_existing_alerts(apps, schema_editor):
+    """Alert every student already below the default threshold"""
+    AttendanceSummary = apps.get_model('attendance', 'AttendanceSummary')
+    AttendanceAlert = apps.get_model('attendance', 'AttendanceAlert')
+    AttendanceAlert.objects.bulk_create([
+        AttendanceAlert(section_id=section_id, student_id=student_id)
+        for section_id, student_id in AttendanceSummary.objects.filter(
+            attendance_percentage__lt=75.0
+        ).values_list('section_id', 'student_id')
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_profile_bio_profile_preferred_pronouns_and_more'),
+        ('courses', '0001_initial'),
+        ('attendance', '0005_syncedmark'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceAlertThreshold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('threshold', models.FloatField(default=75.0)),
+                ('section', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_threshold', to='courses.section')),
+            ],
+            options={
+                'verbose_name': 'Attendance Alert Threshold',
+                'verbose_name_plural': 'Attendance Alert Thresholds',
+            },
+        ),
+        migrations.CreateModel(
+            name='AttendanceAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('raised_at', models.DateTimeField(auto_now_add=True)),
+                ('section', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='courses.section')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='accounts.student')),
+            ],
+            options={
+                'verbose_name': 'Attendance Alert',
+                'verbose_name_plural': 'Attendance Alerts',
+                'unique_together': {('section', 'student')},
+            },
+        ),
+        migrations.RunPython(raise_existing_alerts, migrations.RunPython.noop),
+    ]
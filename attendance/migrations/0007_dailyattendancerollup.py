@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:59
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0001_initial'),
+        ('attendance', '0006_attendance_alerts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyAttendanceRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('present_count', models.PositiveIntegerField(default=0)),
+                ('absent_count', models.PositiveIntegerField(default=0)),
+                ('late_count', models.PositiveIntegerField(default=0)),
+                ('excused_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('section', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='courses.section')),
+            ],
+            options={
+                'verbose_name': 'Daily Attendance Rollup',
+                'verbose_name_plural': 'Daily Attendance Rollups',
+                'indexes': [models.Index(fields=['date', 'section'], name='att_rollup_date_idx')],
+                'unique_together': {('section', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0007_dailyattendancerollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendancesession',
+            name='default_status',
+            field=models.CharField(blank=True, choices=[('present', 'Present'), ('absent', 'Absent'), ('late', 'Late'), ('excused', 'Excused')], max_length=10),
+        ),
+    ]
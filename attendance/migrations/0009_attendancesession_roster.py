@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:47
+
+from django.db import migrations, models
+
+
+def backfill_roster(apps, schema_editor):
+    """Give existing sparse sessions the students whose enrollment began on or before the session"""
+    AttendanceSession = apps.get_model('attendance', 'AttendanceSession')
+    Enrollment = apps.get_model('courses', 'Enrollment')
+    sessions = list(AttendanceSession.objects.exclude(default_status=''))
+    for session in sessions:
+        session.roster = sorted(
+            Enrollment.objects.filter(section_id=session.section_id, enrollment_date__date__lte=session.date)
+            .values_list('student_id', flat=True)
+        )
+    AttendanceSession.objects.bulk_update(sessions, ['roster'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0001_initial'),
+        ('attendance', '0008_attendancesession_default_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendancesession',
+            name='roster',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.RunPython(backfill_roster, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0009_attendancesession_roster'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendancesession',
+            name='checkin_open_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,9 +1,27 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import ExpressionWrapper, F, FloatField, Value
+from django.db.models.functions import Coalesce, NullIf
+from django.utils import timezone
 from accounts.models import Student
 from courses.models import Section
 
 # Create your models here.
 
+ATTENDANCE_STATUS_CHOICES = [
+    ('present', 'Present'),
+    ('absent', 'Absent'),
+    ('late', 'Late'),
+    ('excused', 'Excused'),
+]
+
+# Students below this attendance percentage raise an alert, unless their section sets its own
+LOW_ATTENDANCE_THRESHOLD = 75.0
+
+class AttendanceSessionQuerySet(models.QuerySet):
+    def held(self, on=None):
+        """Sessions on or before a day (today by default); later ones are only scheduled"""
+        return self.filter(date__lte=on or timezone.localdate())
+
 class AttendanceSession(models.Model):
     section = models.ForeignKey(Section, on_delete=models.CASCADE)
     date = models.DateField()
@@ -11,8 +29,16 @@ class AttendanceSession(models.Model):
     end_time = models.TimeField(null=True, blank=True)
     topic_covered = models.CharField(max_length=200, blank=True)
     notes = models.TextField(blank=True)
+    # Sparse storage: when set, students on ``roster`` without an Attendance row have this status
+    default_status = models.CharField(max_length=10, choices=ATTENDANCE_STATUS_CHOICES, blank=True)
+    # Student ids enrolled when a sparse session was marked; later enrollment changes leave it alone
+    roster = models.JSONField(default=list, blank=True)
+    # Self check-in is accepted until this moment; shared by every worker process
+    checkin_open_until = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = AttendanceSessionQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.section} - {self.date}"
 
@@ -22,12 +48,7 @@ class AttendanceSession(models.Model):
         unique_together = ['section', 'date']
 
 class Attendance(models.Model):
-    STATUS_CHOICES = [
-        ('present', 'Present'),
-        ('absent', 'Absent'),
-        ('late', 'Late'),
-        ('excused', 'Excused'),
-    ]
+    STATUS_CHOICES = ATTENDANCE_STATUS_CHOICES
 
     student = models.ForeignKey(Student, on_delete=models.CASCADE)
     session = models.ForeignKey(AttendanceSession, on_delete=models.CASCADE)
@@ -44,8 +65,20 @@ class Attendance(models.Model):
         verbose_name = "Attendance Record"
         verbose_name_plural = "Attendance Records"
         unique_together = ['student', 'session']
+        indexes = [
+            # Covers per-session status counts and section matrix/export reads
+            models.Index(fields=['session', 'status', 'student'], name='att_session_status_idx'),
+            # Covers per-student status counts for summaries
+            models.Index(fields=['student', 'status', 'session'], name='att_student_status_idx'),
+        ]
 
 class AttendanceSummary(models.Model):
+    # Fields written when a summary is recalculated in bulk
+    COUNT_FIELDS = [
+        'total_sessions', 'present_count', 'absent_count', 'late_count',
+        'excused_count', 'attendance_percentage', 'last_updated',
+    ]
+
     student = models.ForeignKey(Student, on_delete=models.CASCADE)
     section = models.ForeignKey(Section, on_delete=models.CASCADE)
     total_sessions = models.PositiveIntegerField(default=0)
@@ -59,18 +92,13 @@ class AttendanceSummary(models.Model):
     def __str__(self):
         return f"{self.student.profile.user.username} - {self.section} - {self.attendance_percentage}%"
 
-    def update_summary(self):
-        """Calculate and update attendance summary"""
-        attendance_records = Attendance.objects.filter(
-            student=self.student,
-            session__section=self.section
-        )
-        
-        self.total_sessions = attendance_records.count()
-        self.present_count = attendance_records.filter(status='present').count()
-        self.absent_count = attendance_records.filter(status='absent').count()
-        self.late_count = attendance_records.filter(status='late').count()
-        self.excused_count = attendance_records.filter(status='excused').count()
+    def set_counts(self, present=0, absent=0, late=0, excused=0):
+        """Set the counters and derived percentage without saving"""
+        self.present_count = present
+        self.absent_count = absent
+        self.late_count = late
+        self.excused_count = excused
+        self.total_sessions = present + absent + late + excused
         
         if self.total_sessions > 0:
             # Consider present and late as attended
@@ -78,10 +106,151 @@ class AttendanceSummary(models.Model):
             self.attendance_percentage = (attended / self.total_sessions) * 100
         else:
             self.attendance_percentage = 0.0
-        
-        self.save()
+        self.last_updated = timezone.now()
+
+    @classmethod
+    def apply_transition(cls, section, student_ids, old_status, new_status):
+        """
+        Move the given students' counters from old_status to new_status.
+
+        ``old_status`` is None for a newly recorded session. Only the affected
+        counters and the percentage are touched, in one UPDATE built from
+        F-expressions, so the cost does not depend on how many sessions the
+        students already have. Summaries must already exist.
+        """
+        if old_status == new_status:
+            return 0
+        deltas = {'total_sessions': 0 if old_status else 1}
+        if old_status:
+            deltas[f'{old_status}_count'] = -1
+        deltas[f'{new_status}_count'] = 1
+
+        updates = {field: F(field) + delta for field, delta in deltas.items()}
+        total = F('total_sessions') + deltas['total_sessions']
+        attended = (
+            F('present_count') + deltas.get('present_count', 0)
+            + F('late_count') + deltas.get('late_count', 0)
+        )
+        # Consider present and late as attended
+        updates['attendance_percentage'] = Coalesce(
+            ExpressionWrapper(attended * 100.0 / NullIf(total, 0), output_field=FloatField()),
+            Value(0.0),
+        )
+        updates['last_updated'] = timezone.now()
+        return cls.objects.filter(section=section, student_id__in=student_ids).update(**updates)
+
+    def update_summary(self):
+        """Recount attendance from scratch; repairs counters that have drifted"""
+        from .services import refresh_summaries
+
+        refresh_summaries(self.section, [self.student_id])
+        self.refresh_from_db()
 
     class Meta:
         verbose_name = "Attendance Summary"
         verbose_name_plural = "Attendance Summaries"
         unique_together = ['student', 'section']
+        indexes = [
+            # Low-attendance filters and band reports per section
+            models.Index(fields=['section', 'attendance_percentage'], name='att_summary_pct_idx'),
+        ]
+
+class SyncedMark(models.Model):
+    """Client-generated id of an offline attendance mark that has been applied"""
+    client_id = models.CharField(max_length=64, unique=True)
+    session = models.ForeignKey(AttendanceSession, on_delete=models.CASCADE)
+    student = models.ForeignKey(Student, on_delete=models.CASCADE)
+    received_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.client_id} - {self.session}"
+
+    class Meta:
+        verbose_name = "Synced Mark"
+        verbose_name_plural = "Synced Marks"
+
+class AttendanceAlertThreshold(models.Model):
+    """Low-attendance threshold of one section, overriding LOW_ATTENDANCE_THRESHOLD"""
+    section = models.OneToOneField(Section, on_delete=models.CASCADE, related_name='attendance_threshold')
+    threshold = models.FloatField(default=LOW_ATTENDANCE_THRESHOLD)
+
+    def __str__(self):
+        return f"{self.section} - {self.threshold}%"
+
+    class Meta:
+        verbose_name = "Attendance Alert Threshold"
+        verbose_name_plural = "Attendance Alert Thresholds"
+
+class AttendanceAlert(models.Model):
+    """
+    A student currently below their section's low-attendance threshold.
+
+    Rows are raised and cleared by services.sync_alerts only when a summary
+    crosses the threshold, so dashboards count alerts instead of filtering
+    every summary by percentage.
+    """
+    student = models.ForeignKey(Student, on_delete=models.CASCADE)
+    section = models.ForeignKey(Section, on_delete=models.CASCADE)
+    raised_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.student} - {self.section}"
+
+    class Meta:
+        verbose_name = "Attendance Alert"
+        verbose_name_plural = "Attendance Alerts"
+        unique_together = ['section', 'student']
+
+class DailyAttendanceRollup(models.Model):
+    """Per-status attendance counts of one section on one day, for trend charts"""
+    # Per-status counters, keyed by the Attendance status they count
+    STATUS_FIELDS = {
+        'present': 'present_count',
+        'absent': 'absent_count',
+        'late': 'late_count',
+        'excused': 'excused_count',
+    }
+
+    date = models.DateField()
+    section = models.ForeignKey(Section, on_delete=models.CASCADE)
+    present_count = models.PositiveIntegerField(default=0)
+    absent_count = models.PositiveIntegerField(default=0)
+    late_count = models.PositiveIntegerField(default=0)
+    excused_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.section} - {self.date}"
+
+    @classmethod
+    def apply_deltas(cls, section_id, day, deltas):
+        """
+        Add ``deltas`` (status -> change in count) to a section's row for a day.
+
+        The row is moved with one F-expression UPDATE and only created when
+        the day has no row yet, so concurrent markings never lose counts.
+        """
+        deltas = {cls.STATUS_FIELDS[status]: delta for status, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        updates = {field: F(field) + delta for field, delta in deltas.items()}
+        rows = cls.objects.filter(section_id=section_id, date=day)
+        if rows.update(updated_at=timezone.now(), **updates):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(
+                    section_id=section_id, date=day, **{field: max(delta, 0) for field, delta in deltas.items()}
+                )
+        except IntegrityError:
+            # Another marking created the row first
+            rows.update(updated_at=timezone.now(), **updates)
+
+    class Meta:
+        verbose_name = "Daily Attendance Rollup"
+        verbose_name_plural = "Daily Attendance Rollups"
+        unique_together = ['section', 'date']
+        indexes = [
+            # Campus-wide and per-department series scan a date range
+            models.Index(fields=['date', 'section'], name='att_rollup_date_idx'),
+        ]
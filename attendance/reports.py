@@ -0,0 +1,125 @@
+import csv
+import io
+import json
+
+from django.conf import settings
+from django.db.models import Avg, Count, Q
+
+from .models import AttendanceAlert, AttendanceSummary
+
+# (name, lower bound inclusive, upper bound exclusive); None leaves a side open
+DEFAULT_BANDS = [
+    ('excellent', 90, None),
+    ('good', 75, 90),
+    ('poor', None, 75),
+]
+
+# Report groupings: the AttendanceSummary fields grouped on, the last one labels the row
+GROUPINGS = {
+    'section': ['section'],
+    'department': ['section__course__department'],
+    'semester': ['section__semester', 'section__semester__name'],
+}
+
+
+def report_bands():
+    """Bands configured with ATTENDANCE_REPORT_BANDS, or the defaults"""
+    return getattr(settings, 'ATTENDANCE_REPORT_BANDS', DEFAULT_BANDS)
+
+
+def parse_bands(value):
+    """Parse bands written as ``name:low:high,...``, e.g. ``good:75:90``"""
+    bands = []
+    for item in value.split(','):
+        name, low, high = (item.split(':') + ['', ''])[:3]
+        bands.append((name.strip(), float(low) if low else None, float(high) if high else None))
+    return bands
+
+
+def band_filter(low, high):
+    condition = Q()
+    if low is not None:
+        condition &= Q(attendance_percentage__gte=low)
+    if high is not None:
+        condition &= Q(attendance_percentage__lt=high)
+    return condition
+
+
+def attendance_report(sections, bands=None, group_by='section'):
+    """
+    Count students per attendance band for many sections at once.
+
+    One GROUP BY over AttendanceSummary produces, for every group, the
+    number of students, the average attendance and a ``<band>_count``
+    column per band via conditional aggregation. ``group_by`` is one of
+    GROUPINGS; each row's ``group`` holds its label and ``band_counts`` the
+    band counts in band order, and ``low_attendance_alerts`` the number of
+    students below their section's alert threshold. Section reports
+    also carry the Section as ``section`` and list sections without any
+    summaries. Returns a list of dicts ordered by group.
+    """
+    bands = bands or report_bands()
+    fields = GROUPINGS[group_by]
+    annotations = {
+        'total_students': Count('id'),
+        'avg_attendance': Avg('attendance_percentage'),
+    }
+    for name, low, high in bands:
+        annotations[f'{name}_count'] = Count('id', filter=band_filter(low, high))
+
+    rows = list(
+        AttendanceSummary.objects.filter(section__in=sections)
+        .values(*fields)
+        .annotate(**annotations)
+        .order_by(*fields)
+    )
+    alerts = {
+        row[fields[0]]: row['alerts']
+        for row in AttendanceAlert.objects.filter(section__in=sections)
+        .values(fields[0]).annotate(alerts=Count('id')).order_by()
+    }
+    for row in rows:
+        row['avg_attendance'] = round(row['avg_attendance'] or 0, 1)
+        row['group'] = row[fields[-1]]
+        row['low_attendance_alerts'] = alerts.get(row[fields[0]], 0)
+
+    if group_by == 'section':
+        by_section = {row['section']: row for row in rows}
+        empty = dict(dict.fromkeys(annotations, 0), low_attendance_alerts=0)
+        rows = []
+        for section in sections.select_related('course').order_by('course__code', 'section_number'):
+            row = by_section.get(section.id, dict(empty, section=section.id))
+            row['section'] = section
+            row['group'] = str(section)
+            rows.append(row)
+
+    for row in rows:
+        row['band_counts'] = [row[f'{name}_count'] for name, low, high in bands]
+    return rows
+
+
+def report_columns(bands):
+    """Column names of a report, in output order"""
+    return ['group', 'total_students', 'avg_attendance'] + [f'{name}_count' for name, low, high in bands]
+
+
+def report_as_csv(report, bands=None):
+    """Render a report as CSV text"""
+    columns = report_columns(bands or report_bands())
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(columns)
+    for row in report:
+        writer.writerow([row[column] for column in columns])
+    return output.getvalue()
+
+
+def report_as_json(report, bands=None, group_by='section'):
+    """Render a report as a JSON document with its band definitions"""
+    bands = bands or report_bands()
+    columns = report_columns(bands)
+    return json.dumps({
+        'group_by': group_by,
+        'bands': [{'name': name, 'min': low, 'max': high} for name, low, high in bands],
+        'rows': [{column: row[column] for column in columns} for row in report],
+    })
@@ -0,0 +1,104 @@
+from django.db import transaction
+from django.db.models import Max, Sum
+from django.utils import timezone
+
+from .models import Attendance, AttendanceSession, DailyAttendanceRollup
+from .services import add_counts, implicit_session_counts, status_counts
+
+
+def rebuild_daily_rollups(start_date=None, end_date=None, section_ids=None):
+    """
+    Recompute DailyAttendanceRollup rows from attendance records.
+
+    Counts for every (date, section) pair in the window come from one
+    grouped query, plus the statuses implied by sparse sessions; the window's rows are then replaced in one transaction
+    with a bulk_create. Returns the number of rows written.
+    """
+    sessions = AttendanceSession.objects.all()
+    rollups = DailyAttendanceRollup.objects.all()
+    if start_date:
+        sessions = sessions.filter(date__gte=start_date)
+        rollups = rollups.filter(date__gte=start_date)
+    if end_date:
+        sessions = sessions.filter(date__lte=end_date)
+        rollups = rollups.filter(date__lte=end_date)
+    if section_ids:
+        sessions = sessions.filter(section_id__in=section_ids)
+        rollups = rollups.filter(section_id__in=section_ids)
+
+    counts = {
+        (row['session__date'], row['session__section_id']): row
+        for row in status_counts(
+            Attendance.objects.filter(session__in=sessions), 'session__date', 'session__section_id'
+        )
+    }
+    for session_id, (day, section_id, status, count) in implicit_session_counts(sessions).items():
+        add_counts(counts.setdefault((day, section_id), {}), {status: count})
+
+    now = timezone.now()
+    rows = [
+        DailyAttendanceRollup(
+            date=day,
+            section_id=section_id,
+            present_count=row.get('present', 0),
+            absent_count=row.get('absent', 0),
+            late_count=row.get('late', 0),
+            excused_count=row.get('excused', 0),
+            updated_at=now,
+        )
+        for (day, section_id), row in counts.items()
+    ]
+    with transaction.atomic():
+        rollups.delete()
+        DailyAttendanceRollup.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
+
+
+def rollup_queryset(department=None, start_date=None, end_date=None):
+    """Rollup rows of a date window, campus-wide or for one department"""
+    rollups = DailyAttendanceRollup.objects.all()
+    if department:
+        rollups = rollups.filter(section__course__department=department)
+    if start_date:
+        rollups = rollups.filter(date__gte=start_date)
+    if end_date:
+        rollups = rollups.filter(date__lte=end_date)
+    return rollups
+
+
+def attendance_series(department=None, start_date=None, end_date=None):
+    """
+    Daily attendance points for trend charts, oldest first.
+
+    Each point sums the day's rollup rows into per-status counts and an
+    attendance rate (present and late count as attended), so a year of
+    data is a few hundred grouped rows rather than every Attendance row.
+    """
+    series = []
+    for row in (
+        rollup_queryset(department, start_date, end_date)
+        .values('date')
+        .annotate(
+            present=Sum('present_count'),
+            absent=Sum('absent_count'),
+            late=Sum('late_count'),
+            excused=Sum('excused_count'),
+        )
+        .order_by('date')
+    ):
+        total = row['present'] + row['absent'] + row['late'] + row['excused']
+        series.append({
+            'date': row['date'].isoformat(),
+            'present': row['present'],
+            'absent': row['absent'],
+            'late': row['late'],
+            'excused': row['excused'],
+            'total': total,
+            'attendance_rate': round((row['present'] + row['late']) * 100.0 / total, 1) if total else 0.0,
+        })
+    return series
+
+
+def series_last_modified(department=None, start_date=None, end_date=None):
+    """When any rollup row of the window last changed, for conditional requests"""
+    return rollup_queryset(department, start_date, end_date).aggregate(latest=Max('updated_at'))['latest']
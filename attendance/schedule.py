@@ -0,0 +1,184 @@
+import re
+from collections import defaultdict, namedtuple
+from datetime import time, timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from calendar_app.models import AcademicCalendar, CalendarEvent
+from courses.models import Section
+
+from .models import AttendanceSession
+
+# Day abbreviations used in Section.schedule, Monday = 0
+WEEKDAYS = {'M': 0, 'T': 1, 'Tu': 1, 'W': 2, 'Th': 3, 'R': 3, 'F': 4, 'Sa': 5, 'S': 5, 'Su': 6}
+
+DAYS_PATTERN = re.compile(r'Th|Tu|Sa|Su|M|T|W|R|F|S')
+MEETING_PATTERN = re.compile(
+    r'^\s*(?P<days>[A-Za-z]+)\s+'
+    r'(?P<start>\d{1,2}(?::\d{2})?)\s*(?P<start_meridiem>[AaPp][Mm])?\s*[-–]\s*'
+    r'(?P<end>\d{1,2}(?::\d{2})?)\s*(?P<end_meridiem>[AaPp][Mm])?\s*$'
+)
+
+# Sessions created per INSERT
+GENERATE_BATCH_SIZE = 500
+
+Meeting = namedtuple('Meeting', ['weekdays', 'start_time', 'end_time'])
+
+
+class ScheduleError(ValueError):
+    """Raised for a Section.schedule that cannot be parsed"""
+
+
+def _clock(value, meridiem=None):
+    """Minutes after midnight of '10', '10:30' with an optional AM/PM"""
+    hours, _, minutes = value.partition(':')
+    hours, minutes = int(hours), int(minutes or 0)
+    if minutes > 59 or hours > 23 or (meridiem and not 1 <= hours <= 12):
+        raise ValueError(value)
+    if meridiem:
+        hours = hours % 12 + (12 if meridiem.upper() == 'PM' else 0)
+    return hours * 60 + minutes
+
+
+def parse_schedule(schedule):
+    """
+    Parse a schedule such as 'MWF 10:00-11:00 AM' or 'TTh 11:00-12:30 PM'.
+
+    Several meetings may be separated by ';' or ','. A meridiem written
+    once after the end time applies to the end; the start takes whichever
+    of AM/PM puts it closest before the end, so 'MW 2:00-3:30 PM' starts at
+    14:00 and 'TTh 11:00-12:30 PM' at 11:00. Returns a list of Meeting
+    tuples and raises ScheduleError for anything else.
+    """
+    meetings = []
+    for part in re.split(r'[;,]', schedule or ''):
+        if not part.strip():
+            continue
+        match = MEETING_PATTERN.match(part)
+        days = DAYS_PATTERN.findall(match.group('days')) if match else []
+        if not match or ''.join(days) != match.group('days'):
+            raise ScheduleError(f'Cannot parse schedule "{schedule}"')
+        try:
+            end = _clock(match.group('end'), match.group('end_meridiem'))
+            if match.group('start_meridiem'):
+                start = _clock(match.group('start'), match.group('start_meridiem'))
+            elif match.group('end_meridiem'):
+                candidates = [_clock(match.group('start'), meridiem) for meridiem in ('AM', 'PM')]
+                start = max([minutes for minutes in candidates if minutes < end] or candidates)
+            else:
+                start = _clock(match.group('start'))
+        except ValueError:
+            raise ScheduleError(f'Invalid time in schedule "{schedule}"')
+        if start >= end:
+            raise ScheduleError(f'Schedule "{schedule}" ends before it starts')
+        meetings.append(Meeting(
+            frozenset(WEEKDAYS[day] for day in days),
+            time(start // 60, start % 60),
+            time(end // 60, end % 60),
+        ))
+    if not meetings:
+        raise ScheduleError('Schedule is empty')
+    return meetings
+
+
+def class_dates(semester):
+    """
+    First and last day of classes for a semester, from the AcademicCalendar
+    of the same name (or covering its start date), else the semester itself.
+    """
+    calendar = (
+        AcademicCalendar.objects.filter(name=semester.name).first()
+        or AcademicCalendar.objects.filter(
+            start_date__lte=semester.start_date, end_date__gte=semester.start_date
+        ).first()
+    )
+    if calendar:
+        return calendar.classes_start, calendar.classes_end
+    return semester.start_date, semester.end_date
+
+
+def holiday_dates(start_date, end_date):
+    """
+    Holiday dates between two days from CalendarEvent rows of type
+    'holiday': ``{section_id or None: set of dates}``, None for campus-wide.
+    """
+    holidays = defaultdict(set)
+    events = CalendarEvent.objects.filter(
+        event_type='holiday',
+        start_datetime__date__lte=end_date,
+        end_datetime__date__gte=start_date,
+    ).values_list('section_id', 'start_datetime', 'end_datetime')
+    for section_id, starts, ends in events:
+        day = max(timezone.localtime(starts).date(), start_date)
+        while day <= min(timezone.localtime(ends).date(), end_date):
+            holidays[section_id].add(day)
+            day += timedelta(days=1)
+    return holidays
+
+
+def generate_semester_sessions(semester, sections=None, dry_run=False):
+    """
+    Create the AttendanceSession rows of a whole semester in one pass.
+
+    Each section's schedule is expanded over the semester's class dates,
+    skipping holidays and days that already have a session, and every new
+    session is written with one bulk_create in a single transaction. The
+    reads are three queries however many sections there are. Returns a
+    dict with the sessions ``created``, the ``holidays`` skipped and the
+    sections whose schedule could not be parsed (``invalid``, as
+    ``(section, error)`` pairs).
+    """
+    if sections is None:
+        sections = Section.objects.filter(semester=semester)
+    sections = list(sections.select_related('course'))
+    start_date, end_date = class_dates(semester)
+    holidays = holiday_dates(start_date, end_date)
+    existing = set(
+        AttendanceSession.objects.filter(
+            section__in=sections, date__range=(start_date, end_date)
+        ).values_list('section_id', 'date')
+    )
+
+    to_create = []
+    skipped = 0
+    invalid = []
+    for section in sections:
+        try:
+            meetings = parse_schedule(section.schedule)
+        except ScheduleError as error:
+            invalid.append((section, str(error)))
+            continue
+        closed = holidays[None] | holidays[section.id]
+        day = start_date
+        while day <= end_date:
+            meeting = next((m for m in meetings if day.weekday() in m.weekdays), None)
+            if meeting and (section.id, day) not in existing:
+                if day in closed:
+                    skipped += 1
+                else:
+                    to_create.append(AttendanceSession(
+                        section=section, date=day,
+                        start_time=meeting.start_time, end_time=meeting.end_time,
+                    ))
+            day += timedelta(days=1)
+
+    if not dry_run:
+        with transaction.atomic():
+            AttendanceSession.objects.bulk_create(to_create, batch_size=GENERATE_BATCH_SIZE)
+    return {'created': len(to_create), 'holidays': skipped, 'invalid': invalid}
+
+
+def upcoming_sessions(sections, days=7, today=None):
+    """
+    Sessions of the given sections in the next ``days`` days, soonest first.
+
+    With sessions generated ahead of time this is a range scan on the
+    (section, date) unique index rather than a guess from the schedule.
+    """
+    today = today or timezone.localdate()
+    return (
+        AttendanceSession.objects.filter(section__in=sections, date__range=(today, today + timedelta(days=days)))
+        .select_related('section__course')
+        .order_by('date', 'start_time')
+    )
@@ -0,0 +1,648 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, FloatField, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils.dateparse import parse_date, parse_time
+
+from courses.models import Enrollment, Section
+
+from .cube import update_cached_cube
+from .models import (
+    LOW_ATTENDANCE_THRESHOLD, Attendance, AttendanceAlert, AttendanceAlertThreshold, AttendanceSession,
+    AttendanceSummary, DailyAttendanceRollup, SyncedMark,
+)
+
+# Statuses that can be recorded for a student, in display order
+VALID_STATUSES = [choice[0] for choice in Attendance.STATUS_CHOICES]
+
+# Fields copied from a mark onto an Attendance row
+MARK_FIELDS = ['status', 'arrival_time', 'notes', 'marked_by']
+
+# Seconds a teacher's overview stays cached; attendance writes clear it sooner
+OVERVIEW_CACHE_TIMEOUT = 300
+
+
+def sparse_default_status():
+    """
+    Status that sessions marked for a whole roster are stored sparsely
+    around, from the ATTENDANCE_SPARSE_DEFAULT_STATUS setting ('' keeps
+    one row per student).
+    """
+    status = getattr(settings, 'ATTENDANCE_SPARSE_DEFAULT_STATUS', '')
+    return status if status in VALID_STATUSES else ''
+
+
+def mark_session(session, marks, marked_by, overwrite=True, default_status=None):
+    """
+    Record attendance for many students of one session in a single pass.
+
+    ``marks`` maps student id -> dict with ``status`` and optional
+    ``arrival_time`` and ``notes``. Existing rows for the session are read
+    once, diffed in memory, and written back with one bulk_create and one
+    bulk_update. Summaries of students whose status changed are moved by
+    delta rather than recounted, and so is the section's daily rollup for
+    the session date. With ``overwrite=False`` students who
+    already have a record are left as they are.
+
+    Passing ``default_status`` switches the session to sparse storage (see
+    diff_sparse_marks); sessions already stored sparsely stay that way.
+    Returns a dict with the number of created, updated and unchanged rows.
+    """
+    with transaction.atomic():
+        existing = {
+            record.student_id: record
+            for record in Attendance.objects.filter(session=session)
+        }
+
+        newly_sparse = bool(default_status) and not session.default_status
+        if newly_sparse:
+            session.default_status = default_status
+
+        to_delete = []
+        if session.default_status:
+            roster = list(session.roster)
+            to_create, to_update, to_delete, transitions = diff_sparse_marks(
+                session, existing, marks, marked_by, overwrite, newly_sparse
+            )
+            if newly_sparse or session.roster != roster:
+                session.save(update_fields=['default_status', 'roster'])
+        else:
+            to_create = []
+            to_update = []
+            transitions = []
+            for student_id, mark in marks.items():
+                values = clean_mark(mark, marked_by)
+                record = existing.get(student_id)
+                if record is None:
+                    to_create.append(Attendance(student_id=student_id, session=session, **values))
+                    transitions.append((student_id, None, values['status']))
+                elif overwrite and any(getattr(record, field) != values[field] for field in MARK_FIELDS):
+                    transitions.append((student_id, record.status, values['status']))
+                    for field, value in values.items():
+                        setattr(record, field, value)
+                    to_update.append(record)
+
+        if to_create:
+            Attendance.objects.bulk_create(to_create)
+        if to_update:
+            Attendance.objects.bulk_update(to_update, MARK_FIELDS)
+        if to_delete:
+            Attendance.objects.filter(id__in=[record.id for record in to_delete]).delete()
+        apply_transitions(session.section, transitions)
+        DailyAttendanceRollup.apply_deltas(session.section_id, session.date, status_deltas(transitions))
+        invalidate_teacher_overview(session.section.teacher_id)
+        if transitions:
+            statuses = {student_id: status for student_id, old_status, status in transitions}
+            transaction.on_commit(lambda: update_cached_cube(session, statuses))
+
+    changed = len(to_update) + len(to_delete)
+    return {
+        'created': len(to_create),
+        'updated': changed,
+        'unchanged': len(marks) - len(to_create) - changed,
+    }
+
+
+def diff_sparse_marks(session, existing, marks, marked_by, overwrite, newly_sparse):
+    """
+    Diff marks for a session stored sparsely.
+
+    Every student on the session's ``roster`` without a row implicitly has
+    its ``default_status``, so only exceptions (another status, an arrival
+    time or notes) are stored and a mark back to the plain default deletes
+    the row. When the session has just become sparse the roster is the
+    students enrolled now, and those that were not marked take the default
+    too; enrolled students marked later are added to it. The roster is
+    fixed at marking time so that later enrollment changes do not rewrite
+    past sessions. Updates ``session.roster`` in place and returns
+    ``(to_create, to_update, to_delete, transitions)``.
+    """
+    default = session.default_status
+    enrolled = set(
+        Enrollment.objects.filter(section_id=session.section_id, status='enrolled')
+        .values_list('student_id', flat=True)
+    )
+    roster = set(enrolled if newly_sparse else session.roster)
+    to_create = []
+    to_update = []
+    to_delete = []
+    transitions = []
+    if newly_sparse:
+        for student_id in enrolled - marks.keys() - existing.keys():
+            transitions.append((student_id, None, default))
+
+    for student_id, mark in marks.items():
+        values = clean_mark(mark, marked_by)
+        record = existing.get(student_id)
+        if record is not None:
+            old_status = record.status
+        elif student_id in roster and not newly_sparse:
+            old_status = default
+        else:
+            old_status = None
+        if old_status is not None and not overwrite:
+            continue
+
+        if student_id in enrolled:
+            roster.add(student_id)
+        if (student_id in roster and values['status'] == default
+                and not values['arrival_time'] and not values['notes']):
+            if record is not None:
+                to_delete.append(record)
+        elif record is None:
+            to_create.append(Attendance(student_id=student_id, session=session, **values))
+        elif any(getattr(record, field) != values[field] for field in MARK_FIELDS):
+            for field, value in values.items():
+                setattr(record, field, value)
+            to_update.append(record)
+        if old_status != values['status']:
+            transitions.append((student_id, old_status, values['status']))
+    session.roster = sorted(roster)
+    return to_create, to_update, to_delete, transitions
+
+
+def student_recent_attendance(student, limit=10):
+    """
+    A student's latest attendance records, newest first.
+
+    Sparse sessions with the student on their roster but no row for them
+    contribute an unsaved Attendance carrying the session's default status,
+    so callers see the
+    same records whichever way the sessions were stored.
+    """
+    records = list(
+        Attendance.objects.filter(student=student)
+        .select_related('session__section__course').order_by('-session__date')[:limit]
+    )
+    implicit = []
+    for session in (
+        AttendanceSession.objects.exclude(default_status='')
+        .filter(section__enrollment__student=student)
+        .exclude(attendance__student=student)
+        .select_related('section__course').order_by('-date').iterator()
+    ):
+        if student.id in session.roster:
+            implicit.append(Attendance(student=student, session=session, status=session.default_status))
+            if len(implicit) == limit:
+                break
+    records += implicit
+    records.sort(key=lambda record: record.session.date, reverse=True)
+    return records[:limit]
+
+
+def sync_marks(teacher, marks, marked_by):
+    """
+    Apply a batch of offline marks that may span several sessions and sections.
+
+    Each mark is a dict with a client-generated ``client_id`` plus
+    ``section``, ``date``, ``student``, ``status`` and optional
+    ``arrival_time`` and ``notes``. Marks whose client_id was already
+    applied are skipped after a single lookup, so retries and duplicate
+    uploads cost almost nothing. The rest are validated against the
+    teacher's sections and rosters in bulk, missing sessions are created
+    with one bulk_create, and each session is written through
+    mark_session, all in one transaction.
+
+    Returns a dict with the ``applied`` and ``duplicate`` counts and the
+    ``rejected`` marks as ``{'client_id', 'error'}`` dicts.
+    """
+    rejected = []
+    pending = {}
+    for mark in marks:
+        client_id = str(mark.get('client_id') or '')[:64] if isinstance(mark, dict) else ''
+        if not client_id:
+            rejected.append({'client_id': None, 'error': 'Missing client_id.'})
+        elif client_id not in pending:
+            pending[client_id] = mark
+
+    already_synced = set(
+        SyncedMark.objects.filter(client_id__in=list(pending)).values_list('client_id', flat=True)
+    )
+    duplicates = len(marks) - len(rejected) - len(pending) + len(already_synced)
+    pending = {client_id: mark for client_id, mark in pending.items() if client_id not in already_synced}
+    if not pending:
+        return {'applied': 0, 'duplicate': duplicates, 'rejected': rejected}
+
+    sections = {
+        section.id: section
+        for section in Section.objects.filter(
+            teacher=teacher,
+            id__in={mark.get('section') for mark in pending.values() if isinstance(mark.get('section'), int)},
+        )
+    }
+    enrolled = set(
+        Enrollment.objects.filter(section_id__in=list(sections), status='enrolled')
+        .values_list('section_id', 'student_id')
+    )
+
+    accepted = {}
+    for client_id, mark in pending.items():
+        try:
+            session_date = parse_date(str(mark.get('date') or ''))
+        except ValueError:
+            session_date = None
+        if mark.get('section') not in sections:
+            error = 'Unknown section.'
+        elif session_date is None:
+            error = 'Invalid date.'
+        elif (mark['section'], mark.get('student')) not in enrolled:
+            error = 'Student is not enrolled in this section.'
+        elif mark.get('status') not in VALID_STATUSES:
+            error = 'Invalid status.'
+        else:
+            accepted[client_id] = (mark['section'], session_date, mark)
+            continue
+        rejected.append({'client_id': client_id, 'error': error})
+
+    with transaction.atomic():
+        keys = {(section_id, session_date) for section_id, session_date, mark in accepted.values()}
+        sessions = {
+            (session.section_id, session.date): session
+            for session in AttendanceSession.objects.filter(
+                section_id__in={section_id for section_id, session_date in keys},
+                date__in={session_date for section_id, session_date in keys},
+            )
+        }
+        missing = [AttendanceSession(section_id=section_id, date=session_date)
+                   for section_id, session_date in keys - sessions.keys()]
+        if missing:
+            AttendanceSession.objects.bulk_create(missing, ignore_conflicts=True)
+            sessions.update({
+                (session.section_id, session.date): session
+                for session in AttendanceSession.objects.filter(
+                    section_id__in={session.section_id for session in missing},
+                    date__in={session.date for session in missing},
+                )
+            })
+
+        by_session = defaultdict(dict)
+        receipts = []
+        for client_id, (section_id, session_date, mark) in accepted.items():
+            session = sessions[(section_id, session_date)]
+            session.section = sections[section_id]
+            by_session[session][mark['student']] = mark
+            receipts.append(SyncedMark(client_id=client_id, session=session, student_id=mark['student']))
+
+        for session, session_marks in by_session.items():
+            mark_session(session, session_marks, marked_by)
+        SyncedMark.objects.bulk_create(receipts, ignore_conflicts=True)
+
+    return {'applied': len(accepted), 'duplicate': duplicates, 'rejected': rejected}
+
+
+def clean_mark(mark, marked_by):
+    """Normalise a raw mark into the field values stored on Attendance"""
+    arrival_time = mark.get('arrival_time') or None
+    if isinstance(arrival_time, str):
+        arrival_time = parse_time(arrival_time.strip()) if arrival_time.strip() else None
+    return {
+        'status': mark.get('status') if mark.get('status') in VALID_STATUSES else 'absent',
+        'arrival_time': arrival_time,
+        'notes': mark.get('notes') or '',
+        'marked_by': marked_by,
+    }
+
+
+def status_deltas(transitions):
+    """Net change in the number of rows per status caused by ``transitions``"""
+    deltas = defaultdict(int)
+    for student_id, old_status, new_status in transitions:
+        if old_status:
+            deltas[old_status] -= 1
+        deltas[new_status] += 1
+    return deltas
+
+
+def apply_transitions(section, transitions):
+    """
+    Keep summaries in step with status changes of already-written rows.
+
+    ``transitions`` is an iterable of ``(student_id, old_status, new_status)``
+    where ``old_status`` is None for a newly recorded session. Students are
+    grouped by transition so each distinct change costs one F-expression
+    UPDATE however many students share it. Students without a summary yet
+    get a full recount instead, since their history may predate the summary.
+    """
+    groups = defaultdict(list)
+    for student_id, old_status, new_status in transitions:
+        if old_status != new_status:
+            groups[(old_status, new_status)].append(student_id)
+    if not groups:
+        return
+
+    student_ids = {student_id for ids in groups.values() for student_id in ids}
+    missing = student_ids - set(
+        AttendanceSummary.objects.filter(section=section).values_list('student_id', flat=True)
+    )
+    for (old_status, new_status), ids in groups.items():
+        ids = [student_id for student_id in ids if student_id not in missing]
+        if ids:
+            AttendanceSummary.apply_transition(section, ids, old_status, new_status)
+    if missing:
+        refresh_summaries(section, missing)
+    if student_ids - missing:
+        sync_alerts(section, student_ids - missing)
+
+
+def refresh_summaries(section, student_ids):
+    """
+    Recompute AttendanceSummary rows for the given students of a section.
+
+    This is the full recount used for new summaries and as a repair path;
+    the students' alerts are re-checked against the new counts.
+
+    Counts for every student come from one grouped aggregate query, plus
+    the statuses implied by sparse sessions, and the summaries are written back with one bulk_create and one bulk_update.
+    """
+    student_ids = set(student_ids)
+    counts = {
+        row['student_id']: row
+        for row in status_counts(Attendance.objects.filter(session__section=section), 'student_id')
+        if row['student_id'] in student_ids
+    }
+    for (section_id, student_id), implicit in implicit_status_counts([section.id], student_ids).items():
+        add_counts(counts.setdefault(student_id, {}), implicit)
+    summaries = {
+        summary.student_id: summary
+        for summary in AttendanceSummary.objects.filter(section=section)
+        if summary.student_id in student_ids
+    }
+
+    to_create = []
+    to_update = []
+    for student_id in student_ids:
+        row = counts.get(student_id, {})
+        summary = summaries.get(student_id)
+        if summary is None:
+            summary = AttendanceSummary(student_id=student_id, section=section)
+            to_create.append(summary)
+        else:
+            to_update.append(summary)
+        summary.set_counts(
+            present=row.get('present', 0),
+            absent=row.get('absent', 0),
+            late=row.get('late', 0),
+            excused=row.get('excused', 0),
+        )
+
+    if to_create:
+        AttendanceSummary.objects.bulk_create(to_create)
+    if to_update:
+        AttendanceSummary.objects.bulk_update(to_update, AttendanceSummary.COUNT_FIELDS)
+    invalidate_teacher_overview(section.teacher_id)
+    sync_alerts(section, student_ids)
+
+
+def alert_threshold(section):
+    """Low-attendance threshold of a section, LOW_ATTENDANCE_THRESHOLD unless it sets its own"""
+    threshold = AttendanceAlertThreshold.objects.filter(section=section).values_list('threshold', flat=True).first()
+    return LOW_ATTENDANCE_THRESHOLD if threshold is None else threshold
+
+
+def sync_alerts(section, student_ids=None, threshold=None):
+    """
+    Raise and clear AttendanceAlert rows of a section against its threshold.
+
+    Only the given students are checked (every student of the section when
+    ``student_ids`` is None). Their percentages and current alerts are read
+    once and rows are written only for students whose summary crossed the
+    threshold, so an ordinary marking pass usually writes nothing here.
+    Returns a dict with the number of alerts raised and cleared.
+    """
+    if threshold is None:
+        threshold = alert_threshold(section)
+    summaries = AttendanceSummary.objects.filter(section=section)
+    alerts = AttendanceAlert.objects.filter(section=section)
+    if student_ids is not None:
+        summaries = summaries.filter(student_id__in=student_ids)
+        alerts = alerts.filter(student_id__in=student_ids)
+
+    below = {
+        student_id
+        for student_id, percentage in summaries.values_list('student_id', 'attendance_percentage')
+        if percentage < threshold
+    }
+    alerted = set(alerts.values_list('student_id', flat=True))
+    raised = below - alerted
+    cleared = alerted - below
+
+    if raised:
+        AttendanceAlert.objects.bulk_create([
+            AttendanceAlert(section=section, student_id=student_id) for student_id in raised
+        ])
+    if cleared:
+        AttendanceAlert.objects.filter(section=section, student_id__in=cleared).delete()
+    if raised or cleared:
+        invalidate_teacher_overview(section.teacher_id)
+    return {'raised': len(raised), 'cleared': len(cleared)}
+
+
+def set_alert_threshold(section, threshold):
+    """Give a section its own low-attendance threshold and re-check all of its students"""
+    with transaction.atomic():
+        AttendanceAlertThreshold.objects.update_or_create(section=section, defaults={'threshold': threshold})
+        return sync_alerts(section, threshold=threshold)
+
+
+def status_counts(queryset, *group_by):
+    """Group Attendance rows and count each status with conditional aggregation"""
+    return queryset.values(*group_by).annotate(
+        present=Count('id', filter=Q(status='present')),
+        absent=Count('id', filter=Q(status='absent')),
+        late=Count('id', filter=Q(status='late')),
+        excused=Count('id', filter=Q(status='excused')),
+    ).order_by()
+
+
+def implicit_status_counts(section_ids, student_ids=None):
+    """
+    Statuses implied by sparsely stored sessions of the given sections.
+
+    Returns ``{(section_id, student_id): {status: count}}``: each sparse
+    session counts once towards its default status for every student on
+    its roster without a row for it, whatever their enrollment is now.
+    Costs one query when no session is stored sparsely and two otherwise.
+    """
+    sparse = AttendanceSession.objects.filter(section_id__in=section_ids).exclude(default_status='')
+    sessions = list(sparse.values_list('id', 'section_id', 'default_status', 'roster'))
+    if not sessions:
+        return {}
+
+    records = Attendance.objects.filter(session__in=sparse)
+    if student_ids is not None:
+        student_ids = set(student_ids)
+        records = records.filter(student_id__in=student_ids)
+    explicit = set(records.values_list('session_id', 'student_id'))
+    counts = defaultdict(lambda: defaultdict(int))
+    for session_id, section_id, status, roster in sessions:
+        for student_id in roster:
+            if (student_ids is None or student_id in student_ids) and (session_id, student_id) not in explicit:
+                counts[(section_id, student_id)][status] += 1
+    return {key: dict(statuses) for key, statuses in counts.items()}
+
+
+def implicit_session_counts(sessions):
+    """
+    Students implicitly given the default status by the sparse sessions in
+    ``sessions`` (a queryset): ``{session_id: (date, section_id, status,
+    count)}``, counting students on each roster without a row for it.
+    """
+    sparse = list(
+        sessions.exclude(default_status='').values_list('id', 'date', 'section_id', 'default_status', 'roster')
+    )
+    if not sparse:
+        return {}
+    explicit = defaultdict(set)
+    for session_id, student_id in Attendance.objects.filter(
+        session_id__in=[row[0] for row in sparse]
+    ).values_list('session_id', 'student_id'):
+        explicit[session_id].add(student_id)
+    return {
+        session_id: (day, section_id, status, len(set(roster) - explicit[session_id]))
+        for session_id, day, section_id, status, roster in sparse
+    }
+
+
+def add_counts(row, counts):
+    """Add ``counts`` ({status: count}) to a status_counts row in place"""
+    for status, count in counts.items():
+        row[status] = row.get(status, 0) + count
+    return row
+
+
+def rebuild_summaries(section_ids, dry_run=False):
+    """
+    Recount the AttendanceSummary rows of whole sections in one pass.
+
+    Counts for every (section, student) pair come from one grouped query;
+    stored summaries are compared against them and only rows that have
+    drifted are written back, with bulk_create/bulk_update in one
+    transaction, and their alerts are re-checked. With ``dry_run`` nothing
+    is written. Returns a dict with
+    the number of summaries ``checked`` and the ``drifted`` rows as
+    ``(section_id, student_id, stored, expected)`` tuples, where stored is
+    None for a missing summary and both are tuples of COUNT_FIELDS values.
+    """
+    fields = AttendanceSummary.COUNT_FIELDS[:-1]
+    counts = {
+        (row['session__section_id'], row['student_id']): row
+        for row in status_counts(
+            Attendance.objects.filter(session__section_id__in=section_ids),
+            'session__section_id', 'student_id',
+        )
+    }
+    for key, implicit in implicit_status_counts(section_ids).items():
+        add_counts(counts.setdefault(key, {}), implicit)
+    summaries = {
+        (summary.section_id, summary.student_id): summary
+        for summary in AttendanceSummary.objects.filter(section_id__in=section_ids)
+    }
+
+    drifted = []
+    to_create = []
+    to_update = []
+    for key in sorted(counts.keys() | summaries.keys()):
+        row = counts.get(key, {})
+        expected = AttendanceSummary(section_id=key[0], student_id=key[1])
+        expected.set_counts(
+            present=row.get('present', 0),
+            absent=row.get('absent', 0),
+            late=row.get('late', 0),
+            excused=row.get('excused', 0),
+        )
+        expected_values = tuple(getattr(expected, field) for field in fields)
+        summary = summaries.get(key)
+        if summary is None:
+            drifted.append((key[0], key[1], None, expected_values))
+            to_create.append(expected)
+            continue
+        stored_values = tuple(getattr(summary, field) for field in fields)
+        if stored_values[:-1] != expected_values[:-1] or abs(stored_values[-1] - expected_values[-1]) > 1e-6:
+            drifted.append((key[0], key[1], stored_values, expected_values))
+            expected.pk = summary.pk
+            to_update.append(expected)
+
+    if not dry_run and drifted:
+        with transaction.atomic():
+            AttendanceSummary.objects.bulk_create(to_create)
+            AttendanceSummary.objects.bulk_update(to_update, AttendanceSummary.COUNT_FIELDS)
+            drifted_students = defaultdict(list)
+            for section_id, student_id, stored, expected in drifted:
+                drifted_students[section_id].append(student_id)
+            for section in Section.objects.filter(id__in=drifted_students):
+                invalidate_teacher_overview(section.teacher_id)
+                sync_alerts(section, drifted_students[section.id])
+
+    return {'checked': len(summaries) + len(to_create), 'drifted': drifted}
+
+
+def _subquery_total(queryset, aggregate, output_field=None):
+    """Correlated per-section aggregate, 0 when the section has no rows"""
+    queryset = queryset.order_by().values('section').annotate(total=aggregate).values('total')
+    return Coalesce(Subquery(queryset, output_field=output_field), Value(0), output_field=output_field)
+
+
+def teacher_overview_cache_key(teacher_id):
+    return f'attendance:teacher_overview:{teacher_id}'
+
+
+def invalidate_teacher_overview(teacher_id):
+    """Drop a teacher's cached overview once the current transaction commits"""
+    transaction.on_commit(lambda: cache.delete(teacher_overview_cache_key(teacher_id)))
+
+
+def teacher_overview(teacher):
+    """
+    Per-section attendance statistics and totals for a teacher's sections.
+
+    Every per-section figure comes from correlated subqueries in a single
+    SELECT over the teacher's sections, and the totals are derived from
+    those rows. The result is cached per teacher and cleared whenever
+    attendance in one of their sections is written.
+    """
+    key = teacher_overview_cache_key(teacher.id)
+    overview = cache.get(key)
+    if overview is not None:
+        return overview
+
+    section_ref = {'section': OuterRef('pk')}
+    summaries = AttendanceSummary.objects.filter(**section_ref)
+    sections = Section.objects.filter(teacher=teacher).select_related('course', 'semester').annotate(
+        enrolled_students=_subquery_total(
+            Enrollment.objects.filter(status='enrolled', **section_ref), Count('id'), IntegerField()
+        ),
+        total_sessions=_subquery_total(
+            AttendanceSession.objects.held().filter(**section_ref), Count('id'), IntegerField()
+        ),
+        summary_count=_subquery_total(summaries, Count('id'), IntegerField()),
+        percentage_sum=_subquery_total(summaries, Sum('attendance_percentage'), FloatField()),
+        low_attendance_alerts=_subquery_total(
+            AttendanceAlert.objects.filter(**section_ref), Count('id'), IntegerField()
+        ),
+    )
+
+    sections_data = []
+    for section in sections:
+        average = section.percentage_sum / section.summary_count if section.summary_count else 0
+        sections_data.append({
+            'section': section,
+            'enrolled_students': section.enrolled_students,
+            'total_sessions': section.total_sessions,
+            'average_attendance': round(average, 1),
+            'low_attendance_alerts': section.low_attendance_alerts,
+        })
+
+    summary_count = sum(section.summary_count for section in sections)
+    percentage_sum = sum(section.percentage_sum for section in sections)
+    overview = {
+        'sections_data': sections_data,
+        'total_sections': len(sections_data),
+        'total_students': sum(data['enrolled_students'] for data in sections_data),
+        'average_attendance': round(percentage_sum / summary_count, 1) if summary_count else 0,
+        'low_attendance_alerts': sum(data['low_attendance_alerts'] for data in sections_data),
+    }
+    cache.set(key, overview, OVERVIEW_CACHE_TIMEOUT)
+    return overview
@@ -1,3 +1,1157 @@
-from django.test import TestCase
+import io
+import json
+import os
+import re
+import sqlite3
+import tempfile
+from datetime import date, datetime, time, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from statistics import quantiles
+from time import perf_counter, sleep
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count, Q
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import Teacher
+from calendar_app.models import AcademicCalendar, CalendarEvent
+from courses.models import Course, Enrollment, Section
+from sams.testing import SchoolTestMixin, benchmark
+from .checkin import (
+    CHECKIN_CODE_PERIOD, CheckInBuffer, checkin_code, checkin_section_id, open_checkin, verify_checkin_code,
+)
+from .cube import get_attendance_cube
+from .export import attendance_csv_rows
+from .importer import import_attendance_csv
+from .matrix import STATUS_CODES, build_attendance_matrix
+from .reports import attendance_report, parse_bands, report_as_csv
+from .rollups import rebuild_daily_rollups
+from .schedule import Meeting, ScheduleError, generate_semester_sessions, parse_schedule
+from .models import (
+    Attendance, AttendanceAlert, AttendanceSession, AttendanceSummary, DailyAttendanceRollup, SyncedMark,
+)
+from .services import (
+    mark_session, rebuild_summaries, set_alert_threshold, student_recent_attendance, teacher_overview,
+)
+
+
+class MarkSessionTests(SchoolTestMixin, TestCase):
+    def test_marks_create_rows_and_summaries(self):
+        section = self.create_section()
+        students = self.enroll_students(section, 3)
+        session = AttendanceSession.objects.create(section=section, date=date(2025, 9, 8))
+
+        result = mark_session(session, {
+            students[0].id: {'status': 'present'},
+            students[1].id: {'status': 'late', 'arrival_time': '10:15'},
+            students[2].id: {'status': 'bogus'},
+        }, 'Tess Teacher')
+
+        self.assertEqual(result, {'created': 3, 'updated': 0, 'unchanged': 0})
+        self.assertEqual(Attendance.objects.get(student=students[2]).status, 'absent')
+        summary = AttendanceSummary.objects.get(student=students[1], section=section)
+        self.assertEqual((summary.total_sessions, summary.late_count), (1, 1))
+        self.assertEqual(summary.attendance_percentage, 100.0)
+
+    def test_remarking_only_updates_changed_rows(self):
+        section = self.create_section()
+        students = self.enroll_students(section, 2)
+        session = AttendanceSession.objects.create(section=section, date=date(2025, 9, 8))
+        marks = {student.id: {'status': 'present'} for student in students}
+        mark_session(session, marks, 'Tess Teacher')
+
+        marks[students[0].id] = {'status': 'absent'}
+        result = mark_session(session, marks, 'Tess Teacher')
+
+        self.assertEqual(result, {'created': 0, 'updated': 1, 'unchanged': 1})
+        summary = AttendanceSummary.objects.get(student=students[0], section=section)
+        self.assertEqual((summary.present_count, summary.absent_count), (0, 1))
+        self.assertEqual(summary.attendance_percentage, 0.0)
+
+    def test_query_count_is_independent_of_roster_size(self):
+        """
+        Benchmark: marking 5 or 100 students costs the same number of queries.
+        Only the backend's bind-parameter limit splits very large batches.
+        """
+        query_counts = []
+        for size in (5, 100):
+            section = self.create_section(code=f'BENCH{size}')
+            students = self.enroll_students(section, size)
+            session = AttendanceSession.objects.create(section=section, date=date(2025, 9, 8))
+            marks = {student.id: {'status': 'present'} for student in students}
+            with CaptureQueriesContext(connection) as queries:
+                mark_session(session, marks, 'Tess Teacher')
+            query_counts.append(len(queries))
+            self.assertEqual(AttendanceSummary.objects.filter(section=section).count(), size)
+
+        self.assertEqual(query_counts[0], query_counts[1])
+
+
+class SummaryDeltaTests(SchoolTestMixin, TestCase):
+    def mark_all(self, section, students, day, status):
+        session = AttendanceSession.objects.create(section=section, date=date(2025, 9, day))
+        mark_session(session, {student.id: {'status': status} for student in students}, 'Tess Teacher')
+        return session
+
+    def test_status_change_moves_only_affected_counters(self):
+        section = self.create_section()
+        students = self.enroll_students(section, 2)
+        self.mark_all(section, students, 1, 'present')
+        session = self.mark_all(section, students, 2, 'present')
+
+        mark_session(session, {students[0].id: {'status': 'excused'}}, 'Tess Teacher')
+
+        summary = AttendanceSummary.objects.get(student=students[0], section=section)
+        self.assertEqual(
+            (summary.total_sessions, summary.present_count, summary.excused_count),
+            (2, 1, 1)
+        )
+        self.assertEqual(summary.attendance_percentage, 50.0)
+
+    def test_incremental_counters_match_full_recount(self):
+        section = self.create_section()
+        students = self.enroll_students(section, 3)
+        for day, status in enumerate(['present', 'late', 'absent', 'excused', 'present'], start=1):
+            self.mark_all(section, students, day, status)
+
+        for summary in AttendanceSummary.objects.filter(section=section):
+            incremental = [getattr(summary, field) for field in AttendanceSummary.COUNT_FIELDS[:-1]]
+            summary.update_summary()
+            recounted = [getattr(summary, field) for field in AttendanceSummary.COUNT_FIELDS[:-1]]
+            self.assertEqual(incremental, recounted)
+
+    def test_recount_raises_alerts(self):
+        section = self.create_section()
+        student = self.enroll_students(section, 1)[0]
+        session = AttendanceSession.objects.create(section=section, date=date(2025, 10, 1))
+        Attendance.objects.create(session=session, student=student, status='absent', marked_by='Tess Teacher')
+        summary = AttendanceSummary.objects.create(student=student, section=section)
+
+        summary.update_summary()
+
+        self.assertEqual(summary.attendance_percentage, 0.0)
+        self.assertTrue(AttendanceAlert.objects.filter(section=section, student=student).exists())
+
+    def test_marking_cost_does_not_grow_with_history(self):
+        section = self.create_section()
+        students = self.enroll_students(section, 10)
+        self.mark_all(section, students, 1, 'present')
+
+        query_counts = []
+        for day in (2, 20):
+            for filler in range(3, day):
+                self.mark_all(section, students, filler, 'late')
+            session = AttendanceSession.objects.create(section=section, date=date(2025, 10, day))
+            # Late keeps everyone above the alert threshold, so no alert rows are written
+            with CaptureQueriesContext(connection) as queries:
+                mark_session(session, {student.id: {'status': 'late'} for student in students}, 'Tess Teacher')
+            query_counts.append(len(queries))
+
+        self.assertEqual(query_counts[0], query_counts[1])
+
+
+class AttendanceMatrixTests(SchoolTestMixin, TestCase):
+    def setUp(self):
+        self.section = self.create_section()
+        self.students = self.enroll_students(self.section, 4)
+        self.sessions = []
+        for day, status in [(1, 'present'), (15, 'late'), (40, 'absent')]:
+            session = AttendanceSession.objects.create(
+                section=self.section, date=date(2025, 9, 1) + timedelta(days=day)
+            )
+            mark_session(session, {s.id: {'status': status} for s in self.students[:3]}, 'Tess Teacher')
+            self.sessions.append(session)
+
+    def test_matrix_codes_and_indexes(self):
+        with self.assertNumQueries(3):
+            matrix = build_attendance_matrix(self.section)
+
+        self.assertEqual(matrix.shape, (4, 3))
+        self.assertEqual(matrix.code(self.students[0].id, self.sessions[1].id), STATUS_CODES['late'])
+        self.assertEqual(matrix.code(self.students[3].id, self.sessions[1].id), 0)
+        self.assertEqual(matrix.row_counts(self.students[0].id)['absent'], 1)
+        self.assertEqual(matrix.column_counts(self.sessions[0].id)['present'], 3)
+
+    def test_date_window_limits_columns(self):
+        matrix = build_attendance_matrix(self.section, date(2025, 9, 10), date(2025, 9, 30))
+        self.assertEqual([s.id for s in matrix.sessions], [self.sessions[1].id])
+
+    def test_history_and_export_render_from_matrix(self):
+        self.client.login(username='teacher_cs101', password='pass')
+        response = self.client.get(reverse('attendance:attendance_history', args=[self.section.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['attendance_rows']), 4)
+
+        response = self.client.get(reverse('attendance:export_attendance', args=[self.section.id]))
+        lines = b''.join(response.streaming_content).decode().strip().splitlines()
+        self.assertEqual(len(lines), 5)
+        self.assertTrue(lines[-1].endswith('Not Recorded,Not Recorded,Not Recorded'))
+
+
+class StreamingExportTests(SchoolTestMixin, TestCase):
+    def setUp(self):
+        self.teacher = self.create_teacher()
+        self.sections = []
+        for code in ('CS101', 'CS102', 'CS103'):
+            section = self.create_section(code=code, teacher=self.teacher)
+            students = self.enroll_students(section, 3)
+            for day in (1, 2):
+                session = AttendanceSession.objects.create(section=section, date=date(2025, 9, day))
+                mark_session(session, {s.id: {'status': 'present'} for s in students[:2]}, 'Tess Teacher')
+            self.sections.append(section)
+
+    def test_rows_merge_summaries_and_statuses(self):
+        rows = list(attendance_csv_rows(Section.objects.filter(id=self.sections[0].id)))
+        self.assertEqual(rows[0][-2:], ['2025-09-01', '2025-09-02'])
+        self.assertEqual(rows[1][2:], [2, 2, 0, 0, 0, '100.0%', 'Present', 'Present'])
+        self.assertEqual(rows[3][2:], [0, 0, 0, 0, 0, '0.0%', 'Not Recorded', 'Not Recorded'])
+
+    def test_department_export_query_count_is_bounded(self):
+        with self.assertNumQueries(4):
+            one = list(attendance_csv_rows(Section.objects.filter(id=self.sections[0].id), with_titles=True))
+        with self.assertNumQueries(4):
+            every = list(attendance_csv_rows(Section.objects.filter(teacher=self.teacher), with_titles=True))
+        self.assertEqual(len(one), 5)
+        self.assertEqual(len(every), 3 * 5 + 2)
+
+    def test_export_all_streams_every_owned_section(self):
+        self.client.login(username='teacher', password='pass')
+        response = self.client.get(reverse('attendance:export_all_attendance'))
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode()
+        for code in ('CS101', 'CS102', 'CS103'):
+            self.assertIn(f'{code} - Section 01', content)
+
+
+class SectionAttendancePageTests(SchoolTestMixin, TestCase):
+    def setUp(self):
+        self.section = self.create_section()
+        self.students = self.enroll_students(self.section, 3)
+        self.client.login(username='teacher_cs101', password='pass')
+
+    def add_sessions(self, count):
+        start = AttendanceSession.objects.filter(section=self.section).count()
+        for day in range(start, start + count):
+            session = AttendanceSession.objects.create(
+                section=self.section, date=date(2024, 1, 1) + timedelta(days=day)
+            )
+            mark_session(session, {
+                self.students[0].id: {'status': 'present'},
+                self.students[1].id: {'status': 'late'},
+                self.students[2].id: {'status': 'absent'},
+            }, 'Tess Teacher')
+
+    def get_page(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse('attendance:section_attendance', args=[self.section.id]), params
+            )
+        return response, len(queries)
+
+    def test_page_cost_is_independent_of_history(self):
+        self.add_sessions(3)
+        _, short_history = self.get_page()
+        self.add_sessions(60)
+        response, long_history = self.get_page()
+
+        self.assertEqual(short_history, long_history)
+        session = response.context['sessions'][0]
+        self.assertEqual(
+            (session.present_count, session.absent_count, session.late_count, session.excused_count),
+            (1, 1, 1, 0)
+        )
+
+    def test_keyset_pages_walk_back_through_dates(self):
+        self.add_sessions(25)
+        response, _ = self.get_page()
+        first_page = response.context['sessions']
+        self.assertTrue(response.context['has_next'])
+
+        older = f'?before={response.context["next_before"].isoformat()}'
+        self.assertContains(response, f'href="{older}"')
+        self.assertContains(response, first_page[-1].date.strftime('%b %d, %Y'))
+
+        response, _ = self.get_page(before=response.context['next_before'].isoformat())
+        second_page = response.context['sessions']
+        self.assertFalse(response.context['has_next'])
+        self.assertEqual(len(first_page) + len(second_page), 25)
+        self.assertLess(second_page[0].date, first_page[-1].date)
+        # The older page renders its own sessions, not the newest ones again
+        self.assertContains(response, second_page[0].date.strftime('%b %d, %Y'))
+        self.assertNotContains(response, first_page[0].date.strftime('%b %d, %Y'))
+        self.assertNotContains(response, 'Older')
+
+
+class TeacherOverviewTests(SchoolTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = self.create_teacher()
+        self.sections = [self.create_section(code, self.teacher) for code in ('CS101', 'CS102')]
+        self.students = self.enroll_students(self.sections[0], 4)
+        self.enroll_students(self.sections[1], 2)
+        session = AttendanceSession.objects.create(section=self.sections[0], date=date(2025, 9, 1))
+        mark_session(session, {
+            student.id: {'status': 'present' if i else 'absent'} for i, student in enumerate(self.students)
+        }, 'Tess Teacher')
+
+    def test_overview_is_one_query_then_cached(self):
+        with self.assertNumQueries(1):
+            overview = teacher_overview(self.teacher)
+        with self.assertNumQueries(0):
+            teacher_overview(self.teacher)
+
+        first = overview['sections_data'][0]
+        self.assertEqual((first['enrolled_students'], first['total_sessions']), (4, 1))
+        self.assertEqual((first['average_attendance'], first['low_attendance_alerts']), (75.0, 1))
+        self.assertEqual(overview['total_students'], 6)
+        self.assertEqual(overview['sections_data'][1]['average_attendance'], 0)
+
+    def test_marking_attendance_clears_the_cache(self):
+        teacher_overview(self.teacher)
+        session = AttendanceSession.objects.create(section=self.sections[0], date=date(2025, 9, 2))
+        with self.captureOnCommitCallbacks(execute=True):
+            mark_session(session, {self.students[0].id: {'status': 'absent'}}, 'Tess Teacher')
+
+        overview = teacher_overview(self.teacher)
+        self.assertEqual(overview['sections_data'][0]['total_sessions'], 2)
+
+    def test_invalidation_reaches_other_processes(self):
+        teacher_overview(self.teacher)
+        with tempfile.TemporaryDirectory() as directory:
+            self.manage(os.path.join(directory, 'db.sqlite3'), 'shell', '-c', (
+                'from attendance.services import invalidate_teacher_overview\n'
+                f'invalidate_teacher_overview({self.teacher.id})'
+            ))
+        with self.assertNumQueries(1):
+            teacher_overview(self.teacher)
+
+    def test_sections_page_reads_the_overview(self):
+        self.client.login(username='teacher', password='pass')
+        response = self.client.get(reverse('attendance:teacher_attendance_sections'))
+        self.assertEqual(response.context['total_sections'], 2)
+        self.assertEqual(response.context['low_attendance_alerts'], 1)
+
+
+class AttendanceReportTests(SchoolTestMixin, TestCase):
+    def setUp(self):
+        self.teacher = self.create_teacher()
+        self.sections = [self.create_section(code, self.teacher) for code in ('CS101', 'CS102', 'CS103')]
+        Course.objects.filter(code='CS103').update(department='Mathematics')
+        for section in self.sections[:2]:
+            students = self.enroll_students(section, 4)
+            for day, statuses in enumerate([('present', 'present', 'late', 'absent'),
+                                            ('present', 'absent', 'absent', 'absent')], start=1):
+                session = AttendanceSession.objects.create(section=section, date=date(2025, 9, day))
+                mark_session(session, {
+                    student.id: {'status': status} for student, status in zip(students, statuses)
+                }, 'Tess Teacher')
+
+    def test_section_bands_in_one_query(self):
+        # Sections, band counts and alert counts
+        with self.assertNumQueries(3):
+            report = attendance_report(Section.objects.filter(teacher=self.teacher))
+
+        self.assertEqual(len(report), 3)
+        self.assertEqual(
+            (report[0]['excellent_count'], report[0]['good_count'], report[0]['poor_count']),
+            (1, 0, 3)
+        )
+        self.assertEqual(report[2]['total_students'], 0)
+
+    def test_department_rollup_with_custom_bands(self):
+        bands = parse_bands('full:100:,half:50:100,none::50')
+        report = attendance_report(Section.objects.all(), bands=bands, group_by='department')
+
+        self.assertEqual([row['group'] for row in report], ['Computing'])
+        self.assertEqual(report[0]['band_counts'], [2, 4, 2])
+        self.assertIn('Computing,8,50.0,2,4,2', report_as_csv(report, bands))
+
+    def test_reports_page_and_csv_download(self):
+        self.client.login(username='teacher', password='pass')
+        url = reverse('attendance:attendance_reports')
+        response = self.client.get(url)
+        self.assertContains(response, 'CS101 - Section 01')
+
+        response = self.client.get(url, {'group': 'department', 'format': 'csv'})
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(response.content.decode().splitlines()[1], 'Computing,8,50.0,2,0,6')
+
+    def test_scheduled_command_writes_json(self):
+        out = io.StringIO()
+        call_command('generate_attendance_report', group='semester', format='json', stdout=out)
+        document = json.loads(out.getvalue())
+        self.assertEqual(document['rows'][0]['group'], 'Fall 2025')
+        self.assertEqual(document['rows'][0]['total_students'], 8)
+
+
+class AttendanceCubeTests(SchoolTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.section = self.create_section()
+        self.students = self.enroll_students(self.section, 3)
+        # Mondays and Wednesdays; student 0 misses every Monday, student 2 the last three sessions
+        self.pattern = [
+            (date(2025, 9, 1), ['absent', 'present', 'present']),
+            (date(2025, 9, 3), ['present', 'present', 'late']),
+            (date(2025, 9, 8), ['absent', 'present', 'absent']),
+            (date(2025, 9, 10), ['present', 'late', 'absent']),
+            (date(2025, 9, 15), ['absent', 'present', 'absent']),
+        ]
+        for session_date, statuses in self.pattern:
+            self.mark(session_date, statuses)
+
+    def mark(self, session_date, statuses):
+        session = AttendanceSession.objects.create(section=self.section, date=session_date)
+        with self.captureOnCommitCallbacks(execute=True):
+            mark_session(session, {
+                student.id: {'status': status} for student, status in zip(self.students, statuses)
+            }, 'Tess Teacher')
+
+    def test_vectorised_statistics(self):
+        cube = get_attendance_cube(self.section)
+
+        self.assertEqual(cube.codes.dtype.name, 'int8')
+        self.assertEqual(cube.nbytes, 3 * 5 + 3 * 8 + 5 * 8 + 5 * 8)
+        self.assertEqual(cube.attendance_rates().round(1).tolist(), [40.0, 100.0, 40.0])
+        self.assertEqual(cube.current_streaks('absent').tolist(), [1, 0, 3])
+        self.assertEqual(cube.longest_streaks('absent').tolist(), [1, 0, 3])
+        self.assertEqual(cube.rolling_rates(2)[:, -1].tolist(), [50.0, 100.0, 0.0])
+        weekday = cube.weekday_absence_rates()
+        self.assertEqual(weekday[0, 0], 100.0)
+        self.assertEqual(weekday[0, 2], 0.0)
+        self.assertEqual(cube.at_risk(), [self.students[0].id, self.students[2].id])
+
+    def test_cached_cube_is_updated_incrementally(self):
+        get_attendance_cube(self.section)
+        self.mark(date(2025, 9, 17), ['present', 'absent', 'present'])
+
+        with self.assertNumQueries(0):
+            cube = get_attendance_cube(self.section)
+        self.assertEqual(cube.codes.shape, (3, 6))
+        self.assertEqual(cube.current_streaks('absent').tolist(), [0, 1, 0])
+
+
+class RebuildSummariesCommandTests(SchoolTestMixin, TestCase):
+    def setUp(self):
+        self.section = self.create_section()
+        self.students = self.enroll_students(self.section, 3)
+        for day in (1, 2):
+            session = AttendanceSession.objects.create(section=self.section, date=date(2025, 9, day))
+            mark_session(session, {student.id: {'status': 'present'} for student in self.students}, 'Tess Teacher')
+        # Simulate an import that bypassed the summaries and a manual edit
+        AttendanceSummary.objects.filter(student=self.students[0]).update(present_count=7, total_sessions=9)
+        AttendanceSummary.objects.filter(student=self.students[1]).delete()
+
+    def test_dry_run_reports_drift_without_writing(self):
+        out = io.StringIO()
+        call_command('rebuild_attendance_summaries', dry_run=True, stdout=out)
+
+        self.assertIn('3 summaries checked, 2 drifted', out.getvalue())
+        self.assertIn('2 would be rewritten', out.getvalue())
+        self.assertEqual(AttendanceSummary.objects.get(student=self.students[0]).present_count, 7)
+        self.assertFalse(AttendanceSummary.objects.filter(student=self.students[1]).exists())
+
+    def test_rebuild_repairs_drifted_rows(self):
+        call_command('rebuild_attendance_summaries', chunk_size=1, stdout=io.StringIO())
+
+        for student in self.students:
+            summary = AttendanceSummary.objects.get(student=student, section=self.section)
+            self.assertEqual((summary.total_sessions, summary.present_count), (2, 2))
+            self.assertEqual(summary.attendance_percentage, 100.0)
+
+        out = io.StringIO()
+        call_command('rebuild_attendance_summaries', dry_run=True, stdout=out)
+        self.assertIn('0 would be rewritten', out.getvalue())
+
+
+class RebuildSummariesWorkersTests(SchoolTestMixin, TransactionTestCase):
+    """
+    --workers spawns fresh processes, which cannot see the in-memory test
+    database, so the command runs against a file copy of it.
+    """
+    setUp = RebuildSummariesCommandTests.setUp
+
+    def rebuild(self, path, *args):
+        return self.manage(path, 'rebuild_attendance_summaries', '--workers', '2', '--chunk-size', '1', *args)
+
+    def test_spawned_workers_repair_drifted_rows(self):
+        self.create_section('CS102', self.section.teacher)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'db.sqlite3')
+            self.copy_database(path)
+
+            self.assertIn('[2/2]', self.rebuild(path))
+            self.assertIn('0 would be rewritten', self.rebuild(path, '--dry-run'))
+            copy = sqlite3.connect(path)
+            counts = copy.execute('SELECT total_sessions, present_count FROM attendance_attendancesummary').fetchall()
+            copy.close()
+        self.assertEqual(counts, [(2, 2)] * 3)
+
+
+class QueryPlanTests(SchoolTestMixin, TestCase):
+    """Hot attendance queries must use an index on a seeded large dataset"""
+
+    @classmethod
+    def setUpTestData(cls):
+        mixin = SchoolTestMixin()
+        cls.teacher = mixin.create_teacher()
+        cls.sections = [mixin.create_section(code, cls.teacher) for code in ('CS101', 'CS102', 'CS103')]
+        cls.students = mixin.enroll_students(cls.sections[0], 120)
+        for section in cls.sections[1:]:
+            Enrollment.objects.bulk_create(Enrollment(student=s, section=section) for s in cls.students)
+        statuses = ['present', 'present', 'present', 'late', 'absent', 'excused']
+        for section in cls.sections:
+            sessions = AttendanceSession.objects.bulk_create(
+                AttendanceSession(section=section, date=date(2025, 9, 1) + timedelta(days=day))
+                for day in range(40)
+            )
+            Attendance.objects.bulk_create(
+                Attendance(student=student, session=session, status=statuses[(i + j) % 6], marked_by='seed')
+                for i, student in enumerate(cls.students)
+                for j, session in enumerate(sessions)
+            )
+            for student in cls.students:
+                AttendanceSummary.objects.create(student=student, section=section)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def hot_queries(self):
+        section = self.sections[0]
+        student = self.students[0]
+        session = AttendanceSession.objects.filter(section=section).first()
+        return {
+            'session rows': Attendance.objects.filter(session=session),
+            'section matrix': Attendance.objects.filter(session__section=section)
+                .values_list('student_id', 'session_id', 'status'),
+            'student recent': Attendance.objects.filter(student=student).order_by('-session__date')[:10],
+            'student counts': Attendance.objects.filter(student=student, session__section=section)
+                .filter(status='present'),
+            'session counts': AttendanceSession.objects.filter(section=section).annotate(
+                present_count=Count('attendance', filter=Q(attendance__status='present')),
+            ).order_by('-date')[:21],
+            'low attendance': AttendanceSummary.objects.filter(section=section, attendance_percentage__lt=75.0),
+            'teacher recent': AttendanceSession.objects.filter(section__teacher=self.teacher).order_by('-date')[:5],
+        }
+
+    @skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN output is SQLite specific')
+    def test_hot_queries_avoid_full_table_scans(self):
+        for name, queryset in self.hot_queries().items():
+            plan = queryset.explain()
+            with self.subTest(query=name):
+                self.assertIsNone(re.search(r'\bSCAN (TABLE )?attendance_', plan), plan)
+
+    @skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN output is SQLite specific')
+    def test_hot_queries_use_the_access_path_indexes(self):
+        queries = self.hot_queries()
+        self.assertIn('COVERING INDEX att_session_status_idx', queries['section matrix'].explain())
+        self.assertIn('COVERING INDEX att_session_status_idx', queries['session counts'].explain())
+        self.assertIn('att_student_status_idx', queries['student counts'].explain())
+        self.assertIn('att_summary_pct_idx', queries['low attendance'].explain())
+
+
+class OfflineSyncTests(SchoolTestMixin, TestCase):
+    def setUp(self):
+        self.teacher = self.create_teacher()
+        self.sections = [self.create_section(code, self.teacher) for code in ('CS101', 'CS102')]
+        self.students = {section.id: self.enroll_students(section, 3) for section in self.sections}
+        self.client.login(username='teacher', password='pass')
+
+    def batch(self):
+        marks = []
+        for section in self.sections:
+            for day in ('2025-09-01', '2025-09-03'):
+                for i, student in enumerate(self.students[section.id]):
+                    marks.append({
+                        'client_id': f'{section.id}-{day}-{student.id}',
+                        'section': section.id, 'date': day, 'student': student.id,
+                        'status': 'late' if i == 0 else 'present', 'arrival_time': '09:10' if i == 0 else None,
+                    })
+        return marks
+
+    def post(self, marks):
+        return self.client.post(
+            reverse('attendance:sync_attendance'), json.dumps({'marks': marks}), content_type='application/json'
+        ).json()
+
+    def test_batch_creates_sessions_rows_and_summaries(self):
+        result = self.post(self.batch())
+
+        self.assertEqual(result, {'applied': 12, 'duplicate': 0, 'rejected': []})
+        self.assertEqual(AttendanceSession.objects.count(), 4)
+        self.assertEqual(Attendance.objects.count(), 12)
+        self.assertEqual(SyncedMark.objects.count(), 12)
+        summary = AttendanceSummary.objects.get(student=self.students[self.sections[0].id][0])
+        self.assertEqual((summary.total_sessions, summary.late_count), (2, 2))
+
+    def test_retries_are_cheap_and_idempotent(self):
+        marks = self.batch()
+        url = reverse('attendance:sync_attendance')
+        self.post(marks)
+
+        with CaptureQueriesContext(connection) as queries:
+            result = self.client.post(url, json.dumps({'marks': marks + marks[:2]}),
+                                      content_type='application/json').json()
+        sync_queries = [q for q in queries if 'attendance_' in q['sql']]
+        self.assertEqual(result, {'applied': 0, 'duplicate': 14, 'rejected': []})
+        self.assertEqual(len(sync_queries), 1)
+        self.assertEqual(Attendance.objects.count(), 12)
+
+    def test_invalid_marks_are_rejected_individually(self):
+        other_section = self.create_section('OTHER')
+        student = self.students[self.sections[0].id][0]
+        marks = [
+            {'client_id': 'a', 'section': other_section.id, 'date': '2025-09-01', 'student': student.id, 'status': 'present'},
+            {'client_id': 'b', 'section': self.sections[0].id, 'date': '2025-13-01', 'student': student.id, 'status': 'present'},
+            {'client_id': 'c', 'section': self.sections[0].id, 'date': '2025-09-01', 'student': student.id, 'status': 'asleep'},
+            {'section': self.sections[0].id, 'date': '2025-09-01', 'student': student.id, 'status': 'present'},
+            {'client_id': 'd', 'section': self.sections[0].id, 'date': '2025-09-01', 'student': student.id, 'status': 'absent'},
+        ]
+        result = self.post(marks)
+
+        self.assertEqual(result['applied'], 1)
+        self.assertEqual([r['client_id'] for r in result['rejected']], [None, 'a', 'b', 'c'])
+        self.assertEqual(Attendance.objects.get().status, 'absent')
+
+
+class SelfCheckInTests(SchoolTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.section = self.create_section()
+        self.students = self.enroll_students(self.section, 3)
+        self.session = AttendanceSession.objects.create(section=self.section, date=date.today())
+        self.buffer = CheckInBuffer(background=False)
+        patcher = mock.patch('attendance.views.checkin_buffer', self.buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def check_in(self, student, code=None):
+        self.client.force_login(student.profile.user)
+        return self.client.post(
+            reverse('attendance:student_checkin', args=[self.session.id]),
+            {'code': code or checkin_code(self.session.id)},
+        )
+
+    def test_teacher_opens_session_and_gets_rotating_code(self):
+        self.client.login(username='teacher_cs101', password='pass')
+        url = reverse('attendance:open_checkin', args=[self.section.id])
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        data = self.client.post(url).json()
+        self.assertEqual(data['session'], self.session.id)
+        self.assertEqual(data['code'], checkin_code(self.session.id))
+        self.assertNotEqual(checkin_code(self.session.id, 0), checkin_code(self.session.id, CHECKIN_CODE_PERIOD))
+        self.assertTrue(verify_checkin_code(self.session.id, checkin_code(self.session.id, 1000), at=1000 + CHECKIN_CODE_PERIOD))
+        self.assertFalse(verify_checkin_code(self.session.id, checkin_code(self.session.id, 1000), at=1000 + 2 * CHECKIN_CODE_PERIOD))
+
+    def test_checkins_are_validated_and_buffered_until_flush(self):
+        self.assertEqual(self.check_in(self.students[0]).status_code, 404)
+        open_checkin(self.session)
+        outsider = self.enroll_students(self.create_section('CS999'), 1)[0]
+
+        wrong_code = f'{(int(checkin_code(self.session.id)) + 1) % 1000000:06d}'
+        self.assertEqual(self.check_in(self.students[0], code=wrong_code).status_code, 400)
+        self.assertEqual(self.check_in(outsider).status_code, 403)
+        self.client.force_login(self.students[0].profile.user)
+        # Session, user, profile, student, open session and enrollment reads; nothing is written
+        with self.assertNumQueries(6):
+            response = self.client.post(
+                reverse('attendance:student_checkin', args=[self.session.id]), {'code': checkin_code(self.session.id)},
+            )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(self.check_in(self.students[0]).status_code, 202)
+        self.assertEqual(self.check_in(self.students[1]).status_code, 202)
+        self.assertFalse(Attendance.objects.exists())
+
+        self.assertEqual(self.buffer.flush(), 2)
+        self.assertEqual(Attendance.objects.filter(status='present').count(), 2)
+        self.assertEqual(AttendanceSummary.objects.get(student=self.students[0]).present_count, 1)
+
+    def test_flush_keeps_teacher_marks_and_detects_late_arrivals(self):
+        self.session.start_time = time(9, 0)
+        self.session.save()
+        mark_session(self.session, {self.students[0].id: {'status': 'excused'}}, 'Teacher')
+        arrival = timezone.make_aware(datetime.combine(date.today(), time(9, 20)))
+        for student in self.students:
+            self.buffer.add(self.session.id, student.id, arrival)
+        self.buffer.flush()
+
+        statuses = dict(Attendance.objects.values_list('student_id', 'status'))
+        self.assertEqual(statuses[self.students[0].id], 'excused')
+        self.assertEqual(statuses[self.students[1].id], 'late')
+
+    def test_open_flag_is_shared_through_the_database(self):
+        open_checkin(self.session)
+        cache.clear()
+        self.assertEqual(checkin_section_id(self.session.id), self.section.id)
+        AttendanceSession.objects.filter(id=self.session.id).update(checkin_open_until=timezone.now())
+        self.assertIsNone(checkin_section_id(self.session.id))
+
+    def test_failed_flush_puts_the_batch_back(self):
+        for student in self.students:
+            self.buffer.add(self.session.id, student.id)
+        with mock.patch('attendance.checkin.mark_session', side_effect=ValueError('boom')), \
+                self.assertLogs('attendance.checkin', 'ERROR'):
+            self.assertEqual(self.buffer.flush(), 0)
+        self.assertEqual(len(self.buffer), 3)
+        self.assertEqual(self.buffer.flush(), 3)
+        self.assertEqual(Attendance.objects.filter(session=self.session).count(), 3)
+
+
+class SelfCheckInBurstTests(SchoolTestMixin, TransactionTestCase):
+    def test_buffer_is_drained_when_the_process_exits(self):
+        section = self.create_section()
+        students = self.enroll_students(section, 2)
+        session = AttendanceSession.objects.create(section=section, date=date.today())
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'db.sqlite3')
+            self.copy_database(path)
+            # Exits long before CHECKIN_MAX_DELAY, so only the shutdown hook can write these
+            self.manage(path, 'shell', '-c', (
+                'from attendance.checkin import checkin_buffer\n'
+                f'for student_id in {[student.id for student in students]}: '
+                f'checkin_buffer.add({session.id}, student_id)'
+            ))
+            copy = sqlite3.connect(path)
+            checked_in = copy.execute('SELECT student_id, status FROM attendance_attendance ORDER BY student_id').fetchall()
+            copy.close()
+        self.assertEqual(checked_in, [(student.id, 'present') for student in students])
+
+    def burst(self):
+        """300 students check in at once from many threads while the buffer flushes in the background"""
+        section = self.create_section()
+        students = self.enroll_students(section, 300)
+        session = AttendanceSession.objects.create(section=section, date=date.today())
+        open_checkin(session)
+        buffer = CheckInBuffer(max_batch=100, max_delay=0.2)
+        patcher = mock.patch('attendance.views.checkin_buffer', buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        flush = mock.patch.object(buffer, 'flush', wraps=buffer.flush)
+        flushes = flush.start()
+        self.addCleanup(flush.stop)
+
+        url = reverse('attendance:student_checkin', args=[session.id])
+        clients = []
+        for student in students:
+            client = Client()
+            client.force_login(student.profile.user)
+            clients.append(client)
+
+        def check_in(client):
+            try:
+                begin = perf_counter()
+                response = client.post(url, {'code': checkin_code(session.id)})
+                return response.status_code, perf_counter() - begin
+            finally:
+                connection.close()
+
+        begin = perf_counter()
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            results = list(pool.map(check_in, clients))
+        elapsed = perf_counter() - begin
+        # Let the background thread drain the buffer, then stop it before reading the table
+        deadline = perf_counter() + 10
+        while len(buffer) and perf_counter() < deadline:
+            sleep(0.05)
+        self.assertEqual(buffer.stop(), 0)
+
+        self.assertEqual([status for status, latency in results], [202] * 300)
+        self.assertEqual(Attendance.objects.filter(session=session).count(), 300)
+        return results, elapsed, flushes
+
+    def test_lecture_hall_burst(self):
+        results, elapsed, flushes = self.burst()
+        # Coalesced into a few batched writes rather than one per request
+        self.assertLess(flushes.call_count, 30)
+
+    @benchmark
+    def test_lecture_hall_burst_latency(self):
+        results, elapsed, flushes = self.burst()
+        p99 = quantiles([latency for status, latency in results], n=100)[98]
+        self.assertLess(p99, 0.5)
+        self.assertGreater(300 / elapsed, 20)
+
+
+class AttendanceAlertTests(SchoolTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.section = self.create_section()
+        self.students = self.enroll_students(self.section, 2)
+        self.day = 0
+
+    def mark(self, *statuses):
+        self.day += 1
+        session = AttendanceSession.objects.create(section=self.section, date=date(2025, 9, self.day))
+        mark_session(session, {
+            student.id: {'status': status} for student, status in zip(self.students, statuses)
+        }, 'Tess Teacher')
+        return session
+
+    def alerted(self):
+        return set(AttendanceAlert.objects.filter(section=self.section).values_list('student_id', flat=True))
+
+    def test_alerts_follow_threshold_crossings(self):
+        self.mark('present', 'absent')
+        self.assertEqual(self.alerted(), {self.students[1].id})
+
+        session = self.mark('absent', 'present')
+        self.assertEqual(self.alerted(), {self.students[0].id, self.students[1].id})
+
+        with CaptureQueriesContext(connection) as queries:
+            mark_session(session, {self.students[0].id: {'status': 'present'}}, 'Tess Teacher')
+        alert_writes = [q for q in queries if q['sql'].startswith(('INSERT', 'DELETE')) and 'alert' in q['sql']]
+        self.assertEqual(len(alert_writes), 1)
+        self.assertEqual(self.alerted(), {self.students[1].id})
+
+    def test_section_threshold_rechecks_every_student(self):
+        self.mark('present', 'present')
+        self.mark('present', 'present')
+        self.mark('present', 'present')
+        self.mark('absent', 'present')
+        self.assertEqual(self.alerted(), set())
+
+        self.assertEqual(set_alert_threshold(self.section, 80.0), {'raised': 1, 'cleared': 0})
+        self.assertEqual(self.alerted(), {self.students[0].id})
+        self.assertEqual(set_alert_threshold(self.section, 50.0), {'raised': 0, 'cleared': 1})
+
+    def test_dashboards_read_the_alert_table(self):
+        self.mark('present', 'absent')
+        AttendanceSummary.objects.filter(student=self.students[0]).update(attendance_percentage=10.0)
+
+        self.assertEqual(teacher_overview(self.section.teacher)['low_attendance_alerts'], 1)
+        self.client.login(username='teacher_cs101', password='pass')
+        response = self.client.get(reverse('attendance:section_attendance', args=[self.section.id]))
+        self.assertEqual(response.context['low_attendance_count'], 1)
+        report = attendance_report(Section.objects.filter(id=self.section.id))
+        self.assertEqual(report[0]['low_attendance_alerts'], 1)
+
+    def test_rebuild_repairs_alerts_of_drifted_summaries(self):
+        self.mark('present', 'absent')
+        AttendanceSummary.objects.filter(student=self.students[1]).update(attendance_percentage=100.0)
+        AttendanceAlert.objects.all().delete()
+
+        rebuild_summaries([self.section.id])
+        self.assertEqual(self.alerted(), {self.students[1].id})
+
+
+class DailyRollupTests(SchoolTestMixin, TestCase):
+    def setUp(self):
+        self.teacher = self.create_teacher()
+        self.sections = [self.create_section(code, self.teacher) for code in ('CS101', 'MA101')]
+        Course.objects.filter(code='MA101').update(department='Mathematics')
+        self.students = {section.id: self.enroll_students(section, 3) for section in self.sections}
+        for section in self.sections:
+            for day, statuses in ((1, ('present', 'late', 'absent')), (2, ('present', 'present', 'excused'))):
+                session = AttendanceSession.objects.create(section=section, date=date(2025, 9, day))
+                mark_session(session, {
+                    student.id: {'status': status} for student, status in zip(self.students[section.id], statuses)
+                }, 'Tess Teacher')
+
+    def rollup_counts(self):
+        return sorted(DailyAttendanceRollup.objects.values_list(
+            'date', 'section_id', 'present_count', 'absent_count', 'late_count', 'excused_count'
+        ))
+
+    def test_marking_keeps_rollups_in_step_with_a_rebuild(self):
+        session = AttendanceSession.objects.get(section=self.sections[0], date=date(2025, 9, 1))
+        mark_session(session, {self.students[self.sections[0].id][2].id: {'status': 'late'}}, 'Tess Teacher')
+        incremental = self.rollup_counts()
+
+        self.assertEqual(rebuild_daily_rollups(), 4)
+        self.assertEqual(self.rollup_counts(), incremental)
+        self.assertIn((date(2025, 9, 1), self.sections[0].id, 1, 0, 2, 0), incremental)
+
+    def test_series_endpoint_by_department_with_conditional_get(self):
+        self.client.login(username='teacher', password='pass')
+        url = reverse('attendance:attendance_trends')
+        with self.assertNumQueries(5):  # session, user, profile, last modified, series
+            response = self.client.get(url, {'start': '2025-09-01', 'end': '2025-09-30'})
+        series = response.json()['series']
+        self.assertEqual([point['date'] for point in series], ['2025-09-01', '2025-09-02'])
+        self.assertEqual((series[0]['total'], series[0]['attendance_rate']), (6, 66.7))
+        self.assertIn('max-age=300', response['Cache-Control'])
+
+        response = self.client.get(url, {'department': 'Mathematics', 'start': '2025-09-01'})
+        self.assertEqual(response.json()['series'][1]['present'], 2)
+
+        response = self.client.get(url, {'start': '2025-09-01'}, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_backfill_command(self):
+        DailyAttendanceRollup.objects.all().delete()
+        out = io.StringIO()
+        call_command('rebuild_attendance_rollups', start='2025-09-02', stdout=out)
+        self.assertIn('Rebuilt 2 daily rollup rows', out.getvalue())
+        self.assertEqual({row[0] for row in self.rollup_counts()}, {date(2025, 9, 2)})
+
+
+class AttendanceImportTests(SchoolTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.section = self.create_section()
+        self.students = self.enroll_students(self.section, 20)
+
+    def csv_lines(self, students, days=(1, 2)):
+        lines = ['student_id,section,date,status,arrival_time']
+        for day in days:
+            for i, student in enumerate(students):
+                status = 'late' if i % 4 == 0 else 'present'
+                lines.append(f'{student.student_id},{self.section.id},2025-09-{day:02d},{status},09:0{i % 10}')
+        return lines
+
+    def test_import_creates_sessions_records_and_summaries(self):
+        lines = self.csv_lines(self.students[:4]) + [
+            f'S-nobody,{self.section.id},2025-09-01,present,',
+            f'{self.students[0].student_id},9999,2025-09-01,present,',
+            f'{self.students[0].student_id},{self.section.id},2025-02-30,present,',
+            f'{self.students[0].student_id},{self.section.id},2025-09-01,asleep,',
+            f'{self.students[1].student_id},{self.section.id},2025-09-01,absent,',
+        ]
+        result = import_attendance_csv(lines, chunk_size=3)
+
+        self.assertEqual((result['rows'], result['sessions_created']), (13, 2))
+        self.assertEqual([r['line'] for r in result['rejected']], [10, 11, 12, 13])
+        self.assertEqual(Attendance.objects.count(), 8)
+        summary = AttendanceSummary.objects.get(student=self.students[1])
+        self.assertEqual((summary.present_count, summary.absent_count, summary.attendance_percentage), (1, 1, 50.0))
+        self.assertTrue(AttendanceAlert.objects.filter(student=self.students[1]).exists())
+        self.assertEqual(DailyAttendanceRollup.objects.get(date=date(2025, 9, 1)).absent_count, 1)
+
+    def test_reimport_updates_and_refreshes_only_touched_summaries(self):
+        import_attendance_csv(self.csv_lines(self.students))
+        AttendanceSummary.objects.filter(student=self.students[-1]).update(present_count=99)
+
+        result = import_attendance_csv(self.csv_lines(self.students[:2], days=(1,)))
+        self.assertEqual((result['created'], result['unchanged'], result['summaries_refreshed']), (0, 2, 2))
+        self.assertEqual(AttendanceSummary.objects.get(student=self.students[-1]).present_count, 99)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        query_counts = []
+        for students in (self.students[:5], self.students):
+            AttendanceSession.objects.all().delete()
+            AttendanceSummary.objects.all().delete()
+            with CaptureQueriesContext(connection) as queries:
+                import_attendance_csv(self.csv_lines(students))
+            query_counts.append(len(queries))
+        self.assertEqual(query_counts[0], query_counts[1])
+
+    def test_command_and_admin_upload(self):
+        path = os.path.join(tempfile.mkdtemp(), 'readers.csv')
+        with open(path, 'w') as csv_file:
+            csv_file.write('\n'.join(self.csv_lines(self.students[:3])) + '\nS-nobody,1,2025-09-01,,\n')
+        out = io.StringIO()
+        call_command('import_attendance', path, chunk_size=2, stdout=out)
+        self.assertIn('Imported 6 of 7 rows', out.getvalue())
+        self.assertIn('line 8: Unknown student ID', out.getvalue())
+
+        User.objects.create_superuser('registrar', password='pass')
+        self.client.login(username='registrar', password='pass')
+        with open(path, 'rb') as csv_file:
+            response = self.client.post(reverse('admin:attendance_import'), {'csv_file': csv_file})
+        # Same records, now marked by the registrar rather than the command
+        self.assertContains(response, '0 records created, 6 updated')
+        self.assertContains(response, 'Rejected rows (1)')
+
+
+class SparseStorageTests(SchoolTestMixin, TestCase):
+    PATTERN = [
+        ['present', 'present', 'absent', 'present', 'late', 'present'],
+        ['present', 'excused', 'present', 'present', 'present', 'present'],
+        ['absent', 'present', 'present', 'present', 'present', 'late'],
+    ]
+
+    def setUp(self):
+        cache.clear()
+        self.teacher = self.create_teacher()
+        self.dense = self.create_section('CS101', self.teacher)
+        self.sparse = self.create_section('CS102', self.teacher)
+        self.students = {section.id: self.enroll_students(section, 6) for section in (self.dense, self.sparse)}
+        for day, statuses in enumerate(self.PATTERN, start=1):
+            for section, default_status in ((self.dense, None), (self.sparse, 'present')):
+                session = AttendanceSession.objects.create(section=section, date=date(2025, 9, day))
+                mark_session(session, {
+                    student.id: {'status': status} for student, status in zip(self.students[section.id], statuses)
+                }, 'Tess Teacher', default_status=default_status)
+
+    def summaries(self, section):
+        by_student = {
+            summary.student_id: [getattr(summary, field) for field in AttendanceSummary.COUNT_FIELDS[:-1]]
+            for summary in AttendanceSummary.objects.filter(section=section)
+        }
+        return [by_student[student.id] for student in self.students[section.id]]
+
+    def test_only_exceptions_are_stored(self):
+        self.assertEqual(Attendance.objects.filter(session__section=self.dense).count(), 18)
+        self.assertEqual(Attendance.objects.filter(session__section=self.sparse).count(), 5)
+
+    def test_reads_match_dense_storage(self):
+        self.assertEqual(self.summaries(self.sparse), self.summaries(self.dense))
+        self.assertEqual(
+            bytes(build_attendance_matrix(self.sparse).cells), bytes(build_attendance_matrix(self.dense).cells)
+        )
+        dense_rows, sparse_rows = (
+            [row[2:] for row in attendance_csv_rows(Section.objects.filter(id=section.id))][1:]
+            for section in (self.dense, self.sparse)
+        )
+        self.assertEqual(sparse_rows, dense_rows)
+
+        self.client.login(username='teacher', password='pass')
+        counts = []
+        for section in (self.dense, self.sparse):
+            response = self.client.get(reverse('attendance:section_attendance', args=[section.id]))
+            counts.append([(s.present_count, s.absent_count, s.late_count, s.excused_count)
+                           for s in response.context['sessions']])
+        self.assertEqual(counts[1], counts[0])
+
+        dense_recent, sparse_recent = (
+            [record.status for record in student_recent_attendance(self.students[section.id][1])]
+            for section in (self.dense, self.sparse)
+        )
+        self.assertEqual(sparse_recent, ['present', 'excused', 'present'])
+        self.assertEqual(sparse_recent, dense_recent)
+
+    def test_reads_match_dense_storage_after_enrollment_changes(self):
+        late = {}
+        for section in (self.dense, self.sparse):
+            Enrollment.objects.filter(section=section, student=self.students[section.id][1]).update(status='completed')
+            late[section.id] = self.enroll_students(section, 1, prefix='late')[0]
+
+        # The stored counters were already right; a recount must not move them
+        for section in (self.dense, self.sparse):
+            self.assertEqual(rebuild_summaries([section.id])['drifted'], [])
+        self.assertEqual(self.summaries(self.sparse), self.summaries(self.dense))
+        self.assertEqual(self.summaries(self.sparse)[1][:2], [3, 2])
+        self.assertFalse(AttendanceSummary.objects.filter(student__in=late.values()).exists())
+        dense_alerts, sparse_alerts = (
+            [AttendanceAlert.objects.filter(section=section, student=student).exists()
+             for student in self.students[section.id]]
+            for section in (self.dense, self.sparse)
+        )
+        self.assertEqual(sparse_alerts, dense_alerts)
+
+        self.assertEqual(
+            bytes(build_attendance_matrix(self.sparse).cells), bytes(build_attendance_matrix(self.dense).cells)
+        )
+        dense_rows, sparse_rows = (
+            [row[2:] for row in attendance_csv_rows(Section.objects.filter(id=section.id))][1:]
+            for section in (self.dense, self.sparse)
+        )
+        self.assertEqual(sparse_rows, dense_rows)
+        dense_recent, sparse_recent = (
+            [[record.status for record in student_recent_attendance(student)]
+             for student in (self.students[section.id][1], late[section.id])]
+            for section in (self.dense, self.sparse)
+        )
+        self.assertEqual(sparse_recent, dense_recent)
+
+        rebuild_daily_rollups(section_ids=[self.dense.id, self.sparse.id])
+        dense_rollups, sparse_rollups = (
+            sorted(DailyAttendanceRollup.objects.filter(section=section).values_list(
+                'date', 'present_count', 'absent_count', 'late_count', 'excused_count'))
+            for section in (self.dense, self.sparse)
+        )
+        self.assertEqual(sparse_rollups, dense_rollups)
+
+    def test_recounts_agree_with_incremental_counters(self):
+        rollups = sorted(DailyAttendanceRollup.objects.filter(section=self.sparse).values_list(
+            'date', 'present_count', 'absent_count', 'late_count', 'excused_count'))
+        self.assertEqual(rebuild_summaries([self.sparse.id], dry_run=True)['drifted'], [])
+        rebuild_daily_rollups(section_ids=[self.sparse.id])
+        self.assertEqual(sorted(DailyAttendanceRollup.objects.filter(section=self.sparse).values_list(
+            'date', 'present_count', 'absent_count', 'late_count', 'excused_count')), rollups)
+
+    def test_marking_back_to_the_default_drops_the_row(self):
+        session = AttendanceSession.objects.get(section=self.sparse, date=date(2025, 9, 1))
+        student = self.students[self.sparse.id][2]
+        result = mark_session(session, {student.id: {'status': 'present'}}, 'Tess Teacher')
+
+        self.assertEqual(result, {'created': 0, 'updated': 1, 'unchanged': 0})
+        self.assertFalse(Attendance.objects.filter(session=session, student=student).exists())
+        summary = AttendanceSummary.objects.get(section=self.sparse, student=student)
+        self.assertEqual((summary.present_count, summary.absent_count), (3, 0))
+
+    @override_settings(ATTENDANCE_SPARSE_DEFAULT_STATUS='present')
+    def test_mark_view_stores_sessions_sparsely_when_configured(self):
+        self.client.login(username='teacher', password='pass')
+        students = self.students[self.dense.id]
+        self.client.post(reverse('attendance:mark_attendance', args=[self.dense.id]), dict(
+            {f'attendance_{student.id}': 'present' for student in students},
+            session_date='2025-09-10', **{f'attendance_{students[0].id}': 'absent'},
+        ))
+        session = AttendanceSession.objects.get(section=self.dense, date=date(2025, 9, 10))
+        self.assertEqual(session.default_status, 'present')
+        self.assertEqual(list(Attendance.objects.filter(session=session).values_list('status', flat=True)), ['absent'])
+
+
+class SessionGenerationTests(SchoolTestMixin, TestCase):
+    def setUp(self):
+        self.teacher = self.create_teacher()
+        self.mwf = self.create_section('CS101', self.teacher)
+        self.tth = self.create_section('CS102', self.teacher)
+        self.tba = self.create_section('CS103', self.teacher)
+        Section.objects.filter(id=self.tth.id).update(schedule='TTh 11:00-12:30 PM')
+        Section.objects.filter(id=self.tba.id).update(schedule='TBA')
+        self.semester = self.mwf.semester
+        AcademicCalendar.objects.create(
+            name='Fall 2025', semester='fall', year=2025,
+            start_date=date(2025, 8, 15), end_date=date(2025, 12, 20),
+            registration_start=date(2025, 8, 1), registration_end=date(2025, 8, 30),
+            classes_start=date(2025, 9, 1), classes_end=date(2025, 9, 30),
+        )
+        creator = self.teacher.profile.user
+        for day, section in ((1, None), (4, self.tth)):
+            start = timezone.make_aware(datetime(2025, 9, day, 0, 0))
+            CalendarEvent.objects.create(
+                title='Holiday', event_type='holiday', start_datetime=start,
+                end_datetime=start + timedelta(hours=23), section=section, created_by=creator,
+            )
+
+    def test_parses_common_schedule_formats(self):
+        self.assertEqual(parse_schedule('MWF 10:00-11:00 AM'), [Meeting(frozenset({0, 2, 4}), time(10), time(11))])
+        self.assertEqual(parse_schedule('TTh 11:00-12:30 PM'), [Meeting(frozenset({1, 3}), time(11), time(12, 30))])
+        self.assertEqual(parse_schedule('MW 2:00-3:30 PM'), [Meeting(frozenset({0, 2}), time(14), time(15, 30))])
+        with self.assertRaises(ScheduleError):
+            parse_schedule('TBA')
+
+    def test_generates_semester_skipping_holidays_and_existing_sessions(self):
+        # sections, calendar, holidays, existing sessions, one INSERT in a savepoint
+        with self.assertNumQueries(7):
+            result = generate_semester_sessions(self.semester)
+
+        self.assertEqual((result['created'], result['holidays']), (12 + 8, 2))
+        self.assertEqual([section for section, error in result['invalid']], [self.tba])
+        session = AttendanceSession.objects.get(section=self.tth, date=date(2025, 9, 2))
+        self.assertEqual((session.start_time, session.end_time), (time(11), time(12, 30)))
+        self.assertEqual(generate_semester_sessions(self.semester)['created'], 0)
+
+    def test_marking_a_generated_session_updates_it(self):
+        generate_semester_sessions(self.semester)
+        student = self.enroll_students(self.mwf, 1)[0]
+        self.client.login(username='teacher', password='pass')
+        self.client.post(reverse('attendance:mark_attendance', args=[self.mwf.id]), {
+            'session_date': '2025-09-03', 'start_time': '10:05', 'topic_covered': 'Loops',
+            f'attendance_{student.id}': 'present',
+        })
+
+        self.assertEqual(AttendanceSession.objects.filter(section=self.mwf).count(), 12)
+        session = AttendanceSession.objects.get(section=self.mwf, date=date(2025, 9, 3))
+        self.assertEqual((session.start_time, session.end_time, session.topic_covered), (time(10, 5), time(11), 'Loops'))
+        self.assertEqual(Attendance.objects.get().session, session)
+
+    def test_future_sessions_are_upcoming_not_held(self):
+        today = timezone.localdate()
+        AttendanceSession.objects.create(section=self.mwf, date=today + timedelta(days=2), start_time=time(10))
+        self.client.login(username='teacher', password='pass')
+
+        response = self.client.get(reverse('attendance:teacher_attendance_sections'))
+        self.assertEqual(len(response.context['upcoming_sessions']), 1)
+        self.assertEqual(response.context['sections_data'][0]['total_sessions'], 0)
+        response = self.client.get(reverse('attendance:section_attendance', args=[self.mwf.id]))
+        self.assertEqual(list(response.context['sessions']), [])
@@ -10,10 +10,15 @@ urlpatterns = [
     # Teacher URLs
     path('teacher/sections/', views.teacher_attendance_sections_view, name='teacher_attendance_sections'),
     path('teacher/reports/', views.attendance_reports_view, name='attendance_reports'),
+    path('teacher/export/', views.export_all_attendance_csv, name='export_all_attendance'),
+    path('trends/', views.attendance_trends_view, name='attendance_trends'),
     
     # Section-specific URLs
     path('section/<int:section_id>/', views.section_attendance_view, name='section_attendance'),
     path('section/<int:section_id>/mark/', views.mark_attendance_view, name='mark_attendance'),
+    path('sync/', views.sync_attendance_view, name='sync_attendance'),
+    path('section/<int:section_id>/checkin/open/', views.open_checkin_view, name='open_checkin'),
+    path('session/<int:session_id>/checkin/', views.student_checkin_view, name='student_checkin'),
     path('section/<int:section_id>/history/', views.attendance_history_view, name='attendance_history'),
     path('section/<int:section_id>/export/', views.export_attendance_csv, name='export_attendance'),
 ]
\ No newline at end of file
@@ -1,15 +1,72 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import last_modified, require_POST
 from django.http import JsonResponse, HttpResponse
+from django.db import transaction
 from django.db.models import Count, Q, Avg
 from django.utils import timezone
-from django.core.paginator import Paginator
+from django.utils.dateparse import parse_date
 from datetime import date, timedelta
 import json
-from accounts.models import Teacher, Student
-from courses.models import Section, Enrollment
-from .models import AttendanceSession, Attendance, AttendanceSummary
+import time
+from accounts.models import Teacher, Student, UserRole
+from courses.models import AcademicYear, Section, Enrollment
+from .models import AttendanceSession, Attendance, AttendanceSummary, AttendanceAlert
+from .checkin import (
+    CHECKIN_CODE_PERIOD, checkin_buffer, checkin_code, checkin_section_id, open_checkin,
+    verify_checkin_code,
+)
+from .export import stream_attendance_csv
+from .matrix import build_attendance_matrix
+from .schedule import upcoming_sessions
+from .rollups import attendance_series, series_last_modified
+from .reports import GROUPINGS, attendance_report, report_as_csv, report_as_json, report_bands
+from .services import (
+    implicit_session_counts, mark_session, sparse_default_status, student_recent_attendance, sync_marks,
+    teacher_overview,
+)
+
+# Sessions shown per page of a section's attendance records
+SESSIONS_PER_PAGE = 20
+
+def _date_param(request, name):
+    """Parse an optional YYYY-MM-DD query parameter, ignoring bad input"""
+    try:
+        return parse_date(request.GET.get(name) or '')
+    except ValueError:
+        return None
+
+def _can_view_trends(user):
+    """Campus-wide trends are open to teachers and admins"""
+    profile = getattr(user, 'profile', None)
+    return profile is not None and profile.role in (UserRole.ADMIN, UserRole.TEACHER)
+
+def _trend_params(request):
+    """(department, start, end) of a trends request; defaults to the current academic year"""
+    start_date = _date_param(request, 'start')
+    end_date = _date_param(request, 'end')
+    if start_date is None and end_date is None:
+        year = AcademicYear.objects.filter(is_current=True).first()
+        if year:
+            start_date, end_date = year.start_date, year.end_date
+    return request.GET.get('department') or None, start_date, end_date
+
+def _trends_last_modified(request):
+    if not request.user.is_authenticated or not _can_view_trends(request.user):
+        return None
+    return series_last_modified(*_trend_params(request))
+
+def _add_implicit_counts(sessions):
+    """Count the students a sparse session gives its default status in its annotated counts"""
+    sparse = [session for session in sessions if session.default_status]
+    if not sparse:
+        return
+    implicit = implicit_session_counts(AttendanceSession.objects.filter(id__in=[session.id for session in sparse]))
+    for session in sparse:
+        field = f'{session.default_status}_count'
+        setattr(session, field, getattr(session, field) + implicit[session.id][3])
 
 @login_required
 def student_attendance_view(request):
@@ -35,12 +92,10 @@ def student_attendance_view(request):
     
     # Count courses with good/poor attendance
     good_attendance = attendance_summaries.filter(attendance_percentage__gte=85).count()
-    poor_attendance = attendance_summaries.filter(attendance_percentage__lt=75).count()
+    poor_attendance = AttendanceAlert.objects.filter(student=student).count()
     
-    # Get recent attendance records
-    recent_attendance = Attendance.objects.filter(
-        student=student
-    ).select_related('session__section__course').order_by('-session__date')[:10]
+    # Get recent attendance records, including sessions stored sparsely
+    recent_attendance = student_recent_attendance(student, 10)
     
     context = {
         'student': student,
@@ -67,49 +122,46 @@ def section_attendance_view(request, section_id):
     
     section = get_object_or_404(Section, id=section_id, teacher=teacher)
     
-    # Get all sessions for this section
-    sessions = AttendanceSession.objects.filter(section=section).order_by('-date')
-    
-    # Add attendance counts for each session
-    sessions_with_counts = []
-    for session in sessions:
-        attendance_records = Attendance.objects.filter(session=session)
-        session.present_count = attendance_records.filter(status='present').count()
-        session.absent_count = attendance_records.filter(status='absent').count()
-        session.late_count = attendance_records.filter(status='late').count()
-        session.excused_count = attendance_records.filter(status='excused').count()
-        sessions_with_counts.append(session)
+    # Get all sessions for this section with per-status counts in one query
+    sessions = AttendanceSession.objects.held().filter(section=section).annotate(
+        present_count=Count('attendance', filter=Q(attendance__status='present')),
+        absent_count=Count('attendance', filter=Q(attendance__status='absent')),
+        late_count=Count('attendance', filter=Q(attendance__status='late')),
+        excused_count=Count('attendance', filter=Q(attendance__status='excused')),
+    ).order_by('-date')
+    
+    # Keyset pagination on date: ?before=<last date of the previous page>
+    before = _date_param(request, 'before')
+    page_sessions = list(
+        (sessions.filter(date__lt=before) if before else sessions)[:SESSIONS_PER_PAGE + 1]
+    )
+    has_next = len(page_sessions) > SESSIONS_PER_PAGE
+    page_sessions = page_sessions[:SESSIONS_PER_PAGE]
     
     # Get attendance summaries for all students in this section
     attendance_summaries = AttendanceSummary.objects.filter(
         section=section
     ).select_related('student__profile__user').order_by('student__profile__user__last_name')
     
-    # Get recent attendance sessions
-    recent_sessions = sessions_with_counts[:10]
+    _add_implicit_counts(page_sessions)
     
     # Calculate section statistics
     total_students = Enrollment.objects.filter(section=section, status='enrolled').count()
-    total_sessions = sessions.count()
+    total_sessions = AttendanceSession.objects.held().filter(section=section).count()
     
     avg_attendance = attendance_summaries.aggregate(
         avg=Avg('attendance_percentage')
     )['avg'] or 0
     
-    low_attendance_count = attendance_summaries.filter(
-        attendance_percentage__lt=75.0
-    ).count()
-    
-    # Pagination for sessions
-    paginator = Paginator(sessions_with_counts, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    low_attendance_count = AttendanceAlert.objects.filter(section=section).count()
     
     context = {
         'section': section,
-        'sessions': page_obj,
+        'sessions': page_sessions,
+        'has_next': has_next,
+        'next_before': page_sessions[-1].date if has_next else None,
+        'before': before,
         'attendance_summaries': attendance_summaries,
-        'recent_sessions': recent_sessions,
         'total_students': total_students,
         'total_sessions': total_sessions,
         'avg_attendance': round(avg_attendance, 1),
@@ -129,68 +181,26 @@ def teacher_attendance_sections_view(request):
         messages.error(request, 'Access denied. Teacher account required.')
         return redirect('accounts:dashboard')
     
-    sections = Section.objects.filter(teacher=teacher).select_related('course', 'semester')
-    
-    # Calculate statistics
-    total_sections = sections.count()
-    total_students = Enrollment.objects.filter(
-        section__in=sections, 
-        status='enrolled'
-    ).count()
-    
-    # Calculate average attendance across all teacher's sections
-    attendance_summaries = AttendanceSummary.objects.filter(
-        section__in=sections
-    )
-    average_attendance = attendance_summaries.aggregate(
-        avg_attendance=Avg('attendance_percentage')
-    )['avg_attendance'] or 0
-    
-    # Count low attendance alerts (students with < 75% attendance)
-    low_attendance_alerts = attendance_summaries.filter(
-        attendance_percentage__lt=75.0
-    ).count()
+    # Per-section statistics and totals from one grouped query (cached)
+    overview = teacher_overview(teacher)
     
     # Get recent attendance sessions
-    recent_sessions = AttendanceSession.objects.filter(
-        section__in=sections
+    recent_sessions = AttendanceSession.objects.held().filter(
+        section__teacher=teacher
     ).order_by('-date')[:5]
     
-    # Prepare section data with statistics
-    sections_data = []
-    for section in sections:
-        enrolled_students = Enrollment.objects.filter(
-            section=section, 
-            status='enrolled'
-        ).count()
-        
-        total_sessions = AttendanceSession.objects.filter(section=section).count()
-        
-        section_avg_attendance = AttendanceSummary.objects.filter(
-            section=section
-        ).aggregate(avg=Avg('attendance_percentage'))['avg'] or 0
-        
-        alerts = AttendanceSummary.objects.filter(
-            section=section,
-            attendance_percentage__lt=75.0
-        ).count()
-        
-        sections_data.append({
-            'section': section,
-            'enrolled_students': enrolled_students,
-            'total_sessions': total_sessions,
-            'average_attendance': round(section_avg_attendance, 1),
-            'low_attendance_alerts': alerts,
-        })
+    # Pre-generated sessions coming up this week
+    upcoming = upcoming_sessions(Section.objects.filter(teacher=teacher))
     
     context = {
         'page_title': 'Attendance Management',
-        'total_sections': total_sections,
-        'total_students': total_students,
-        'average_attendance': round(average_attendance, 1),
-        'low_attendance_alerts': low_attendance_alerts,
-        'sections_data': sections_data,
+        'total_sections': overview['total_sections'],
+        'total_students': overview['total_students'],
+        'average_attendance': overview['average_attendance'],
+        'low_attendance_alerts': overview['low_attendance_alerts'],
+        'sections_data': overview['sections_data'],
         'recent_sessions': recent_sessions,
+        'upcoming_sessions': upcoming,
         'teacher': teacher,
     }
     return render(request, 'attendance/teacher_attendance_sections.html', context)
@@ -220,53 +230,45 @@ def mark_attendance_view(request, section_id):
         start_time = start_time if start_time and start_time.strip() else None
         end_time = end_time if end_time and end_time.strip() else None
         
-        session, created = AttendanceSession.objects.get_or_create(
-            section=section,
-            date=session_date,
-            start_time=start_time,
-            defaults={
-                'end_time': end_time,
-                'topic_covered': topic_covered,
-                'notes': notes
+        # Collect marks for every enrolled student from the form
+        student_ids = Enrollment.objects.filter(
+            section=section, status='enrolled'
+        ).values_list('student_id', flat=True)
+        marks = {
+            student_id: {
+                'status': request.POST.get(f'attendance_{student_id}', 'absent'),
+                'arrival_time': request.POST.get(f'arrival_time_{student_id}'),
+                'notes': request.POST.get(f'notes_{student_id}', ''),
             }
-        )
-        
-        if not created:
-            session.end_time = end_time
-            session.topic_covered = topic_covered
-            session.notes = notes
-            session.save()
-        
-        # Process attendance data
-        students = Enrollment.objects.filter(section=section, status='enrolled')
+            for student_id in student_ids
+        }
         
-        for enrollment in students:
-            student_id = str(enrollment.student.id)
-            status = request.POST.get(f'attendance_{student_id}', 'absent')
-            arrival_time = request.POST.get(f'arrival_time_{student_id}')
-            student_notes = request.POST.get(f'notes_{student_id}', '')
-            
-            # Handle empty arrival_time field
-            arrival_time = arrival_time if arrival_time and arrival_time.strip() else None
-            
-            # Create or update attendance record
-            attendance, created = Attendance.objects.update_or_create(
-                student=enrollment.student,
-                session=session,
+        with transaction.atomic():
+            # Sessions are usually pre-generated from the schedule, so this is an update;
+            # one session per section and day, keeping the scheduled times unless given
+            session, created = AttendanceSession.objects.get_or_create(
+                section=section,
+                date=session_date,
                 defaults={
-                    'status': status,
-                    'arrival_time': arrival_time,
-                    'notes': student_notes,
-                    'marked_by': request.user.get_full_name() or request.user.username
+                    'start_time': start_time,
+                    'end_time': end_time,
+                    'topic_covered': topic_covered,
+                    'notes': notes
                 }
             )
             
-            # Update or create attendance summary
-            summary, created = AttendanceSummary.objects.get_or_create(
-                student=enrollment.student,
-                section=section
+            if not created:
+                session.start_time = start_time or session.start_time
+                session.end_time = end_time or session.end_time
+                session.topic_covered = topic_covered
+                session.notes = notes
+                session.save(update_fields=['start_time', 'end_time', 'topic_covered', 'notes'])
+            
+            # Diff against the session's rows and write them back in bulk
+            mark_session(
+                session, marks, request.user.get_full_name() or request.user.username,
+                default_status=sparse_default_status(),
             )
-            summary.update_summary()
         
         messages.success(request, f'Attendance marked successfully for {session.date}')
         return redirect('attendance:section_attendance', section_id=section.id)
@@ -279,7 +281,7 @@ def mark_attendance_view(request, section_id):
     existing_attendance = {}
     if today_session:
         attendance_records = Attendance.objects.filter(session=today_session)
-        existing_attendance = {record.student.id: record for record in attendance_records}
+        existing_attendance = {record.student_id: record for record in attendance_records}
     
     context = {
         'section': section,
@@ -292,6 +294,105 @@ def mark_attendance_view(request, section_id):
     
     return render(request, 'attendance/mark_attendance.html', context)
 
+@login_required
+@require_POST
+def sync_attendance_view(request):
+    """
+    Apply a JSON batch of attendance marks recorded offline.
+    
+    Expects {"marks": [{"client_id", "section", "date", "student", "status",
+    "arrival_time", "notes"}, ...]}; re-sending marks that were already
+    applied is harmless.
+    """
+    try:
+        teacher = request.user.profile.teacher
+    except:
+        return JsonResponse({'error': 'Teacher account required.'}, status=403)
+    
+    try:
+        marks = json.loads(request.body).get('marks')
+    except (ValueError, AttributeError):
+        marks = None
+    if not isinstance(marks, list):
+        return JsonResponse({'error': 'Expected a JSON object with a "marks" list.'}, status=400)
+    
+    result = sync_marks(teacher, marks, request.user.get_full_name() or request.user.username)
+    return JsonResponse(result)
+
+@login_required
+@cache_control(private=True, max_age=300)
+@last_modified(_trends_last_modified)
+def attendance_trends_view(request):
+    """
+    Daily attendance series for trend charts, campus-wide or for one
+    ?department=, over ?start= and ?end= (the current academic year by
+    default). Served from the daily rollups with Last-Modified, so charts
+    that poll get 304 Not Modified until new attendance is marked.
+    """
+    if not _can_view_trends(request.user):
+        return JsonResponse({'error': 'Teacher or admin account required.'}, status=403)
+    
+    department, start_date, end_date = _trend_params(request)
+    return JsonResponse({
+        'department': department,
+        'start': start_date.isoformat() if start_date else None,
+        'end': end_date.isoformat() if end_date else None,
+        'series': attendance_series(department, start_date, end_date),
+    })
+
+@login_required
+def open_checkin_view(request, section_id):
+    """
+    Open today's session of a section for student self check-in (POST) and
+    return the rotating code to display; GET just returns the current code.
+    """
+    try:
+        teacher = request.user.profile.teacher
+    except:
+        return JsonResponse({'error': 'Teacher account required.'}, status=403)
+    
+    section = get_object_or_404(Section, id=section_id, teacher=teacher)
+    
+    session = AttendanceSession.objects.filter(section=section, date=date.today()).first()
+    if request.method == 'POST':
+        if session is None:
+            session = AttendanceSession.objects.create(section=section, date=date.today())
+        open_checkin(session)
+    elif session is None or checkin_section_id(session.id) is None:
+        return JsonResponse({'error': 'Self check-in is not open.'}, status=404)
+    
+    now = time.time()
+    return JsonResponse({
+        'session': session.id,
+        'code': checkin_code(session.id, now),
+        'expires_in': int(CHECKIN_CODE_PERIOD - now % CHECKIN_CODE_PERIOD),
+    })
+
+@login_required
+@require_POST
+def student_checkin_view(request, session_id):
+    """
+    Check the current student in to a session with the code on the screen.
+    
+    The check-in is validated without touching the attendance tables and
+    queued; it is written together with everyone else's a moment later.
+    """
+    try:
+        student = request.user.profile.student
+    except:
+        return JsonResponse({'error': 'Student account required.'}, status=403)
+    
+    section_id = checkin_section_id(session_id)
+    if section_id is None:
+        return JsonResponse({'error': 'Self check-in is not open for this session.'}, status=404)
+    if not verify_checkin_code(session_id, request.POST.get('code', '').strip()):
+        return JsonResponse({'error': 'Invalid or expired check-in code.'}, status=400)
+    if not Enrollment.objects.filter(section_id=section_id, student=student, status='enrolled').exists():
+        return JsonResponse({'error': 'You are not enrolled in this section.'}, status=403)
+    
+    checkin_buffer.add(session_id, student.id)
+    return JsonResponse({'status': 'accepted'}, status=202)
+
 @login_required
 def attendance_history_view(request, section_id):
     """
@@ -305,31 +406,21 @@ def attendance_history_view(request, section_id):
     
     section = get_object_or_404(Section, id=section_id, teacher=teacher)
     
-    # Get all sessions and attendance records
-    sessions = AttendanceSession.objects.filter(section=section).order_by('-date')
-    
-    # Prepare attendance matrix (students x sessions)
-    students = Enrollment.objects.filter(
-        section=section, 
-        status='enrolled'
-    ).select_related('student__profile__user')
-    
-    attendance_matrix = {}
-    for student in students:
-        student_attendance = {}
-        for session in sessions:
-            try:
-                attendance = Attendance.objects.get(student=student.student, session=session)
-                student_attendance[session.id] = attendance
-            except Attendance.DoesNotExist:
-                student_attendance[session.id] = None
-        attendance_matrix[student.student.id] = student_attendance
+    # Optional date window, e.g. a single month
+    start_date = _date_param(request, 'start')
+    end_date = _date_param(request, 'end')
+    
+    # Prepare attendance matrix (students x sessions) from a single query
+    matrix = build_attendance_matrix(section, start_date, end_date, newest_first=True)
     
     context = {
         'section': section,
-        'sessions': sessions,
-        'students': students,
-        'attendance_matrix': attendance_matrix,
+        'sessions': matrix.sessions,
+        'students': matrix.enrollments,
+        'attendance_matrix': matrix,
+        'attendance_rows': list(matrix.labelled_rows()),
+        'start_date': start_date,
+        'end_date': end_date,
     }
     
     return render(request, 'attendance/attendance_history.html', context)
@@ -353,24 +444,26 @@ def attendance_reports_view(request):
         selected_section = get_object_or_404(Section, id=selected_section_id, teacher=teacher)
         sections = sections.filter(id=selected_section_id)
     
-    # Generate report data
-    report_data = []
-    for section in sections:
-        summaries = AttendanceSummary.objects.filter(section=section)
-        section_data = {
-            'section': section,
-            'total_students': summaries.count(),
-            'avg_attendance': summaries.aggregate(avg=Avg('attendance_percentage'))['avg'] or 0,
-            'excellent_count': summaries.filter(attendance_percentage__gte=90).count(),
-            'good_count': summaries.filter(attendance_percentage__gte=75, attendance_percentage__lt=90).count(),
-            'poor_count': summaries.filter(attendance_percentage__lt=75).count(),
-        }
-        report_data.append(section_data)
+    # Generate report data with one grouped query across all sections
+    group_by = request.GET.get('group', 'section')
+    if group_by not in GROUPINGS:
+        group_by = 'section'
+    report_data = attendance_report(sections, group_by=group_by)
+    
+    export_format = request.GET.get('format')
+    if export_format == 'csv':
+        response = HttpResponse(report_as_csv(report_data), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="attendance_report_{group_by}.csv"'
+        return response
+    if export_format == 'json':
+        return HttpResponse(report_as_json(report_data, group_by=group_by), content_type='application/json')
     
     context = {
         'teacher_sections': Section.objects.filter(teacher=teacher),
         'selected_section': selected_section,
         'report_data': report_data,
+        'group_by': group_by,
+        'bands': report_bands(),
     }
     
     return render(request, 'attendance/attendance_reports.html', context)
@@ -388,51 +481,26 @@ def export_attendance_csv(request, section_id):
     
     section = get_object_or_404(Section, id=section_id, teacher=teacher)
     
-    import csv
-    
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="attendance_{section.course.code}_{section.section_number}.csv"'
-    
-    writer = csv.writer(response)
-    
-    # Write header
-    sessions = AttendanceSession.objects.filter(section=section).order_by('date')
-    header = ['Student ID', 'Student Name', 'Total Sessions', 'Present', 'Absent', 'Late', 'Excused', 'Attendance %']
-    header.extend([f"{session.date}" for session in sessions])
-    writer.writerow(header)
-    
-    # Write student data
-    students = Enrollment.objects.filter(section=section, status='enrolled')
-    for enrollment in students:
-        student = enrollment.student
-        summary = AttendanceSummary.objects.filter(student=student, section=section).first()
-        
-        if summary:
-            row = [
-                student.profile.user.username,
-                student.profile.user.get_full_name(),
-                summary.total_sessions,
-                summary.present_count,
-                summary.absent_count,
-                summary.late_count,
-                summary.excused_count,
-                f"{summary.attendance_percentage:.1f}%"
-            ]
-        else:
-            row = [
-                student.profile.user.username,
-                student.profile.user.get_full_name(),
-                0, 0, 0, 0, 0, "0.0%"
-            ]
-        
-        # Add attendance for each session
-        for session in sessions:
-            try:
-                attendance = Attendance.objects.get(student=student, session=session)
-                row.append(attendance.get_status_display())
-            except Attendance.DoesNotExist:
-                row.append('Not Recorded')
-        
-        writer.writerow(row)
-    
-    return response
+    return stream_attendance_csv(
+        Section.objects.filter(id=section.id),
+        f"attendance_{section.course.code}_{section.section_number}.csv",
+    )
+
+@login_required
+def export_all_attendance_csv(request):
+    """
+    Export attendance for every section the user owns as one CSV stream.
+    Admins get every section in the system.
+    """
+    profile = getattr(request.user, 'profile', None)
+    if profile and profile.role == UserRole.ADMIN:
+        sections = Section.objects.all()
+    else:
+        try:
+            teacher = request.user.profile.teacher
+        except:
+            messages.error(request, 'Access denied.')
+            return redirect('accounts:dashboard')
+        sections = Section.objects.filter(teacher=teacher)
+    
+    return stream_attendance_csv(sections, "attendance_all_sections.csv", with_titles=True)
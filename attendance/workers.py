@@ -0,0 +1,20 @@
+"""
+Process pool entry points for the attendance management commands.
+
+Workers are started with the spawn method, which imports this module in a
+fresh interpreter before Django is set up, so nothing here may import
+models at module level.
+"""
+import django
+
+
+def init_worker():
+    """Set Django up in a fresh worker; each worker opens its own database connections"""
+    django.setup()
+
+
+def rebuild_chunk(section_ids, dry_run):
+    """Run rebuild_summaries over one chunk of sections, returning the chunk with its result"""
+    from .services import rebuild_summaries
+
+    return section_ids, rebuild_summaries(section_ids, dry_run=dry_run)
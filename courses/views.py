@@ -1,3 +1,4 @@
+from django.http import JsonResponse
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
@@ -650,16 +651,35 @@ def create_section_view(request):
 
 @login_required
 def teacher_analytics_view(request, section_id):
-    """Analytics view for teachers to see class performance"""
-    section = get_object_or_404(Section, id=section_id)
+    """
+    Analytics view for teachers to see class performance: grade
+    distributions per component and for the course total. ?format=json
+    returns the same analytics as JSON.
+    """
+    from grades.analytics import grade_analytics
+
+    section = get_object_or_404(Section.objects.select_related('course', 'teacher__profile__user'), id=section_id)
     
     # Only teachers can view analytics for their sections
     if not (request.user.profile.role == UserRole.TEACHER and section.teacher.profile.user == request.user):
+        if request.GET.get('format') == 'json':
+            return JsonResponse({'error': 'Access denied.'}, status=403)
         messages.error(request, 'Access denied.')
         return redirect('accounts:dashboard')
     
-    messages.success(request, f'Analytics for {section.course.code} - Section {section.section_number}')
-    return redirect('courses:teacher_section_detail', section_id=section_id)
+    analytics = grade_analytics(section)
+    if request.GET.get('format') == 'json':
+        return JsonResponse(analytics)
+    
+    # Pair each histogram bar with its bin's lower edge for the template
+    for stats in analytics['components'] + [analytics['overall']]:
+        stats['bars'] = list(zip(analytics['bin_edges'], stats['histogram']))
+        stats['peak'] = max(stats['histogram']) or 1
+    
+    return render(request, 'courses/teacher_analytics.html', {
+        'section': section,
+        'analytics': analytics,
+    })
 
 @login_required
 def teacher_section_settings_view(request, section_id):
@@ -1,3 +1,42 @@
 from django.contrib import admin
 
+from .models import CumulativeGPA, SectionRank, SemesterGPA, SemesterRank
+
 # Register your models here.
+
+@admin.register(SemesterGPA)
+class SemesterGPAAdmin(admin.ModelAdmin):
+    list_display = ['student', 'semester', 'credits_attempted', 'gpa', 'cumulative_gpa', 'updated_at']
+    list_filter = ['semester']
+    ordering = ['semester', '-gpa']
+    search_fields = ['student__student_id', 'student__profile__user__username']
+    list_select_related = ['student__profile__user', 'semester']
+    readonly_fields = [field.name for field in SemesterGPA._meta.fields]
+
+
+@admin.register(CumulativeGPA)
+class CumulativeGPAAdmin(admin.ModelAdmin):
+    list_display = ['student', 'credits_attempted', 'credits_earned', 'gpa', 'updated_at']
+    ordering = ['-gpa']
+    search_fields = ['student__student_id', 'student__profile__user__username']
+    list_select_related = ['student__profile__user']
+    readonly_fields = [field.name for field in CumulativeGPA._meta.fields]
+
+
+@admin.register(SectionRank)
+class SectionRankAdmin(admin.ModelAdmin):
+    list_display = ['student', 'section', 'numerical_grade', 'rank', 'class_size', 'percentile']
+    ordering = ['section', 'rank']
+    search_fields = ['student__student_id', 'student__profile__user__username', 'section__course__code']
+    list_select_related = ['student__profile__user', 'section__course']
+    readonly_fields = [field.name for field in SectionRank._meta.fields]
+
+
+@admin.register(SemesterRank)
+class SemesterRankAdmin(admin.ModelAdmin):
+    list_display = ['student', 'semester', 'gpa', 'rank', 'class_size', 'percentile']
+    list_filter = ['semester']
+    ordering = ['semester', 'rank']
+    search_fields = ['student__student_id', 'student__profile__user__username']
+    list_select_related = ['student__profile__user', 'semester']
+    readonly_fields = [field.name for field in SemesterRank._meta.fields]
@@ -0,0 +1,111 @@
+import time
+
+import numpy as np
+from django.core.cache import cache
+from django.db import transaction
+
+from .engine import compute_section_grades
+
+# Seconds computed analytics stay cached; a grade change makes them stale sooner
+ANALYTICS_CACHE_TIMEOUT = 3600
+
+# Percentiles reported for every distribution
+ANALYTICS_PERCENTILES = (10, 25, 50, 75, 90)
+
+# Histogram bins over 0-100%
+ANALYTICS_BINS = 10
+
+
+def grades_version_key(section_id):
+    return f'grades:version:{section_id}'
+
+
+def grades_version(section_id):
+    """
+    Current version stamp of a section's grades; cached analytics are keyed
+    by it. Stamps are seeded from the clock, so a stamp the cache evicted
+    comes back newer than any analytics cached under the old one.
+    """
+    key = grades_version_key(section_id)
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def bump_grades_version(section_id):
+    """Mark a section's grades as changed once the current transaction commits"""
+    def bump():
+        key = grades_version_key(section_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+    transaction.on_commit(bump)
+
+
+def distribution(values, bins=ANALYTICS_BINS):
+    """Summary statistics and a 0-100% histogram of an array of percentages"""
+    values = values[~np.isnan(values)]
+    histogram, _ = np.histogram(np.clip(values, 0, 100), bins=bins, range=(0, 100))
+    if not values.size:
+        return {
+            'count': 0, 'mean': None, 'median': None, 'std': None, 'min': None, 'max': None,
+            'percentiles': {str(p): None for p in ANALYTICS_PERCENTILES},
+            'histogram': histogram.tolist(),
+        }
+    percentiles = np.percentile(values, ANALYTICS_PERCENTILES)
+    return {
+        'count': int(values.size),
+        'mean': round(float(values.mean()), 2),
+        'median': round(float(np.median(values)), 2),
+        'std': round(float(values.std()), 2),
+        'min': round(float(values.min()), 2),
+        'max': round(float(values.max()), 2),
+        'percentiles': {str(p): round(float(value), 2) for p, value in zip(ANALYTICS_PERCENTILES, percentiles)},
+        'histogram': histogram.tolist(),
+    }
+
+
+def compute_grade_analytics(section, bins=ANALYTICS_BINS):
+    """
+    Grade distributions of a section: one per GradeComponent (as a
+    percentage of its max_points) and one of the weighted course totals.
+
+    Everything comes from the weighted grade engine's single
+    (students, components) array, so it is the engine's three queries and
+    one numpy pass per section. The result is a JSON-serialisable dict.
+    """
+    grades = compute_section_grades(section)
+    percentages = grades.percentages
+    return {
+        'section': section.id,
+        'policy': grades.policy,
+        'students': len(grades.student_ids),
+        'bin_edges': np.linspace(0, 100, bins + 1).round(2).tolist(),
+        'components': [
+            dict(
+                distribution(percentages[:, column], bins),
+                id=component_id, name=grades.component_names[column],
+                weight=float(grades.weights[column]), max_points=int(grades.max_points[column]),
+            )
+            for column, component_id in enumerate(grades.component_ids.tolist())
+        ],
+        'overall': distribution(grades.totals, bins),
+    }
+
+
+def grade_analytics(section, bins=ANALYTICS_BINS):
+    """
+    compute_grade_analytics, cached under the section's grades version so
+    a new grade anywhere in the section is picked up on the next request.
+    """
+    version = grades_version(section.id)
+    key = f'grades:analytics:{section.id}:{version}:{bins}'
+    analytics = cache.get(key)
+    if analytics is None:
+        analytics = dict(compute_grade_analytics(section, bins), version=version)
+        cache.set(key, analytics, ANALYTICS_CACHE_TIMEOUT)
+    return analytics
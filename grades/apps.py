@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class GradesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'grades'
+
+    def ready(self):
+        import grades.signals
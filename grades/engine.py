@@ -0,0 +1,147 @@
+import numpy as np
+from django.conf import settings
+
+from courses.models import Enrollment
+
+from .models import Grade, GradeComponent
+
+# How a component a student has no Grade for counts towards the weighted total:
+#   'exclude'    - leave it out and reweight over the graded components (running grade)
+#   'zero'       - count it as 0 points
+#   'incomplete' - no total until every component is graded
+MISSING_POLICIES = ('exclude', 'zero', 'incomplete')
+
+# Enrollment statuses whose students get a course grade
+GRADED_ENROLLMENT_STATUSES = ('enrolled', 'completed')
+
+
+def missing_component_policy():
+    """Policy from the GRADES_MISSING_COMPONENT_POLICY setting, 'exclude' by default"""
+    policy = getattr(settings, 'GRADES_MISSING_COMPONENT_POLICY', 'exclude')
+    return policy if policy in MISSING_POLICIES else 'exclude'
+
+
+class SectionGrades:
+    """
+    Weighted course grades of one section, computed in one vectorised pass.
+
+    ``points`` is a float array of shape (students, components) holding
+    Grade.points_earned, NaN where a student has no grade; row and column
+    order follow ``student_ids`` and ``component_ids``. ``totals`` holds
+    each student's weighted percentage under ``policy``, NaN when the
+    policy gives no total.
+    """
+
+    def __init__(self, section_id, student_ids, component_ids, names, weights, max_points, points, policy):
+        if policy not in MISSING_POLICIES:
+            raise ValueError(f'Unknown missing-component policy "{policy}"')
+        self.section_id = section_id
+        self.policy = policy
+        self.student_ids = np.asarray(student_ids, dtype=np.int64)
+        self.component_ids = np.asarray(component_ids, dtype=np.int64)
+        self.component_names = list(names)
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.max_points = np.asarray(max_points, dtype=np.float64)
+        self.points = np.asarray(points, dtype=np.float64).reshape(len(self.student_ids), len(self.component_ids))
+        self.totals = self._weighted_totals()
+
+    @property
+    def graded(self):
+        """Boolean (students, components) array of the grades that exist"""
+        return ~np.isnan(self.points)
+
+    @property
+    def percentages(self):
+        """Per-component percentages, NaN where ungraded; 0 for components worth 0 points"""
+        percentages = np.zeros(self.points.shape)
+        np.divide(self.points * 100.0, self.max_points, out=percentages, where=self.max_points > 0)
+        percentages[~self.graded] = np.nan
+        return percentages
+
+    @property
+    def missing_counts(self):
+        return (~self.graded).sum(axis=1)
+
+    def _weighted_totals(self):
+        graded = self.graded
+        weighted = np.nan_to_num(self.percentages) * self.weights
+        if self.policy == 'exclude':
+            # Reweight over what each student has been graded on so far
+            denominators = graded @ self.weights
+        else:
+            denominators = np.full(len(self.student_ids), self.weights.sum())
+        totals = np.full(len(self.student_ids), np.nan)
+        np.divide(weighted.sum(axis=1), denominators, out=totals, where=denominators > 0)
+        if self.policy == 'incomplete':
+            totals[~graded.all(axis=1)] = np.nan
+        return totals
+
+    def total(self, student_id):
+        """Weighted percentage of one student, or None"""
+        rows = np.flatnonzero(self.student_ids == student_id)
+        if not rows.size or np.isnan(self.totals[rows[0]]):
+            return None
+        return float(self.totals[rows[0]])
+
+    def as_dict(self, decimals=2):
+        """``{student_id: weighted percentage or None}``, rounded for display or storage"""
+        return {
+            student_id: None if np.isnan(total) else round(float(total), decimals)
+            for student_id, total in zip(self.student_ids.tolist(), self.totals)
+        }
+
+    def rows(self, decimals=2):
+        """One dict per student with the component percentages and the weighted total"""
+        percentages = np.round(self.percentages, decimals)
+        missing = self.missing_counts
+        return [
+            {
+                'student_id': student_id,
+                'components': [None if np.isnan(value) else float(value) for value in percentages[i]],
+                'missing': int(missing[i]),
+                'total': None if np.isnan(self.totals[i]) else round(float(self.totals[i]), decimals),
+            }
+            for i, student_id in enumerate(self.student_ids.tolist())
+        ]
+
+
+def compute_section_grades(section, policy=None, student_ids=None):
+    """
+    Weighted course grade of every graded student of a section.
+
+    Three flat values_list queries (components, roster, grades) feed the
+    numpy arrays; no model instances are built, so the cost is linear in
+    the number of Grade rows. ``policy`` is one of MISSING_POLICIES and
+    defaults to missing_component_policy(). ``student_ids`` restricts the
+    computation to some students. Returns a SectionGrades.
+    """
+    policy = policy or missing_component_policy()
+    components = list(
+        GradeComponent.objects.filter(section=section).order_by('id')
+        .values_list('id', 'name', 'weight_percentage', 'max_points')
+    )
+    roster = Enrollment.objects.filter(section=section, status__in=GRADED_ENROLLMENT_STATUSES)
+    grades = Grade.objects.filter(section=section)
+    if student_ids is not None:
+        roster = roster.filter(student_id__in=student_ids)
+        grades = grades.filter(student_id__in=student_ids)
+    students = np.array(sorted(roster.values_list('student_id', flat=True)), dtype=np.int64)
+
+    component_ids = np.array([component[0] for component in components], dtype=np.int64)
+    points = np.full((len(students), len(component_ids)), np.nan)
+    flat = np.array(list(grades.values_list('student_id', 'component_id', 'points_earned')), dtype=np.float64)
+    if flat.size and students.size and component_ids.size:
+        student_col, component_col = flat[:, 0].astype(np.int64), flat[:, 1].astype(np.int64)
+        rows = np.minimum(np.searchsorted(students, student_col), len(students) - 1)
+        columns = np.minimum(np.searchsorted(component_ids, component_col), len(component_ids) - 1)
+        # Grades of students no longer on the roster, or of another section's components, are ignored
+        known = (students[rows] == student_col) & (component_ids[columns] == component_col)
+        points[rows[known], columns[known]] = flat[known, 2]
+
+    return SectionGrades(
+        section.id, students, component_ids,
+        [component[1] for component in components],
+        [component[2] for component in components],
+        [component[3] for component in components],
+        points, policy,
+    )
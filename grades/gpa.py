@@ -0,0 +1,134 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import CumulativeGPA, FinalGrade, SemesterGPA
+
+# Letters that carry no GPA points and no credits attempted
+NON_GPA_LETTERS = ('I', 'W')
+
+# Letters that earn no credits
+FAILING_LETTERS = ('F',)
+
+HONOUR_ROLL_GPA = 3.5
+HONOUR_ROLL_MIN_CREDITS = 12
+PROBATION_GPA = 2.0
+
+
+def _totals(rows):
+    """(credits attempted, credits earned, quality points) of (credits, letter, gpa points) rows"""
+    attempted = earned = 0
+    quality_points = 0.0
+    for credits, letter_grade, gpa_points in rows:
+        if letter_grade in NON_GPA_LETTERS:
+            continue
+        attempted += credits
+        quality_points += credits * gpa_points
+        if letter_grade not in FAILING_LETTERS:
+            earned += credits
+    return attempted, earned, quality_points
+
+
+def _gpa(quality_points, credits):
+    return round(quality_points / credits, 4) if credits else 0.0
+
+
+def refresh_gpa(student_ids):
+    """
+    Rebuild the SemesterGPA and CumulativeGPA rows of the given students.
+
+    Their final grades are read with one query joined to the section's
+    semester and course credits, every semester and cumulative figure is
+    computed in Python, and the students' rows are replaced with two
+    bulk_creates in one transaction. Called whenever a student's
+    FinalGrade rows change, so pages never aggregate final grades.
+    """
+    student_ids = set(student_ids)
+    if not student_ids:
+        return
+    by_semester = defaultdict(lambda: defaultdict(list))
+    starts = {}
+    rows = FinalGrade.objects.filter(student_id__in=student_ids).values_list(
+        'student_id', 'section__semester_id', 'section__semester__start_date',
+        'section__course__credits', 'letter_grade', 'gpa_points',
+    )
+    for student_id, semester_id, start_date, credits, letter_grade, gpa_points in rows:
+        by_semester[student_id][semester_id].append((credits, letter_grade, gpa_points))
+        starts[semester_id] = start_date
+
+    semester_gpas = []
+    cumulative_gpas = []
+    for student_id, semesters in by_semester.items():
+        total_attempted = total_earned = 0
+        total_points = 0.0
+        for semester_id in sorted(semesters, key=lambda semester_id: (starts[semester_id], semester_id)):
+            attempted, earned, quality_points = _totals(semesters[semester_id])
+            total_attempted += attempted
+            total_earned += earned
+            total_points += quality_points
+            semester_gpas.append(SemesterGPA(
+                student_id=student_id, semester_id=semester_id,
+                credits_attempted=attempted, credits_earned=earned,
+                quality_points=quality_points, gpa=_gpa(quality_points, attempted),
+                cumulative_credits=total_attempted, cumulative_gpa=_gpa(total_points, total_attempted),
+            ))
+        cumulative_gpas.append(CumulativeGPA(
+            student_id=student_id, credits_attempted=total_attempted, credits_earned=total_earned,
+            quality_points=total_points, gpa=_gpa(total_points, total_attempted),
+        ))
+
+    with transaction.atomic():
+        SemesterGPA.objects.filter(student_id__in=student_ids).delete()
+        CumulativeGPA.objects.filter(student_id__in=student_ids).delete()
+        SemesterGPA.objects.bulk_create(semester_gpas, batch_size=500)
+        CumulativeGPA.objects.bulk_create(cumulative_gpas, batch_size=500)
+
+
+def honour_roll(semester, min_gpa=None, min_credits=None):
+    """
+    Students with a semester GPA of at least ``min_gpa`` over at least
+    ``min_credits`` credits (GRADES_HONOUR_ROLL_GPA and
+    GRADES_HONOUR_ROLL_MIN_CREDITS by default), best first.
+    """
+    if min_gpa is None:
+        min_gpa = getattr(settings, 'GRADES_HONOUR_ROLL_GPA', HONOUR_ROLL_GPA)
+    if min_credits is None:
+        min_credits = getattr(settings, 'GRADES_HONOUR_ROLL_MIN_CREDITS', HONOUR_ROLL_MIN_CREDITS)
+    return (
+        SemesterGPA.objects.filter(semester=semester, gpa__gte=min_gpa, credits_attempted__gte=min_credits)
+        .select_related('student__profile__user')
+        .order_by('-gpa', 'student__student_id')
+    )
+
+
+def probation_list(max_gpa=None):
+    """Students whose cumulative GPA is below ``max_gpa`` (GRADES_PROBATION_GPA by default), lowest first"""
+    if max_gpa is None:
+        max_gpa = getattr(settings, 'GRADES_PROBATION_GPA', PROBATION_GPA)
+    return (
+        CumulativeGPA.objects.filter(gpa__lt=max_gpa, credits_attempted__gt=0)
+        .select_related('student__profile__user')
+        .order_by('gpa', 'student__student_id')
+    )
+
+
+def transcript(student):
+    """
+    A student's transcript: a list of (SemesterGPA, final grades) in
+    semester order, and the CumulativeGPA (or None). Three queries.
+    """
+    finals = defaultdict(list)
+    for final in (
+        FinalGrade.objects.filter(student=student)
+        .select_related('section__course')
+        .order_by('section__course__code')
+    ):
+        finals[final.section.semester_id].append(final)
+    semesters = [
+        (semester_gpa, finals[semester_gpa.semester_id])
+        for semester_gpa in SemesterGPA.objects.filter(student=student)
+        .select_related('semester').order_by('semester__start_date', 'semester_id')
+    ]
+    cumulative = CumulativeGPA.objects.filter(student=student).first()
+    return semesters, cumulative
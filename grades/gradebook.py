@@ -0,0 +1,134 @@
+from django.db import transaction
+
+from courses.models import Enrollment
+
+from .analytics import bump_grades_version
+from .models import Grade, GradeComponent
+
+# Rows per INSERT / UPDATE when saving gradebook changes
+GRADEBOOK_BATCH_SIZE = 500
+
+
+class Gradebook:
+    """
+    A section's grades pivoted into a grid: enrolled students as rows and
+    GradeComponents as columns.
+
+    The grades themselves are read with one flat values_list query and
+    pivoted in memory; with the components and the roster that is three
+    queries however large the section. ``rows`` is a list of
+    (enrollment, cells) pairs where ``cells`` holds a (component, points)
+    pair per column, with None points for cells without a grade.
+    """
+
+    def __init__(self, section):
+        self.section = section
+        self.components = list(GradeComponent.objects.filter(section=section).order_by('id'))
+        self.enrollments = list(
+            Enrollment.objects.filter(section=section, status='enrolled')
+            .select_related('student__profile__user')
+            .order_by('student__profile__user__last_name', 'student__profile__user__first_name')
+        )
+        cells = {
+            (student_id, component_id): points
+            for student_id, component_id, points in Grade.objects.filter(section=section)
+            .values_list('student_id', 'component_id', 'points_earned')
+        }
+        self.rows = [
+            (enrollment, [
+                (component, cells.get((enrollment.student_id, component.id))) for component in self.components
+            ])
+            for enrollment in self.enrollments
+        ]
+
+
+def parse_cell(value, max_points):
+    """Points of one gradebook cell, None to clear it; raises ValueError"""
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    try:
+        points = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'"{value}" is not a number')
+    if points != points or not 0 <= points <= max_points:
+        raise ValueError(f'Points must be between 0 and {max_points}')
+    return points
+
+
+def save_gradebook_changes(section, changes):
+    """
+    Apply changed gradebook cells to a section in one transaction.
+
+    ``changes`` is a list of ``{"student", "component", "points"}`` dicts,
+    only the cells that changed; empty points clear a grade. Cells are
+    validated against the roster and each component's max_points, the
+    existing grades of the changed cells are read in one query, and the
+    writes are one bulk_create, one bulk_update and one delete. Invalid
+    cells are skipped and reported. Returns a dict with the numbers
+    ``created``, ``updated``, ``deleted`` and ``unchanged`` and the
+    ``errors`` as ``{student, component, error}`` dicts.
+    """
+    components = dict(GradeComponent.objects.filter(section=section).values_list('id', 'max_points'))
+    roster = set(
+        Enrollment.objects.filter(section=section, status='enrolled').values_list('student_id', flat=True)
+    )
+    result = {'created': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0, 'errors': []}
+
+    cleaned = {}
+    for change in changes:
+        try:
+            student_id, component_id = int(change.get('student')), int(change.get('component'))
+        except (AttributeError, TypeError, ValueError):
+            result['errors'].append({'student': None, 'component': None, 'error': 'Invalid cell'})
+            continue
+        try:
+            if student_id not in roster:
+                raise ValueError('Student is not enrolled in this section')
+            if component_id not in components:
+                raise ValueError('Unknown grade component')
+            cleaned[(student_id, component_id)] = parse_cell(change.get('points'), components[component_id])
+        except ValueError as error:
+            result['errors'].append({'student': student_id, 'component': component_id, 'error': str(error)})
+    if not cleaned:
+        return result
+
+    with transaction.atomic():
+        existing = {
+            (grade.student_id, grade.component_id): grade
+            for grade in Grade.objects.filter(
+                section=section,
+                student_id__in={student_id for student_id, component_id in cleaned},
+                component_id__in={component_id for student_id, component_id in cleaned},
+            ).only('id', 'student_id', 'component_id', 'points_earned')
+        }
+        to_create = []
+        to_update = []
+        to_delete = []
+        for (student_id, component_id), points in cleaned.items():
+            grade = existing.get((student_id, component_id))
+            if grade is None:
+                if points is not None:
+                    to_create.append(Grade(
+                        student_id=student_id, section=section, component_id=component_id, points_earned=points,
+                    ))
+                else:
+                    result['unchanged'] += 1
+            elif points is None:
+                to_delete.append(grade.id)
+            elif grade.points_earned != points:
+                grade.points_earned = points
+                to_update.append(grade)
+            else:
+                result['unchanged'] += 1
+
+        Grade.objects.bulk_create(to_create, batch_size=GRADEBOOK_BATCH_SIZE)
+        Grade.objects.bulk_update(to_update, ['points_earned'], batch_size=GRADEBOOK_BATCH_SIZE)
+        if to_delete:
+            Grade.objects.filter(id__in=to_delete).delete()
+        if to_create or to_update or to_delete:
+            bump_grades_version(section.id)
+
+    result['created'] = len(to_create)
+    result['updated'] = len(to_update)
+    result['deleted'] = len(to_delete)
+    return result
@@ -0,0 +1,230 @@
+import csv
+from itertools import islice
+
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import Student
+from courses.models import Assignment, Enrollment, Section
+
+from .analytics import bump_grades_version
+from .gradebook import parse_cell
+from .models import AssignmentSubmission, Grade, GradeComponent
+
+# CSV rows read, validated and written per transaction
+IMPORT_CHUNK_SIZE = 1000
+
+IMPORT_COLUMNS = ['student_id', 'section', 'component', 'assignment', 'points', 'comments']
+REQUIRED_COLUMNS = ['student_id', 'points']
+
+
+class GradeImporter:
+    """
+    Stream marks from a CSV file into Grade and AssignmentSubmission rows.
+
+    Each row needs ``student_id`` (the Student's student ID), ``points``
+    and either ``component`` (a GradeComponent of the section, by id or
+    name) or ``assignment`` (an Assignment of the section, by id or
+    title); ``section`` is the Section id and may be left out when a
+    ``default_section`` is given, and ``comments`` is optional. Points are
+    checked against the component's or assignment's max_points in memory.
+    Student IDs are resolved through one map loaded up front; rosters,
+    components and assignments are loaded once per section. The file is
+    read ``chunk_size`` rows at a time and each chunk is written in its own
+    transaction with bulk operations. Assignment marks are recorded on the
+    student's existing submission. Only ``sections`` (all by default) may
+    be imported into.
+    """
+
+    def __init__(self, sections=None, default_section=None, chunk_size=IMPORT_CHUNK_SIZE):
+        self.allowed = set(sections.values_list('id', flat=True)) if sections is not None else None
+        self.default_section = default_section
+        self.chunk_size = chunk_size
+        self.students = None
+        self.sections = {}
+        self.result = {
+            'rows': 0, 'grades_created': 0, 'grades_updated': 0,
+            'submissions_graded': 0, 'unchanged': 0, 'rejected': [],
+        }
+
+    def run(self, lines, progress=None):
+        """Import every row of ``lines`` (an iterable of CSV text lines) and return the result"""
+        reader = csv.DictReader(lines)
+        fieldnames = reader.fieldnames or []
+        missing = [column for column in REQUIRED_COLUMNS if column not in fieldnames]
+        if 'component' not in fieldnames and 'assignment' not in fieldnames:
+            missing.append('component or assignment')
+        if 'section' not in fieldnames and self.default_section is None:
+            missing.append('section')
+        if missing:
+            raise ValueError(f'Missing required column(s): {", ".join(missing)}')
+
+        self.students = dict(Student.objects.values_list('student_id', 'id'))
+        numbered = enumerate(reader, start=2)
+        while True:
+            chunk = list(islice(numbered, self.chunk_size))
+            if not chunk:
+                break
+            self.import_chunk(chunk)
+            self.result['rows'] += len(chunk)
+            if progress:
+                progress(self.result)
+        self.result['rejected'].sort(key=lambda rejection: rejection['line'])
+        return self.result
+
+    def import_chunk(self, chunk):
+        grades = {}
+        marks = {}
+        for line, row in chunk:
+            try:
+                kind, key, values = self.clean_row(row)
+            except ValueError as error:
+                self.result['rejected'].append({'line': line, 'error': str(error)})
+                continue
+            # A later row for the same student and item wins
+            (grades if kind == 'component' else marks)[key] = (line, values)
+
+        with transaction.atomic():
+            self.write_grades(grades)
+            self.write_submissions(marks)
+        for section_id in {values['section_id'] for line, values in grades.values()}:
+            bump_grades_version(section_id)
+
+    def clean_row(self, row):
+        """Validate one CSV row against the lookup maps; raises ValueError"""
+        student_id = self.students.get((row.get('student_id') or '').strip())
+        if student_id is None:
+            raise ValueError(f'Unknown student ID "{row.get("student_id")}"')
+
+        section_value = (row.get('section') or '').strip()
+        if section_value:
+            try:
+                section_id = int(section_value)
+            except ValueError:
+                raise ValueError(f'Invalid section "{row.get("section")}"')
+        else:
+            if self.default_section is None:
+                raise ValueError('Missing section')
+            section_id = self.default_section.id
+        section = self.section(section_id)
+        if student_id not in section['roster']:
+            raise ValueError(f'Student is not enrolled in section {section_id}')
+
+        component = (row.get('component') or '').strip()
+        assignment = (row.get('assignment') or '').strip()
+        if bool(component) == bool(assignment):
+            raise ValueError('Give either a component or an assignment')
+        kind, value = ('component', component) if component else ('assignment', assignment)
+        items = section[kind + 's']
+        item_id = items['names'].get(value.lower()) or (int(value) if value.isdigit() else None)
+        if item_id not in items['max_points']:
+            raise ValueError(f'Unknown {kind} "{value}" in section {section_id}')
+
+        points = parse_cell(row.get('points'), items['max_points'][item_id])
+        if points is None:
+            raise ValueError('Missing points')
+        return kind, (student_id, item_id), {
+            'section_id': section_id,
+            'points': points,
+            'comments': (row.get('comments') or '').strip(),
+        }
+
+    def section(self, section_id):
+        """Roster, components and assignments of a section, loaded on first use"""
+        if section_id not in self.sections:
+            exists = (self.allowed is None or section_id in self.allowed) and (
+                Section.objects.filter(id=section_id).exists()
+            )
+            self.sections[section_id] = None
+            if exists:
+                components = list(
+                    GradeComponent.objects.filter(section_id=section_id).values_list('id', 'name', 'max_points')
+                )
+                assignments = list(
+                    Assignment.objects.filter(section_id=section_id).values_list('id', 'title', 'max_points')
+                )
+                self.sections[section_id] = {
+                    'roster': set(
+                        Enrollment.objects.filter(section_id=section_id, status='enrolled')
+                        .values_list('student_id', flat=True)
+                    ),
+                    'components': {
+                        'names': {name.lower(): item_id for item_id, name, max_points in components},
+                        'max_points': {item_id: max_points for item_id, name, max_points in components},
+                    },
+                    'assignments': {
+                        'names': {title.lower(): item_id for item_id, title, max_points in assignments},
+                        'max_points': {item_id: max_points for item_id, title, max_points in assignments},
+                    },
+                }
+        if self.sections[section_id] is None:
+            raise ValueError(f'Unknown section {section_id}')
+        return self.sections[section_id]
+
+    def write_grades(self, grades):
+        """Create or update Grade rows for ``grades`` ((student_id, component_id) -> (line, values))"""
+        if not grades:
+            return
+        existing = {
+            (grade.student_id, grade.component_id): grade
+            for grade in Grade.objects.filter(
+                student_id__in={student_id for student_id, component_id in grades},
+                component_id__in={component_id for student_id, component_id in grades},
+            )
+        }
+        to_create = []
+        to_update = []
+        for (student_id, component_id), (line, values) in grades.items():
+            grade = existing.get((student_id, component_id))
+            if grade is None:
+                to_create.append(Grade(
+                    student_id=student_id, section_id=values['section_id'], component_id=component_id,
+                    points_earned=values['points'], comments=values['comments'],
+                ))
+            elif (grade.points_earned, grade.comments) != (values['points'], values['comments']):
+                grade.points_earned = values['points']
+                grade.comments = values['comments']
+                to_update.append(grade)
+            else:
+                self.result['unchanged'] += 1
+        Grade.objects.bulk_create(to_create, batch_size=500)
+        Grade.objects.bulk_update(to_update, ['points_earned', 'comments'], batch_size=500)
+        self.result['grades_created'] += len(to_create)
+        self.result['grades_updated'] += len(to_update)
+
+    def write_submissions(self, marks):
+        """Grade existing submissions for ``marks`` ((student_id, assignment_id) -> (line, values))"""
+        if not marks:
+            return
+        submissions = {
+            (submission.student_id, submission.assignment_id): submission
+            for submission in AssignmentSubmission.objects.filter(
+                student_id__in={student_id for student_id, assignment_id in marks},
+                assignment_id__in={assignment_id for student_id, assignment_id in marks},
+            )
+        }
+        now = timezone.now()
+        to_update = []
+        for key, (line, values) in marks.items():
+            submission = submissions.get(key)
+            if submission is None:
+                self.result['rejected'].append({'line': line, 'error': 'No submission from this student'})
+            elif submission.is_graded and (submission.points_earned, submission.teacher_comments) == (
+                values['points'], values['comments']
+            ):
+                self.result['unchanged'] += 1
+            else:
+                submission.points_earned = values['points']
+                submission.teacher_comments = values['comments']
+                submission.is_graded = True
+                submission.graded_date = now
+                to_update.append(submission)
+        AssignmentSubmission.objects.bulk_update(
+            to_update, ['points_earned', 'teacher_comments', 'is_graded', 'graded_date'], batch_size=500
+        )
+        self.result['submissions_graded'] += len(to_update)
+
+
+def import_grades_csv(lines, sections=None, default_section=None, chunk_size=IMPORT_CHUNK_SIZE, progress=None):
+    """Import marks from CSV text lines; see GradeImporter"""
+    return GradeImporter(sections, default_section, chunk_size).run(lines, progress)
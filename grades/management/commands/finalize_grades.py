@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+from courses.models import Section, Semester
+from grades.engine import MISSING_POLICIES
+from grades.services import finalize_grades
+
+
+class Command(BaseCommand):
+    help = 'Compute and store final grades for a whole semester or for some sections'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--semester',
+            help='Semester id or name (default: the current semester)',
+        )
+        parser.add_argument(
+            '--section',
+            type=int,
+            action='append',
+            dest='sections',
+            help='Only finalize this section id (may be repeated)',
+        )
+        parser.add_argument(
+            '--missing',
+            choices=MISSING_POLICIES,
+            default='zero',
+            help='How components without a grade count (default: zero)',
+        )
+
+    def handle(self, *args, **options):
+        value = options['semester']
+        if value:
+            semesters = Semester.objects.filter(id=int(value)) if value.isdigit() else Semester.objects.filter(name=value)
+        else:
+            semesters = Semester.objects.filter(is_current=True)
+        semester = semesters.first()
+        if semester is None:
+            raise CommandError(f'No semester found for "{value}".' if value else 'No current semester is set.')
+
+        sections = Section.objects.filter(semester=semester)
+        if options['sections']:
+            sections = sections.filter(id__in=options['sections'])
+
+        result = finalize_grades(sections, policy=options['missing'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{semester.name}: {result["created"]} final grades created, {result["updated"]} updated, '
+            f'{result["unchanged"]} unchanged, {result["incomplete"]} incomplete.'
+        ))
@@ -0,0 +1,61 @@
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from grades.importer import IMPORT_CHUNK_SIZE, import_grades_csv
+
+
+class Command(BaseCommand):
+    help = 'Import component grades and assignment marks from a CSV file, streamed in chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='CSV file with student_id, section, component or assignment, points[, comments]'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=IMPORT_CHUNK_SIZE,
+            help=f'Rows written per transaction (default: {IMPORT_CHUNK_SIZE})',
+        )
+        parser.add_argument(
+            '--rejects',
+            help='Write rejected rows (line, error) to this CSV file',
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1.')
+
+        started = time.monotonic()
+
+        def progress(result):
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f'{result["rows"]} rows read, {len(result["rejected"])} rejected '
+                f'({result["rows"] / elapsed if elapsed else result["rows"]:.0f} rows/s)'
+            )
+
+        try:
+            with open(options['path'], newline='', encoding='utf-8-sig') as csv_file:
+                result = import_grades_csv(csv_file, chunk_size=options['chunk_size'], progress=progress)
+        except (OSError, ValueError) as error:
+            raise CommandError(str(error))
+
+        rejected = result['rejected']
+        for rejection in rejected[:20]:
+            self.stdout.write(f'  line {rejection["line"]}: {rejection["error"]}')
+        if len(rejected) > 20:
+            self.stdout.write(f'  ... and {len(rejected) - 20} more')
+        if options['rejects'] and rejected:
+            with open(options['rejects'], 'w', newline='') as rejects_file:
+                writer = csv.DictWriter(rejects_file, fieldnames=['line', 'error'])
+                writer.writeheader()
+                writer.writerows(rejected)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {result["rows"] - len(rejected)} of {result["rows"]} rows in '
+            f'{time.monotonic() - started:.2f}s: {result["grades_created"]} grades created, '
+            f'{result["grades_updated"]} updated, {result["submissions_graded"]} submissions graded, '
+            f'{result["unchanged"]} unchanged.'
+        ))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from grades.gpa import refresh_gpa
+from grades.models import FinalGrade
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the materialized semester and cumulative GPA tables from final grades'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--student',
+            type=int,
+            action='append',
+            dest='students',
+            help='Only rebuild this student id (may be repeated)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Number of students rebuilt per transaction (default: 500)',
+        )
+
+    def handle(self, *args, **options):
+        student_ids = options['students'] or sorted(set(FinalGrade.objects.values_list('student_id', flat=True)))
+        chunk_size = options['chunk_size']
+        for start in range(0, len(student_ids), chunk_size):
+            refresh_gpa(student_ids[start:start + chunk_size])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt GPAs for {len(student_ids)} students.'))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from courses.models import Section
+from grades.models import FinalGrade
+from grades.ranking import refresh_section_ranks, refresh_semester_ranks
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the materialized section and semester rank tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--semester',
+            type=int,
+            action='append',
+            dest='semesters',
+            help='Only rebuild this semester id (may be repeated)',
+        )
+
+    def handle(self, *args, **options):
+        sections = Section.objects.filter(id__in=FinalGrade.objects.values('section_id'))
+        if options['semesters']:
+            sections = sections.filter(semester_id__in=options['semesters'])
+        section_ids = set(sections.values_list('id', flat=True))
+        semester_ids = set(options['semesters'] or sections.values_list('semester_id', flat=True))
+        refresh_section_ranks(section_ids)
+        refresh_semester_ranks(semester_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt ranks for {len(section_ids)} sections in {len(semester_ids)} semesters.'
+        ))
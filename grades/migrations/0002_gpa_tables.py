@@ -0,0 +1,53 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_profile_bio_profile_preferred_pronouns_and_more'),
+        ('courses', '0001_initial'),
+        ('grades', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CumulativeGPA',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('credits_attempted', models.PositiveIntegerField(default=0)),
+                ('credits_earned', models.PositiveIntegerField(default=0)),
+                ('quality_points', models.FloatField(default=0.0)),
+                ('gpa', models.FloatField(db_index=True, default=0.0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='cumulative_gpa', to='accounts.student')),
+            ],
+            options={
+                'verbose_name': 'Cumulative GPA',
+                'verbose_name_plural': 'Cumulative GPAs',
+            },
+        ),
+        migrations.CreateModel(
+            name='SemesterGPA',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('credits_attempted', models.PositiveIntegerField(default=0)),
+                ('credits_earned', models.PositiveIntegerField(default=0)),
+                ('quality_points', models.FloatField(default=0.0)),
+                ('gpa', models.FloatField(default=0.0)),
+                ('cumulative_credits', models.PositiveIntegerField(default=0)),
+                ('cumulative_gpa', models.FloatField(default=0.0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('semester', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='courses.semester')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='semester_gpas', to='accounts.student')),
+            ],
+            options={
+                'verbose_name': 'Semester GPA',
+                'verbose_name_plural': 'Semester GPAs',
+                'indexes': [models.Index(fields=['semester', 'gpa'], name='grades_sem_gpa_idx')],
+                'unique_together': {('student', 'semester')},
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:34
+
+from django.db import migrations, models
+
+
+def backfill_is_late(apps, schema_editor):
+    """Store the lateness of existing submissions in one UPDATE"""
+    Assignment = apps.get_model('courses', 'Assignment')
+    AssignmentSubmission = apps.get_model('grades', 'AssignmentSubmission')
+    AssignmentSubmission.objects.update(is_late=models.Exists(
+        Assignment.objects.filter(id=models.OuterRef('assignment_id'), due_date__lt=models.OuterRef('submission_date'))
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0001_initial'),
+        ('grades', '0002_gpa_tables'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assignmentsubmission',
+            name='is_late',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='assignmentsubmission',
+            index=models.Index(condition=models.Q(('is_graded', False)), fields=['assignment', 'submission_date', 'id'], name='grades_sub_pending_idx'),
+        ),
+        migrations.RunPython(backfill_is_late, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0001_initial'),
+        ('accounts', '0002_profile_bio_profile_preferred_pronouns_and_more'),
+        ('grades', '0003_submission_is_late'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SemesterRank',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('gpa', models.FloatField()),
+                ('credits_attempted', models.PositiveIntegerField()),
+                ('rank', models.PositiveIntegerField()),
+                ('percentile', models.FloatField()),
+                ('class_size', models.PositiveIntegerField()),
+                ('semester', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='courses.semester')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='semester_ranks', to='accounts.student')),
+            ],
+            options={
+                'verbose_name': 'Semester Rank',
+                'verbose_name_plural': 'Semester Ranks',
+                'indexes': [models.Index(fields=['semester', 'rank'], name='grades_sem_rank_idx')],
+                'unique_together': {('student', 'semester')},
+            },
+        ),
+        migrations.CreateModel(
+            name='SectionRank',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('numerical_grade', models.FloatField()),
+                ('rank', models.PositiveIntegerField()),
+                ('percentile', models.FloatField()),
+                ('class_size', models.PositiveIntegerField()),
+                ('section', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='courses.section')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='section_ranks', to='accounts.student')),
+            ],
+            options={
+                'verbose_name': 'Section Rank',
+                'verbose_name_plural': 'Section Ranks',
+                'indexes': [models.Index(fields=['section', 'rank'], name='grades_sec_rank_idx')],
+                'unique_together': {('student', 'section')},
+            },
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:12
+
+from collections import defaultdict
+
+from django.db import migrations
+
+NON_GPA_LETTERS = ('I', 'W')
+FAILING_LETTERS = ('F',)
+
+
+def _gpa(quality_points, credits):
+    return round(quality_points / credits, 4) if credits else 0.0
+
+
+def backfill_gpa(apps, schema_editor):
+    """Materialize SemesterGPA and CumulativeGPA rows for final grades recorded before the tables existed"""
+    FinalGrade = apps.get_model('grades', 'FinalGrade')
+    SemesterGPA = apps.get_model('grades', 'SemesterGPA')
+    CumulativeGPA = apps.get_model('grades', 'CumulativeGPA')
+
+    by_semester = defaultdict(lambda: defaultdict(list))
+    starts = {}
+    rows = FinalGrade.objects.values_list(
+        'student_id', 'section__semester_id', 'section__semester__start_date',
+        'section__course__credits', 'letter_grade', 'gpa_points',
+    )
+    for student_id, semester_id, start_date, credits, letter_grade, gpa_points in rows:
+        by_semester[student_id][semester_id].append((credits, letter_grade, gpa_points))
+        starts[semester_id] = start_date
+
+    semester_gpas = []
+    cumulative_gpas = []
+    for student_id, semesters in by_semester.items():
+        total_attempted = total_earned = 0
+        total_points = 0.0
+        for semester_id in sorted(semesters, key=lambda semester_id: (starts[semester_id], semester_id)):
+            attempted = earned = 0
+            quality_points = 0.0
+            for credits, letter_grade, gpa_points in semesters[semester_id]:
+                if letter_grade in NON_GPA_LETTERS:
+                    continue
+                attempted += credits
+                quality_points += credits * gpa_points
+                if letter_grade not in FAILING_LETTERS:
+                    earned += credits
+            total_attempted += attempted
+            total_earned += earned
+            total_points += quality_points
+            semester_gpas.append(SemesterGPA(
+                student_id=student_id, semester_id=semester_id,
+                credits_attempted=attempted, credits_earned=earned,
+                quality_points=quality_points, gpa=_gpa(quality_points, attempted),
+                cumulative_credits=total_attempted, cumulative_gpa=_gpa(total_points, total_attempted),
+            ))
+        cumulative_gpas.append(CumulativeGPA(
+            student_id=student_id, credits_attempted=total_attempted, credits_earned=total_earned,
+            quality_points=total_points, gpa=_gpa(total_points, total_attempted),
+        ))
+
+    SemesterGPA.objects.all().delete()
+    CumulativeGPA.objects.all().delete()
+    SemesterGPA.objects.bulk_create(semester_gpas, batch_size=500)
+    CumulativeGPA.objects.bulk_create(cumulative_gpas, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('grades', '0004_rank_tables'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_gpa, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,10 @@
 from django.db import models
+from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 from accounts.models import Student
-from courses.models import Section, Assignment
+from courses.models import Section, Semester, Assignment
+
+from .scale import grade_scale
 
 # Create your models here.
 
@@ -58,13 +61,15 @@ class AssignmentSubmission(models.Model):
     is_graded = models.BooleanField(default=False)
     graded_date = models.DateTimeField(null=True, blank=True)
     teacher_comments = models.TextField(blank=True)
+    # Stored so grading queues can filter and sort on it; see grades.queue.refresh_lateness
+    is_late = models.BooleanField(default=False, editable=False)
 
     def __str__(self):
         return f"{self.student.profile.user.username} - {self.assignment.title}"
 
-    @property
-    def is_late(self):
-        return self.submission_date > self.assignment.due_date
+    def save(self, *args, **kwargs):
+        self.is_late = (self.submission_date or timezone.now()) > self.assignment.due_date
+        super().save(*args, **kwargs)
 
     @property
     def percentage(self):
@@ -76,6 +81,14 @@ class AssignmentSubmission(models.Model):
         verbose_name = "Assignment Submission"
         verbose_name_plural = "Assignment Submissions"
         unique_together = ['student', 'assignment']
+        indexes = [
+            # Grading queue: only submissions still to grade, oldest first per assignment
+            models.Index(
+                fields=['assignment', 'submission_date', 'id'],
+                condition=models.Q(is_graded=False),
+                name='grades_sub_pending_idx',
+            ),
+        ]
 
 class FinalGrade(models.Model):
     GRADE_CHOICES = [
@@ -109,43 +122,104 @@ class FinalGrade(models.Model):
 
     def save(self, *args, **kwargs):
         # Auto-calculate letter grade and GPA points based on numerical grade
-        if self.numerical_grade >= 95:
-            self.letter_grade = 'A+'
-            self.gpa_points = 4.0
-        elif self.numerical_grade >= 90:
-            self.letter_grade = 'A'
-            self.gpa_points = 4.0
-        elif self.numerical_grade >= 85:
-            self.letter_grade = 'A-'
-            self.gpa_points = 3.7
-        elif self.numerical_grade >= 80:
-            self.letter_grade = 'B+'
-            self.gpa_points = 3.3
-        elif self.numerical_grade >= 75:
-            self.letter_grade = 'B'
-            self.gpa_points = 3.0
-        elif self.numerical_grade >= 70:
-            self.letter_grade = 'B-'
-            self.gpa_points = 2.7
-        elif self.numerical_grade >= 65:
-            self.letter_grade = 'C+'
-            self.gpa_points = 2.3
-        elif self.numerical_grade >= 60:
-            self.letter_grade = 'C'
-            self.gpa_points = 2.0
-        elif self.numerical_grade >= 55:
-            self.letter_grade = 'C-'
-            self.gpa_points = 1.7
-        elif self.numerical_grade >= 50:
-            self.letter_grade = 'D'
-            self.gpa_points = 1.0
-        else:
-            self.letter_grade = 'F'
-            self.gpa_points = 0.0
-        
+        self.letter_grade, self.gpa_points = grade_scale()(self.numerical_grade)
         super().save(*args, **kwargs)
 
     class Meta:
         verbose_name = "Final Grade"
         verbose_name_plural = "Final Grades"
         unique_together = ['student', 'section']
+
+class SemesterGPA(models.Model):
+    """
+    Materialized GPA of one student in one semester, with the cumulative
+    GPA as of the end of that semester. Rebuilt by grades.gpa when the
+    student's final grades change.
+    """
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='semester_gpas')
+    semester = models.ForeignKey(Semester, on_delete=models.CASCADE)
+    credits_attempted = models.PositiveIntegerField(default=0)
+    credits_earned = models.PositiveIntegerField(default=0)
+    quality_points = models.FloatField(default=0.0)
+    gpa = models.FloatField(default=0.0)
+    cumulative_credits = models.PositiveIntegerField(default=0)
+    cumulative_gpa = models.FloatField(default=0.0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.student.profile.user.username} - {self.semester} - {self.gpa:.2f}"
+
+    class Meta:
+        verbose_name = "Semester GPA"
+        verbose_name_plural = "Semester GPAs"
+        unique_together = ['student', 'semester']
+        indexes = [
+            # Honour rolls: a semester's students by GPA
+            models.Index(fields=['semester', 'gpa'], name='grades_sem_gpa_idx'),
+        ]
+
+class CumulativeGPA(models.Model):
+    """Materialized cumulative GPA of a student over every semester"""
+    student = models.OneToOneField(Student, on_delete=models.CASCADE, related_name='cumulative_gpa')
+    credits_attempted = models.PositiveIntegerField(default=0)
+    credits_earned = models.PositiveIntegerField(default=0)
+    quality_points = models.FloatField(default=0.0)
+    gpa = models.FloatField(default=0.0, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.student.profile.user.username} - {self.gpa:.2f}"
+
+    class Meta:
+        verbose_name = "Cumulative GPA"
+        verbose_name_plural = "Cumulative GPAs"
+
+class SectionRank(models.Model):
+    """
+    Materialized class rank of a student in one section by final numerical
+    grade. Rebuilt for whole sections by grades.ranking when final grades
+    are posted.
+    """
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='section_ranks')
+    section = models.ForeignKey(Section, on_delete=models.CASCADE)
+    numerical_grade = models.FloatField()
+    rank = models.PositiveIntegerField()
+    percentile = models.FloatField()
+    class_size = models.PositiveIntegerField()
+
+    def __str__(self):
+        return f"{self.student.profile.user.username} - {self.section} - {self.rank}/{self.class_size}"
+
+    class Meta:
+        verbose_name = "Section Rank"
+        verbose_name_plural = "Section Ranks"
+        unique_together = ['student', 'section']
+        indexes = [
+            # Top N of a section
+            models.Index(fields=['section', 'rank'], name='grades_sec_rank_idx'),
+        ]
+
+class SemesterRank(models.Model):
+    """
+    Materialized standing of a student among everyone with a GPA in a
+    semester. Rebuilt for whole semesters by grades.ranking.
+    """
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='semester_ranks')
+    semester = models.ForeignKey(Semester, on_delete=models.CASCADE)
+    gpa = models.FloatField()
+    credits_attempted = models.PositiveIntegerField()
+    rank = models.PositiveIntegerField()
+    percentile = models.FloatField()
+    class_size = models.PositiveIntegerField()
+
+    def __str__(self):
+        return f"{self.student.profile.user.username} - {self.semester} - {self.rank}/{self.class_size}"
+
+    class Meta:
+        verbose_name = "Semester Rank"
+        verbose_name_plural = "Semester Ranks"
+        unique_together = ['student', 'semester']
+        indexes = [
+            # Top N and dean's lists of a semester
+            models.Index(fields=['semester', 'rank'], name='grades_sem_rank_idx'),
+        ]
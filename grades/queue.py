@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db.models import BooleanField, Count, ExpressionWrapper, Q
+
+from .models import AssignmentSubmission
+
+# Submissions shown per page of a grading queue
+QUEUE_PAGE_SIZE = 25
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def refresh_lateness(assignment):
+    """Recompute is_late for every submission of an assignment, e.g. after a due date change, in one UPDATE"""
+    return AssignmentSubmission.objects.filter(assignment=assignment).update(is_late=ExpressionWrapper(
+        Q(submission_date__gt=assignment.due_date), output_field=BooleanField()
+    ))
+
+
+def pending_submissions(teacher=None, assignment=None):
+    """Submissions still to grade, for a teacher's sections and/or one assignment"""
+    queryset = AssignmentSubmission.objects.filter(is_graded=False)
+    if assignment is not None:
+        queryset = queryset.filter(assignment=assignment)
+    if teacher is not None:
+        queryset = queryset.filter(assignment__section__teacher=teacher)
+    return queryset
+
+
+def pending_counts(teachers):
+    """``{teacher_id: submissions to grade}`` for many teachers in one grouped query"""
+    counts = dict.fromkeys((teacher.id for teacher in teachers), 0)
+    rows = (
+        pending_submissions().filter(assignment__section__teacher__in=teachers)
+        .values_list('assignment__section__teacher').annotate(pending=Count('id')).order_by()
+    )
+    counts.update(rows)
+    return counts
+
+
+def encode_cursor(submission):
+    """Opaque keyset cursor of a submission: its submission time in microseconds and id"""
+    delta = submission.submission_date - EPOCH
+    microseconds = (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+    return f'{microseconds}.{submission.id}'
+
+
+def decode_cursor(cursor):
+    """(submission_date, id) of a cursor, or None when it is missing or malformed"""
+    try:
+        microseconds, submission_id = (int(part) for part in cursor.split('.'))
+    except (AttributeError, ValueError):
+        return None
+    return EPOCH + timedelta(microseconds=microseconds), submission_id
+
+
+def keyset_page(queryset, after=None, size=QUEUE_PAGE_SIZE):
+    """
+    One page of submissions in (submission_date, id) order after the
+    ``after`` cursor. Seeks straight to the cursor instead of counting
+    past an OFFSET, so late pages cost the same as the first. Returns
+    (submissions, next cursor or None).
+    """
+    position = decode_cursor(after) if after else None
+    if position is not None:
+        submitted, submission_id = position
+        queryset = queryset.filter(
+            Q(submission_date__gt=submitted) | Q(submission_date=submitted, id__gt=submission_id)
+        )
+    submissions = list(queryset.order_by('submission_date', 'id')[:size + 1])
+    if len(submissions) > size:
+        return submissions[:size], encode_cursor(submissions[size - 1])
+    return submissions, None
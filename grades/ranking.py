@@ -0,0 +1,113 @@
+from django.db import transaction
+from django.db.models import Count, F, Window
+from django.db.models.functions import PercentRank, Rank
+
+from courses.models import Section
+
+from .gpa import NON_GPA_LETTERS
+from .models import FinalGrade, SectionRank, SemesterGPA, SemesterRank
+
+TOP_N = 10
+
+
+def _ranked(queryset, partition, score):
+    """
+    Annotate ``queryset`` with its rank, percent rank and partition size by
+    ``score`` (best first) within ``partition``, all as SQL window functions.
+    """
+    window = {'partition_by': [F(partition)], 'order_by': F(score).desc()}
+    return queryset.annotate(
+        rank=Window(Rank(), **window),
+        percent_rank=Window(PercentRank(), **window),
+        class_size=Window(Count('id'), partition_by=[F(partition)]),
+    )
+
+
+def _percentile(percent_rank):
+    """Share of the rest of the class ranked below a student: 100 for the top, 0 for the last"""
+    return round((1 - percent_rank) * 100, 2)
+
+
+def refresh_section_ranks(section_ids):
+    """
+    Rebuild the SectionRank rows of whole sections from their final grades.
+
+    Ranks are computed by the database in one windowed query over
+    FinalGrade, with ties sharing a rank; incomplete and withdrawn
+    students are left out. The sections' rows are replaced in one
+    transaction.
+    """
+    section_ids = set(section_ids)
+    if not section_ids:
+        return
+    rows = _ranked(
+        FinalGrade.objects.filter(section_id__in=section_ids).exclude(letter_grade__in=NON_GPA_LETTERS),
+        'section_id', 'numerical_grade',
+    ).values_list('student_id', 'section_id', 'numerical_grade', 'rank', 'percent_rank', 'class_size')
+    ranks = [
+        SectionRank(
+            student_id=student_id, section_id=section_id, numerical_grade=numerical_grade,
+            rank=rank, percentile=_percentile(percent_rank), class_size=class_size,
+        )
+        for student_id, section_id, numerical_grade, rank, percent_rank, class_size in rows
+    ]
+    with transaction.atomic():
+        SectionRank.objects.filter(section_id__in=section_ids).delete()
+        SectionRank.objects.bulk_create(ranks, batch_size=500)
+
+
+def refresh_semester_ranks(semester_ids):
+    """
+    Rebuild the SemesterRank rows of whole semesters from the materialized
+    semester GPAs, ranked with window functions like refresh_section_ranks.
+    Students without GPA credits in a semester are not ranked.
+    """
+    semester_ids = set(semester_ids)
+    if not semester_ids:
+        return
+    rows = _ranked(
+        SemesterGPA.objects.filter(semester_id__in=semester_ids, credits_attempted__gt=0),
+        'semester_id', 'gpa',
+    ).values_list('student_id', 'semester_id', 'gpa', 'credits_attempted', 'rank', 'percent_rank', 'class_size')
+    ranks = [
+        SemesterRank(
+            student_id=student_id, semester_id=semester_id, gpa=gpa, credits_attempted=credits_attempted,
+            rank=rank, percentile=_percentile(percent_rank), class_size=class_size,
+        )
+        for student_id, semester_id, gpa, credits_attempted, rank, percent_rank, class_size in rows
+    ]
+    with transaction.atomic():
+        SemesterRank.objects.filter(semester_id__in=semester_ids).delete()
+        SemesterRank.objects.bulk_create(ranks, batch_size=500)
+
+
+def refresh_ranks(section_ids):
+    """Re-rank the given sections and every semester they belong to; run after their GPAs are refreshed"""
+    section_ids = set(section_ids)
+    if not section_ids:
+        return
+    refresh_section_ranks(section_ids)
+    refresh_semester_ranks(set(Section.objects.filter(id__in=section_ids).values_list('semester_id', flat=True)))
+
+
+def queue_rank_refresh(section_id):
+    """Re-rank a section and its semester once the current transaction commits"""
+    transaction.on_commit(lambda: refresh_ranks([section_id]))
+
+
+def top_of_section(section, n=TOP_N):
+    """The section's top ``n`` ranks, including everyone tied at rank ``n``"""
+    return (
+        SectionRank.objects.filter(section=section, rank__lte=n)
+        .select_related('student__profile__user')
+        .order_by('rank', 'student__student_id')
+    )
+
+
+def top_of_semester(semester, n=TOP_N):
+    """The semester's top ``n`` ranks by GPA, including everyone tied at rank ``n``"""
+    return (
+        SemesterRank.objects.filter(semester=semester, rank__lte=n)
+        .select_related('student__profile__user')
+        .order_by('rank', 'student__student_id')
+    )
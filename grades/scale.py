@@ -0,0 +1,48 @@
+from bisect import bisect_right
+
+from django.conf import settings
+
+# (lowest numerical grade, letter, GPA points), highest band first; below the last band is F
+DEFAULT_GRADE_SCALE = [
+    (95, 'A+', 4.0),
+    (90, 'A', 4.0),
+    (85, 'A-', 3.7),
+    (80, 'B+', 3.3),
+    (75, 'B', 3.0),
+    (70, 'B-', 2.7),
+    (65, 'C+', 2.3),
+    (60, 'C', 2.0),
+    (55, 'C-', 1.7),
+    (50, 'D', 1.0),
+]
+FAILING_GRADE = ('F', 0.0)
+
+
+class GradeScale:
+    """
+    Table-driven mapping of numerical grades to letters and GPA points.
+
+    ``bands`` are (lowest grade, letter, GPA points) in any order; a grade
+    maps to the highest band whose lower bound it reaches, found with a
+    binary search over the sorted bounds, and to ``failing`` below them all.
+    """
+
+    def __init__(self, bands=None, failing=FAILING_GRADE):
+        bands = sorted(bands if bands is not None else DEFAULT_GRADE_SCALE, key=lambda band: band[0])
+        self.bounds = [float(band[0]) for band in bands]
+        self.grades = [failing] + [(letter, float(points)) for bound, letter, points in bands]
+
+    def __call__(self, numerical_grade):
+        """(letter, GPA points) of a numerical grade"""
+        return self.grades[bisect_right(self.bounds, numerical_grade)]
+
+    def letter(self, numerical_grade):
+        return self(numerical_grade)[0]
+
+    def gpa_points(self, numerical_grade):
+        return self(numerical_grade)[1]
+
+
+def grade_scale():
+    """The institution's scale from the GRADE_SCALE setting, or the default scale"""
+    return GradeScale(getattr(settings, 'GRADE_SCALE', None))
@@ -0,0 +1,77 @@
+from django.db import transaction
+
+from courses.models import Section
+
+from .engine import compute_section_grades
+from .gpa import refresh_gpa
+from .models import FinalGrade
+from .ranking import refresh_ranks
+from .scale import grade_scale
+
+FINAL_GRADE_FIELDS = ['numerical_grade', 'letter_grade', 'gpa_points']
+
+# Letters set by hand that finalization leaves alone
+PRESERVED_LETTERS = ('W',)
+
+
+def finalize_grades(sections, policy='zero', scale=None):
+    """
+    Compute and store FinalGrade rows for many sections at once.
+
+    Each section's weighted totals come from compute_section_grades (with
+    missing components counted as zero by default) and are mapped through
+    ``scale`` (the institution's grade_scale() by default), giving the same
+    letters and GPA points as FinalGrade.save. Existing final grades are
+    loaded in one query and all rows are written with bulk_create and
+    bulk_update in a single transaction; withdrawn students keep their W.
+    The GPAs of the students whose grades changed are refreshed with them,
+    and the changed sections and their semesters are re-ranked.
+    Returns a dict with the numbers ``created``, ``updated``, ``unchanged``
+    and ``incomplete`` (students the policy gave no total).
+    """
+    scale = scale or grade_scale()
+    sections = list(sections)
+    existing = {
+        (final.section_id, final.student_id): final
+        for final in FinalGrade.objects.filter(section__in=sections)
+    }
+    result = {'created': 0, 'updated': 0, 'unchanged': 0, 'incomplete': 0}
+    to_create = []
+    to_update = []
+    for section in sections:
+        for student_id, total in compute_section_grades(section, policy).as_dict().items():
+            if total is None:
+                result['incomplete'] += 1
+                continue
+            numerical_grade = min(max(total, 0.0), 100.0)
+            letter_grade, gpa_points = scale(numerical_grade)
+            final = existing.get((section.id, student_id))
+            if final is None:
+                to_create.append(FinalGrade(
+                    student_id=student_id, section=section, numerical_grade=numerical_grade,
+                    letter_grade=letter_grade, gpa_points=gpa_points,
+                ))
+            elif final.letter_grade in PRESERVED_LETTERS or (
+                (final.numerical_grade, final.letter_grade, final.gpa_points)
+                == (numerical_grade, letter_grade, gpa_points)
+            ):
+                result['unchanged'] += 1
+            else:
+                final.numerical_grade = numerical_grade
+                final.letter_grade = letter_grade
+                final.gpa_points = gpa_points
+                to_update.append(final)
+
+    with transaction.atomic():
+        FinalGrade.objects.bulk_create(to_create, batch_size=500)
+        FinalGrade.objects.bulk_update(to_update, FINAL_GRADE_FIELDS, batch_size=500)
+        refresh_gpa({final.student_id for final in to_create + to_update})
+        refresh_ranks({final.section_id for final in to_create + to_update})
+    result['created'] = len(to_create)
+    result['updated'] = len(to_update)
+    return result
+
+
+def finalize_semester(semester, policy='zero', scale=None):
+    """Finalize the grades of every section of a semester; see finalize_grades"""
+    return finalize_grades(Section.objects.filter(semester=semester), policy, scale)
@@ -0,0 +1,35 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from courses.models import Assignment
+
+from .analytics import bump_grades_version
+from .gpa import refresh_gpa
+from .models import FinalGrade, Grade, GradeComponent
+from .queue import refresh_lateness
+from .ranking import queue_rank_refresh
+
+
+# Bulk writes bypass these; finalize_grades refreshes the GPAs and ranks it touches itself.
+# Ranks cover whole sections and semesters, so they wait for the transaction to commit
+@receiver(post_save, sender=FinalGrade)
+@receiver(post_delete, sender=FinalGrade)
+def final_grade_changed(sender, instance, **kwargs):
+    refresh_gpa([instance.student_id])
+    queue_rank_refresh(instance.section_id)
+
+
+# Likewise the gradebook bumps the version itself after its bulk writes
+@receiver(post_save, sender=Grade)
+@receiver(post_delete, sender=Grade)
+@receiver(post_save, sender=GradeComponent)
+@receiver(post_delete, sender=GradeComponent)
+def grades_changed(sender, instance, **kwargs):
+    bump_grades_version(instance.section_id)
+
+
+# A new due date changes which submissions were late
+@receiver(post_save, sender=Assignment)
+def assignment_saved(sender, instance, created, **kwargs):
+    if not created:
+        refresh_lateness(instance)
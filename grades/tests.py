@@ -1,3 +1,626 @@
-from django.test import TestCase
+import io
+import json
+from datetime import date, timedelta
+from time import perf_counter
+from unittest import skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import Profile, Student, UserRole
+from courses.models import Assignment, Course, Enrollment, Section, Semester
+from sams.testing import SchoolTestMixin, benchmark
+from .analytics import compute_grade_analytics, grade_analytics, grades_version_key
+from .engine import compute_section_grades
+from .gpa import honour_roll, probation_list, refresh_gpa
+from .gradebook import save_gradebook_changes
+from .importer import import_grades_csv
+from .models import (
+    AssignmentSubmission, CumulativeGPA, FinalGrade, Grade, GradeComponent, SectionRank, SemesterGPA, SemesterRank,
+)
+from .queue import QUEUE_PAGE_SIZE, pending_counts, pending_submissions, refresh_lateness
+from .ranking import refresh_section_ranks, top_of_section, top_of_semester
+from .scale import GradeScale, grade_scale
+from .services import finalize_grades, finalize_semester
+
+
+class GradesTestMixin(SchoolTestMixin):
+    """Adds grade components and grades to the shared school fixtures"""
+
+    def create_components(self, section, *specs):
+        """``specs`` are (name, weight_percentage, max_points) tuples"""
+        return [
+            GradeComponent.objects.create(section=section, name=name, weight_percentage=weight, max_points=max_points)
+            for name, weight, max_points in specs
+        ]
+
+    def grade(self, student, component, points):
+        return Grade.objects.create(student=student, section=component.section, component=component, points_earned=points)
+
+
+class WeightedGradeEngineTests(GradesTestMixin, TestCase):
+    def setUp(self):
+        self.section = self.create_section()
+        self.homework, self.midterm, self.final = self.create_components(
+            self.section, ('Homework', 20, 50), ('Midterm', 30, 100), ('Final', 50, 200),
+        )
+        self.complete, self.partial, self.ungraded = self.enroll_students(self.section, 3)
+        self.grade(self.complete, self.homework, 40)
+        self.grade(self.complete, self.midterm, 70)
+        self.grade(self.complete, self.final, 180)
+        self.grade(self.partial, self.homework, 50)
+        self.grade(self.partial, self.midterm, 60)
+
+    def test_policies_for_missing_components(self):
+        # 80% * 20 + 70% * 30 + 90% * 50 = 82
+        excluded = compute_section_grades(self.section, policy='exclude').as_dict()
+        self.assertEqual(excluded, {self.complete.id: 82.0, self.partial.id: 76.0, self.ungraded.id: None})
+
+        zeroed = compute_section_grades(self.section, policy='zero').as_dict()
+        self.assertEqual(zeroed, {self.complete.id: 82.0, self.partial.id: 38.0, self.ungraded.id: 0.0})
+
+        incomplete = compute_section_grades(self.section, policy='incomplete').as_dict()
+        self.assertEqual(incomplete, {self.complete.id: 82.0, self.partial.id: None, self.ungraded.id: None})
+
+        with override_settings(GRADES_MISSING_COMPONENT_POLICY='zero'):
+            self.assertEqual(compute_section_grades(self.section).policy, 'zero')
+        with self.assertRaises(ValueError):
+            compute_section_grades(self.section, policy='curve')
+
+    def test_rows_for_display_and_dropped_students(self):
+        dropped = self.enroll_students(self.section, 1, prefix='dropped')[0]
+        self.grade(dropped, self.final, 200)
+        Enrollment.objects.filter(student=dropped).update(status='dropped')
+
+        grades = compute_section_grades(self.section, policy='exclude')
+        self.assertEqual(grades.component_names, ['Homework', 'Midterm', 'Final'])
+        self.assertEqual(grades.rows()[1], {
+            'student_id': self.partial.id, 'components': [100.0, 60.0, None], 'missing': 1, 'total': 76.0,
+        })
+        self.assertNotIn(dropped.id, grades.as_dict())
+        self.assertEqual(grades.total(self.complete.id), 82.0)
+
+    def test_query_count_does_not_grow_with_grades(self):
+        students = self.enroll_students(self.section, 40, prefix='bulk')
+        Grade.objects.bulk_create([
+            Grade(student=student, section=self.section, component=component, points_earned=component.max_points / 2)
+            for student in students for component in (self.homework, self.midterm, self.final)
+        ])
+
+        with self.assertNumQueries(3):
+            grades = compute_section_grades(self.section, policy='zero')
+        self.assertEqual(grades.as_dict()[students[0].id], 50.0)
+        self.assertEqual(len(grades.student_ids), 43)
+
+
+def if_chain_grade(numerical_grade):
+    """The letter and GPA points FinalGrade.save assigned before the grade scale table"""
+    for bound, letter, points in [
+        (95, 'A+', 4.0), (90, 'A', 4.0), (85, 'A-', 3.7), (80, 'B+', 3.3), (75, 'B', 3.0),
+        (70, 'B-', 2.7), (65, 'C+', 2.3), (60, 'C', 2.0), (55, 'C-', 1.7), (50, 'D', 1.0),
+    ]:
+        if numerical_grade >= bound:
+            return letter, points
+    return 'F', 0.0
+
+
+class FinalGradeTests(GradesTestMixin, TestCase):
+    def setUp(self):
+        self.section = self.create_section()
+        self.homework, self.exam = self.create_components(self.section, ('Homework', 40, 100), ('Exam', 60, 100))
+        self.students = self.enroll_students(self.section, 4)
+        for student, (homework, exam) in zip(self.students, [(100, 95), (90, 85), (60, 40), (80, None)]):
+            self.grade(student, self.homework, homework)
+            if exam is not None:
+                self.grade(student, self.exam, exam)
+
+    def test_scale_matches_the_original_if_chain(self):
+        scale = grade_scale()
+        grades = [value / 4 for value in range(0, 401)] + [49.999, 94.9999, 95.0, 54.99, 100.0]
+        for numerical_grade in grades:
+            self.assertEqual(scale(numerical_grade), if_chain_grade(numerical_grade), numerical_grade)
+
+        final = FinalGrade.objects.create(student=self.students[0], section=self.section, numerical_grade=84.99)
+        self.assertEqual((final.letter_grade, final.gpa_points), ('B+', 3.3))
+
+    def test_institution_scale_from_settings(self):
+        with override_settings(GRADE_SCALE=[(70, 'P', 1.0)]):
+            self.assertEqual(grade_scale()(70), ('P', 1.0))
+            self.assertEqual(grade_scale()(69.9), ('F', 0.0))
+        self.assertEqual(GradeScale([(40, 'Pass', 1), (80, 'Merit', 3)])(85), ('Merit', 3.0))
+
+    def test_finalizes_a_section_in_bulk(self):
+        # Section, existing finals, the engine's three reads, one INSERT, the GPA refresh and the re-ranking
+        with self.assertNumQueries(26):
+            result = finalize_grades(Section.objects.filter(id=self.section.id))
+
+        self.assertEqual(result, {'created': 4, 'updated': 0, 'unchanged': 0, 'incomplete': 0})
+        finals = {final.student_id: final for final in FinalGrade.objects.all()}
+        # 40 * 100% + 60 * 95% = 97; the missing exam counts as zero
+        self.assertEqual(
+            [(finals[s.id].numerical_grade, finals[s.id].letter_grade, finals[s.id].gpa_points) for s in self.students],
+            [(97.0, 'A+', 4.0), (87.0, 'A-', 3.7), (48.0, 'F', 0.0), (32.0, 'F', 0.0)],
+        )
+
+        Grade.objects.filter(student=self.students[2], component=self.exam).update(points_earned=60)
+        FinalGrade.objects.filter(student=self.students[1]).update(letter_grade='W', gpa_points=0)
+        result = finalize_grades([self.section], policy='incomplete')
+        self.assertEqual(result, {'created': 0, 'updated': 1, 'unchanged': 2, 'incomplete': 1})
+        self.assertEqual(FinalGrade.objects.get(student=self.students[2]).letter_grade, 'C')
+        self.assertEqual(FinalGrade.objects.get(student=self.students[1]).letter_grade, 'W')
+
+    def test_finalize_semester_and_command(self):
+        other = self.create_section('CS102')
+        self.create_components(other, ('Exam', 100, 50))
+        self.grade(self.enroll_students(other, 1)[0], other.gradecomponent_set.get(), 50)
+
+        self.assertEqual(finalize_semester(self.section.semester)['created'], 5)
+        out = io.StringIO()
+        call_command('finalize_grades', semester=self.section.semester.name, stdout=out)
+        self.assertIn('0 final grades created, 0 updated, 5 unchanged', out.getvalue())
+
+
+class GPATableTests(GradesTestMixin, TestCase):
+    def setUp(self):
+        self.fall = self.create_section('CS101', credits=4)
+        self.fall_lab = self.create_section('CS102', credits=2)
+        self.spring = self.create_section('CS201', semester_name='Spring 2026', credits=3)
+        Semester.objects.filter(id=self.spring.semester_id).update(start_date=date(2026, 1, 10), end_date=date(2026, 5, 20))
+        self.student = self.create_student('alice', password='pass')
+        self.other = self.create_student('bob')
+        for section in (self.fall, self.fall_lab, self.spring):
+            Enrollment.objects.create(student=self.student, section=section)
+
+    def final(self, student, section, numerical_grade):
+        return FinalGrade.objects.create(student=student, section=section, numerical_grade=numerical_grade)
+
+    def test_saving_final_grades_refreshes_semester_and_cumulative_gpa(self):
+        self.final(self.student, self.fall, 92)       # A, 4.0 x 4
+        self.final(self.student, self.fall_lab, 40)   # F, 0.0 x 2
+        spring = self.final(self.student, self.spring, 76)  # B, 3.0 x 3
+
+        fall_gpa, spring_gpa = SemesterGPA.objects.filter(student=self.student).order_by('semester__start_date')
+        self.assertEqual((fall_gpa.credits_attempted, fall_gpa.credits_earned, fall_gpa.gpa), (6, 4, 2.6667))
+        self.assertEqual((spring_gpa.gpa, spring_gpa.cumulative_credits, spring_gpa.cumulative_gpa), (3.0, 9, 2.7778))
+        cumulative = CumulativeGPA.objects.get(student=self.student)
+        self.assertEqual((cumulative.credits_earned, cumulative.gpa), (7, 2.7778))
+
+        spring.delete()
+        self.assertEqual(CumulativeGPA.objects.get(student=self.student).gpa, 2.6667)
+        self.assertFalse(SemesterGPA.objects.filter(semester=self.spring.semester).exists())
+
+    def test_withdrawals_do_not_count(self):
+        self.final(self.student, self.fall, 92)
+        FinalGrade.objects.create(student=self.student, section=self.fall_lab, numerical_grade=0)
+        FinalGrade.objects.filter(section=self.fall_lab).update(letter_grade='W')
+        refresh_gpa([self.student.id])
+        self.assertEqual(CumulativeGPA.objects.get(student=self.student).credits_attempted, 4)
+        self.assertEqual(CumulativeGPA.objects.get(student=self.student).gpa, 4.0)
+
+    def test_bulk_finalization_refreshes_gpa(self):
+        self.create_components(self.fall, ('Exam', 100, 100))
+        self.grade(self.student, self.fall.gradecomponent_set.get(), 88)
+        finalize_grades([self.fall])
+        self.assertEqual(CumulativeGPA.objects.get(student=self.student).gpa, 3.7)
+
+    def test_transcript_and_standing_pages_read_the_gpa_tables(self):
+        self.final(self.student, self.fall, 96)
+        self.final(self.student, self.fall_lab, 96)
+        Enrollment.objects.create(student=self.other, section=self.fall)
+        self.final(self.other, self.fall, 45)
+
+        self.client.login(username='alice', password='pass')
+        with self.assertNumQueries(7):
+            response = self.client.get(reverse('grades:transcript'))
+        self.assertContains(response, 'CS102')
+        self.assertEqual(response.context['cumulative'].gpa, 4.0)
+
+        self.assertEqual(list(honour_roll(self.fall.semester, min_credits=6).values_list('student', flat=True)), [self.student.id])
+        self.assertEqual(list(probation_list().values_list('student', flat=True)), [self.other.id])
+
+        admin = User.objects.create_user(username='admin', password='pass')
+        Profile.objects.create(user=admin, role=UserRole.ADMIN)
+        self.client.login(username='admin', password='pass')
+        response = self.client.get(reverse('grades:academic_standing'), {'semester': self.fall.semester_id})
+        self.assertEqual([row.student for row in response.context['probation']], [self.other])
+        self.assertEqual(self.client.get(reverse('grades:transcript')).status_code, 302)
+
+
+class GPABackfillMigrationTests(GradesTestMixin, TransactionTestCase):
+    def test_backfill_materializes_existing_final_grades(self):
+        section = self.create_section('CS101', credits=4)
+        student = self.create_student('alice')
+        FinalGrade.objects.create(student=student, section=section, numerical_grade=92)
+        # Final grades recorded before the GPA tables existed
+        SemesterGPA.objects.all().delete()
+        CumulativeGPA.objects.all().delete()
+
+        executor = MigrationExecutor(connection)
+        executor.migrate([('grades', '0004_rank_tables')])
+        executor.loader.build_graph()
+        executor.migrate([('grades', '0005_backfill_gpa')])
+
+        self.assertEqual(SemesterGPA.objects.get(student=student, semester=section.semester).credits_attempted, 4)
+        self.assertEqual(CumulativeGPA.objects.get(student=student).gpa, 4.0)
+
+
+class GradebookTests(GradesTestMixin, TestCase):
+    def setUp(self):
+        self.teacher = self.create_teacher()
+        self.section = self.create_section(teacher=self.teacher)
+        self.components = self.create_components(
+            self.section, *[(f'Quiz {i}', 100 / 12, 20) for i in range(12)]
+        )
+        self.students = self.enroll_students(self.section, 300)
+        Grade.objects.bulk_create([
+            Grade(student=student, section=self.section, component=component, points_earned=10)
+            for student in self.students for component in self.components[:10]
+        ])
+        self.client.login(username='teacher', password='pass')
+        self.url = reverse('grades:grade_students', args=[self.section.id])
+
+    def post_changes(self, changes):
+        return self.client.post(self.url, json.dumps({'changes': changes}), content_type='application/json')
+
+    def test_large_gradebook_loads_in_a_few_queries(self):
+        # Session, user, profile, teacher, section, then components, roster and grades
+        with self.assertNumQueries(8):
+            response = self.client.get(self.url)
+
+        rows = response.context['gradebook'].rows
+        self.assertEqual((len(rows), len(rows[0][1])), (300, 12))
+        self.assertEqual([points for component, points in rows[0][1]], [10.0] * 10 + [None, None])
+
+    def test_saves_only_changed_cells_in_bulk(self):
+        changes = [
+            {'student': student.id, 'component': component.id, 'points': 15}
+            for student in self.students for component in (self.components[0], self.components[11])
+        ] + [{'student': self.students[0].id, 'component': self.components[1].id, 'points': ''}]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post_changes(changes)
+
+        self.assertEqual(response.json(), {'created': 300, 'updated': 300, 'deleted': 1, 'unchanged': 0, 'errors': []})
+        self.assertLess(len(queries), 20)
+        self.assertEqual(Grade.objects.filter(component=self.components[11], points_earned=15).count(), 300)
+        self.assertFalse(Grade.objects.filter(student=self.students[0], component=self.components[1]).exists())
+        self.assertEqual(self.post_changes(changes[:2]).json()['unchanged'], 2)
+
+    def test_invalid_cells_are_reported_and_skipped(self):
+        other = self.create_student('outsider')
+        response = self.post_changes([
+            {'student': self.students[0].id, 'component': self.components[0].id, 'points': 21},
+            {'student': self.students[0].id, 'component': self.components[1].id, 'points': 'abc'},
+            {'student': other.id, 'component': self.components[0].id, 'points': 5},
+            {'student': self.students[1].id, 'component': self.components[0].id, 'points': 19.5},
+        ]).json()
+
+        self.assertEqual(response['updated'], 1)
+        self.assertEqual([error['error'] for error in response['errors']], [
+            'Points must be between 0 and 20', '"abc" is not a number', 'Student is not enrolled in this section',
+        ])
+        self.assertEqual(Grade.objects.get(student=self.students[0], component=self.components[0]).points_earned, 10)
+        self.assertEqual(self.client.post(self.url, 'nope', content_type='application/json').status_code, 400)
+
+    def test_only_the_section_teacher_can_grade(self):
+        self.create_teacher('someone_else')
+        self.client.login(username='someone_else', password='pass')
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.client.force_login(self.students[0].profile.user)
+        self.assertEqual(self.post_changes([]).status_code, 403)
+
+
+class GradeAnalyticsTests(GradesTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = self.create_teacher()
+        self.section = self.create_section(teacher=self.teacher)
+        self.quiz, self.exam = self.create_components(self.section, ('Quiz', 50, 10), ('Exam', 50, 100))
+        self.students = self.enroll_students(self.section, 5)
+        for student, quiz, exam in zip(self.students, [2, 4, 6, 8, 10], [50, 60, 70, 80, None]):
+            self.grade(student, self.quiz, quiz)
+            if exam is not None:
+                self.grade(student, self.exam, exam)
+
+    def test_distributions_per_component_and_section(self):
+        analytics = compute_grade_analytics(self.section)
+
+        quiz, exam = analytics['components']
+        self.assertEqual((quiz['name'], quiz['count'], quiz['mean'], quiz['median']), ('Quiz', 5, 60.0, 60.0))
+        self.assertEqual(quiz['std'], 28.28)
+        self.assertEqual(quiz['percentiles'], {'10': 28.0, '25': 40.0, '50': 60.0, '75': 80.0, '90': 92.0})
+        self.assertEqual(quiz['histogram'], [0, 0, 1, 0, 1, 0, 1, 0, 1, 1])
+        self.assertEqual((exam['count'], exam['min'], exam['max']), (4, 50.0, 80.0))
+        # Course totals under the default policy reweight over graded components
+        self.assertEqual(analytics['overall']['count'], 5)
+        self.assertEqual(analytics['overall']['max'], 100.0)
+
+    def test_cached_until_a_grade_in_the_section_changes(self):
+        analytics = grade_analytics(self.section)
+        with self.assertNumQueries(0):
+            self.assertEqual(grade_analytics(self.section), analytics)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.grade(self.students[4], self.exam, 90)
+        updated = grade_analytics(self.section)
+        self.assertEqual(updated['version'], analytics['version'] + 1)
+        self.assertEqual(updated['components'][1]['count'], 5)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            save_gradebook_changes(self.section, [{'student': self.students[0].id, 'component': self.quiz.id, 'points': 10}])
+        current = grade_analytics(self.section)
+        self.assertEqual(current['components'][0]['min'], 40.0)
+
+        # An evicted version stamp must not fall back to one with analytics still cached
+        cache.delete(grades_version_key(self.section.id))
+        self.assertGreater(grade_analytics(self.section)['version'], current['version'])
+        self.assertEqual(grade_analytics(self.section)['components'][0]['min'], 40.0)
+
+    def test_analytics_page_and_json(self):
+        self.client.login(username='teacher', password='pass')
+        url = reverse('courses:teacher_analytics', args=[self.section.id])
+
+        response = self.client.get(url)
+        self.assertContains(response, 'Quiz')
+        self.assertEqual(response.context['analytics']['overall']['count'], 5)
+        data = self.client.get(url, {'format': 'json'}).json()
+        self.assertEqual([component['name'] for component in data['components']], ['Quiz', 'Exam'])
+
+        self.client.force_login(self.students[0].profile.user)
+        self.assertEqual(self.client.get(url, {'format': 'json'}).status_code, 403)
+
+
+class GradeImportTests(GradesTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = self.create_teacher()
+        self.section = self.create_section(teacher=self.teacher)
+        self.quiz, self.exam = self.create_components(self.section, ('Quiz', 40, 10), ('Exam', 60, 100))
+        self.assignment = Assignment.objects.create(
+            section=self.section, title='Essay', description='Write', due_date=timezone.now(), max_points=20,
+        )
+        self.students = self.enroll_students(self.section, 3)
+        AssignmentSubmission.objects.create(student=self.students[0], assignment=self.assignment)
+
+    def csv_lines(self, *rows, header='student_id,component,assignment,points,comments'):
+        return io.StringIO('\n'.join((header,) + rows) + '\n')
+
+    def test_imports_grades_and_submission_marks_with_a_row_report(self):
+        s0, s1, s2 = (student.student_id for student in self.students)
+        outsider = self.create_student('outsider').student_id
+        result = import_grades_csv(self.csv_lines(
+            f'{s0},Quiz,,8,Good',
+            f'{s1},{self.exam.id},,75,',
+            f'{s2},quiz,,11,',
+            f'{s0},,Essay,18,Nice work',
+            f'{s1},,Essay,12,',
+            f'{outsider},Quiz,,5,',
+            'S-nobody,Quiz,,5,',
+            f'{s2},Homework,,5,',
+            f'{s2},Quiz,Essay,5,',
+        ), default_section=self.section)
+
+        self.assertEqual(
+            (result['rows'], result['grades_created'], result['submissions_graded']), (9, 2, 1)
+        )
+        self.assertEqual([(rejection['line'], rejection['error']) for rejection in result['rejected']], [
+            (4, 'Points must be between 0 and 10'),
+            (6, 'No submission from this student'),
+            (7, f'Student is not enrolled in section {self.section.id}'),
+            (8, 'Unknown student ID "S-nobody"'),
+            (9, f'Unknown component "Homework" in section {self.section.id}'),
+            (10, 'Give either a component or an assignment'),
+        ])
+        grade = Grade.objects.get(student=self.students[0], component=self.quiz)
+        self.assertEqual((grade.points_earned, grade.comments), (8, 'Good'))
+        submission = AssignmentSubmission.objects.get(student=self.students[0])
+        self.assertEqual((submission.points_earned, submission.is_graded, submission.teacher_comments), (18, True, 'Nice work'))
+
+        again = import_grades_csv(self.csv_lines(f'{s0},Quiz,,9,Good', f'{s1},Exam,,75,'), default_section=self.section)
+        self.assertEqual((again['grades_updated'], again['unchanged']), (1, 1))
+
+    def test_only_allowed_sections_and_required_columns(self):
+        other = self.create_section('CS102')
+        self.create_components(other, ('Quiz', 100, 10))
+        header = 'student_id,section,component,points'
+        result = import_grades_csv(
+            self.csv_lines(f'{self.students[0].student_id},{other.id},Quiz,5', header=header),
+            sections=Section.objects.filter(teacher=self.teacher),
+        )
+        self.assertEqual(result['rejected'], [{'line': 2, 'error': f'Unknown section {other.id}'}])
+        with self.assertRaisesMessage(ValueError, 'section'):
+            import_grades_csv(self.csv_lines(header='student_id,component,points'))
+
+    def large_file(self):
+        """10,000 rows: 100 students by 100 lab components"""
+        components = GradeComponent.objects.bulk_create([
+            GradeComponent(section=self.section, name=f'Lab {i}', weight_percentage=1, max_points=10) for i in range(100)
+        ])
+        students = self.students + self.enroll_students(self.section, 97, prefix='bulk')
+        rows = [f'{student.student_id},Lab {i},,{i % 11}' for student in students for i in range(len(components))]
+        return self.csv_lines(*rows, header='student_id,component,assignment,points')
+
+    def test_large_file_imports_in_bounded_chunks(self):
+        lines = self.large_file()
+        chunks = []
+        with CaptureQueriesContext(connection) as queries:
+            result = import_grades_csv(
+                lines, default_section=self.section, chunk_size=2500,
+                progress=lambda result: chunks.append(result['rows']),
+            )
+
+        self.assertEqual((result['rows'], result['grades_created'], result['rejected']), (10000, 10000, []))
+        self.assertEqual(chunks, [2500, 5000, 7500, 10000])
+        # One lookup of existing grades per chunk, and multi-row inserts rather than one per grade
+        lookups = [query for query in queries if query['sql'].startswith('SELECT "grades_grade"')]
+        self.assertEqual(len(lookups), 4)
+        self.assertLess(len(queries), 100)
+
+    @benchmark
+    def test_large_file_import_throughput(self):
+        lines = self.large_file()
+        begin = perf_counter()
+        result = import_grades_csv(lines, default_section=self.section)
+        elapsed = perf_counter() - begin
+        self.assertGreater(result['rows'] / elapsed, 1000)
+
+    def test_teacher_upload_page(self):
+        self.client.login(username='teacher', password='pass')
+        upload = io.BytesIO(f'student_id,component,points\n{self.students[1].student_id},Exam,66\n'.encode())
+        upload.name = 'marks.csv'
+        response = self.client.post(reverse('grades:import_grades', args=[self.section.id]), {'csv_file': upload})
+        self.assertEqual(response.context['result']['grades_created'], 1)
+        self.assertEqual(Grade.objects.get(student=self.students[1]).points_earned, 66)
+
+
+class GradingQueueTests(GradesTestMixin, TestCase):
+    def setUp(self):
+        self.teacher = self.create_teacher()
+        self.section = self.create_section(teacher=self.teacher)
+        self.due = timezone.now()
+        self.assignment = Assignment.objects.create(
+            section=self.section, title='Essay', description='Write', due_date=self.due, max_points=20,
+        )
+        self.students = self.enroll_students(self.section, 60)
+        AssignmentSubmission.objects.bulk_create([
+            AssignmentSubmission(student=student, assignment=self.assignment) for student in self.students
+        ])
+        # Pairs of submissions share a timestamp, half of them after the due date
+        for i, submission in enumerate(AssignmentSubmission.objects.order_by('id')):
+            AssignmentSubmission.objects.filter(id=submission.id).update(
+                submission_date=self.due + timedelta(minutes=i // 2 - 15), is_graded=i % 3 == 0,
+            )
+        refresh_lateness(self.assignment)
+
+    def test_lateness_is_stored_and_follows_the_due_date(self):
+        self.assertEqual(AssignmentSubmission.objects.filter(is_late=True).count(), 28)
+        self.assignment.due_date = self.due + timedelta(days=1)
+        self.assignment.save()
+        self.assertFalse(AssignmentSubmission.objects.filter(is_late=True).exists())
+
+        student = self.enroll_students(self.section, 1, prefix='new')[0]
+        other = Assignment.objects.create(
+            section=self.section, title='Late', description='', due_date=self.due - timedelta(days=1),
+        )
+        self.assertTrue(AssignmentSubmission.objects.create(student=student, assignment=other).is_late)
+
+    def test_pending_counts_per_teacher_in_one_query(self):
+        other_teacher = self.create_teacher('other')
+        other = Assignment.objects.create(
+            section=self.create_section('CS102', other_teacher), title='Lab', description='', due_date=self.due,
+        )
+        AssignmentSubmission.objects.create(student=self.students[0], assignment=other)
+        idle = self.create_teacher('idle')
+
+        with self.assertNumQueries(1):
+            counts = pending_counts([self.teacher, other_teacher, idle])
+        self.assertEqual(counts, {self.teacher.id: 40, other_teacher.id: 1, idle.id: 0})
+
+    def test_keyset_pages_cover_every_pending_submission_once(self):
+        self.client.login(username='teacher', password='pass')
+        url = reverse('grades:assignment_submissions', args=[self.assignment.id])
+        seen = []
+        cursor = None
+        while True:
+            with self.assertNumQueries(7):
+                response = self.client.get(url, {'after': cursor} if cursor else {})
+            seen += [submission.id for submission in response.context['submissions']]
+            cursor = response.context['next_cursor']
+            if cursor is None:
+                break
+
+        expected = list(
+            AssignmentSubmission.objects.filter(is_graded=False).order_by('submission_date', 'id').values_list('id', flat=True)
+        )
+        self.assertEqual(seen, expected)
+        self.assertEqual(response.context['pending_count'], 40)
+        self.assertEqual(len(self.client.get(url, {'status': 'all'}).context['submissions']), QUEUE_PAGE_SIZE)
+
+    @skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN output is SQLite specific')
+    def test_pending_queue_uses_the_partial_index(self):
+        page = pending_submissions(assignment=self.assignment).order_by('submission_date', 'id')[:25]
+        self.assertIn('grades_sub_pending_idx', page.explain())
+
+
+class RankingTests(GradesTestMixin, TestCase):
+    def setUp(self):
+        self.section = self.create_section('CS101', credits=4)
+        self.lab = self.create_section('CS102', teacher=self.section.teacher, credits=2)
+        self.students = self.enroll_students(self.section, 5)
+        for student in self.students[:3]:
+            Enrollment.objects.create(student=student, section=self.lab)
+
+    def finals(self, section, grades):
+        FinalGrade.objects.bulk_create([
+            FinalGrade(student=student, section=section, numerical_grade=numerical_grade,
+                       letter_grade=letter_grade, gpa_points=gpa_points)
+            for student, (numerical_grade, (letter_grade, gpa_points)) in zip(
+                self.students, [(grade, grade_scale()(grade)) for grade in grades]
+            )
+        ])
+        refresh_gpa([student.id for student in self.students])
+
+    def test_section_ranks_come_from_window_functions(self):
+        self.finals(self.section, [91, 78, 91, 55, 30])
+        FinalGrade.objects.filter(student=self.students[4]).update(letter_grade='W')
+
+        with CaptureQueriesContext(connection) as queries:
+            refresh_section_ranks([self.section.id])
+        self.assertIn('RANK() OVER', queries[0]['sql'])
+        ranks = {rank.student_id: rank for rank in SectionRank.objects.all()}
+        self.assertEqual(
+            [(ranks[s.id].rank, ranks[s.id].percentile, ranks[s.id].class_size) for s in self.students[:4]],
+            [(1, 100.0, 4), (3, 33.33, 4), (1, 100.0, 4), (4, 0.0, 4)],
+        )
+        self.assertNotIn(self.students[4].id, ranks)
+        self.assertEqual([rank.student for rank in top_of_section(self.section, 1)], [self.students[0], self.students[2]])
+
+    def test_finalizing_ranks_sections_and_semesters(self):
+        exam, = self.create_components(self.section, ('Exam', 100, 100))
+        lab, = self.create_components(self.lab, ('Lab', 100, 100))
+        for student, points in zip(self.students, [95, 70, 85, 60, 40]):
+            self.grade(student, exam, points)
+        for student, points in zip(self.students, [50, 100, 90]):
+            self.grade(student, lab, points)
+
+        finalize_semester(self.section.semester)
+        self.assertEqual(
+            list(SectionRank.objects.filter(section=self.lab).order_by('rank').values_list('student', 'rank')),
+            [(self.students[1].id, 1), (self.students[2].id, 2), (self.students[0].id, 3)],
+        )
+        # (4.0 x 4 + 0.0 x 2) / 6, (2.3 x 4 + 4.0 x 2) / 6, 3.7 everywhere, 1.7, 0.0
+        standing = top_of_semester(self.section.semester, 3)
+        self.assertEqual([row.student for row in standing], [self.students[2], self.students[1], self.students[0]])
+        self.assertEqual([row.rank for row in standing], [1, 2, 3])
+        self.assertEqual(SemesterRank.objects.get(student=self.students[4]).percentile, 0.0)
+
+        # A grade saved on its own re-ranks its section and semester once the transaction commits
+        with self.captureOnCommitCallbacks() as callbacks:
+            FinalGrade.objects.filter(student=self.students[4], section=self.section).get().delete()
+            FinalGrade.objects.create(student=self.students[4], section=self.section, numerical_grade=99)
+        self.assertEqual(SectionRank.objects.get(student=self.students[4], section=self.section).rank, 5)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(SectionRank.objects.get(student=self.students[4], section=self.section).rank, 1)
+        self.assertEqual(top_of_semester(self.section.semester, 1).get().student, self.students[4])
+
+    def test_standing_page_and_rebuild_command(self):
+        self.finals(self.section, [91, 78, 91, 55, 30])
+        out = io.StringIO()
+        call_command('rebuild_ranks', stdout=out)
+        self.assertIn('Rebuilt ranks for 1 sections in 1 semesters.', out.getvalue())
+        self.assertEqual(SemesterRank.objects.count(), 5)
+
+        admin = User.objects.create_user(username='admin', password='pass')
+        Profile.objects.create(user=admin, role=UserRole.ADMIN)
+        self.client.login(username='admin', password='pass')
+        response = self.client.get(reverse('grades:academic_standing'), {'top': 2})
+        self.assertEqual([row.rank for row in response.context['top_students']], [1, 1])
+        self.assertContains(response, 'Top 2 Students')
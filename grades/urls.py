@@ -6,10 +6,12 @@ app_name = 'grades'
 urlpatterns = [
     path('my-grades/', views.student_grades_view, name='student_grades'),
     path('transcript/', views.transcript_view, name='transcript'),
+    path('standing/', views.academic_standing_view, name='academic_standing'),
     
     # Teacher URLs
     path('teacher/sections/', views.teacher_grading_sections_view, name='teacher_grading_sections'),
     path('teacher/section/<int:section_id>/grades/', views.grade_students_view, name='grade_students'),
+    path('teacher/section/<int:section_id>/grades/import/', views.import_grades_view, name='import_grades'),
     path('teacher/section/<int:section_id>/assignments/', views.grade_assignments_view, name='grade_assignments'),
     path('teacher/assignment/<int:assignment_id>/submissions/', views.assignment_submissions_view, name='assignment_submissions'),
 ]
\ No newline at end of file
@@ -1,7 +1,20 @@
-from django.shortcuts import render, redirect
+import io
+import json
+
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404, render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 
+from accounts.models import UserRole
+from courses.models import Assignment, Section, Semester
+
+from .gpa import honour_roll, probation_list, transcript
+from .gradebook import Gradebook, save_gradebook_changes
+from .importer import IMPORT_COLUMNS, import_grades_csv
+from .queue import keyset_page, pending_submissions
+from .ranking import TOP_N, top_of_semester
+
 # Create your views here.
 
 @login_required
@@ -11,8 +24,51 @@ def student_grades_view(request):
 
 @login_required
 def transcript_view(request):
-    # Placeholder - implement transcript view
-    return render(request, 'grades/transcript.html', {})
+    """
+    The student's final grades by semester with semester and cumulative
+    GPA, read from the materialized GPA tables.
+    """
+    try:
+        student = request.user.profile.student
+    except:
+        messages.error(request, 'Access denied. Student account required.')
+        return redirect('accounts:dashboard')
+
+    semesters, cumulative = transcript(student)
+    return render(request, 'grades/transcript.html', {
+        'student': student,
+        'semesters': semesters,
+        'cumulative': cumulative,
+    })
+
+@login_required
+def academic_standing_view(request):
+    """
+    Honour roll and top ?top= students (ten by default) of a semester
+    (?semester=, the current one by default), and the probation list.
+    """
+    profile = getattr(request.user, 'profile', None)
+    if profile is None or profile.role != UserRole.ADMIN:
+        messages.error(request, 'Access denied.')
+        return redirect('accounts:dashboard')
+
+    semesters = Semester.objects.order_by('-start_date')
+    semester_id = request.GET.get('semester')
+    if semester_id and semester_id.isdigit():
+        semester = semesters.filter(id=semester_id).first()
+    else:
+        semester = semesters.filter(is_current=True).first() or semesters.first()
+    top = request.GET.get('top', '')
+    top = min(int(top), 100) if top.isdigit() and int(top) > 0 else TOP_N
+
+    return render(request, 'grades/academic_standing.html', {
+        'semesters': semesters,
+        'semester': semester,
+        'honour_roll': honour_roll(semester) if semester else [],
+        'top': top,
+        'top_students': top_of_semester(semester, top) if semester else [],
+        'probation': probation_list(),
+    })
 
 @login_required
 def teacher_grading_sections_view(request):
@@ -21,9 +77,66 @@ def teacher_grading_sections_view(request):
 
 @login_required
 def grade_students_view(request, section_id):
-    # Placeholder - implement grade students view
-    messages.info(request, 'Grading feature coming soon!')
-    return redirect('grades:teacher_grading_sections')
+    """
+    Spreadsheet-style gradebook: enrolled students by grade components.
+
+    The page posts only the cells that changed, as JSON
+    {"changes": [{"student", "component", "points"}, ...]}, and gets back
+    the counts written and any per-cell errors.
+    """
+    try:
+        teacher = request.user.profile.teacher
+    except:
+        if request.method == 'POST':
+            return JsonResponse({'error': 'Teacher account required.'}, status=403)
+        messages.error(request, 'Access denied. Teacher account required.')
+        return redirect('accounts:dashboard')
+
+    section = get_object_or_404(Section.objects.select_related('course'), id=section_id, teacher=teacher)
+
+    if request.method == 'POST':
+        try:
+            changes = json.loads(request.body).get('changes')
+        except (ValueError, AttributeError):
+            changes = None
+        if not isinstance(changes, list):
+            return JsonResponse({'error': 'Expected a JSON object with a "changes" list.'}, status=400)
+        return JsonResponse(save_gradebook_changes(section, changes))
+
+    return render(request, 'grades/gradebook.html', {
+        'section': section,
+        'gradebook': Gradebook(section),
+    })
+
+@login_required
+def import_grades_view(request, section_id):
+    """Upload a CSV of component grades or assignment marks exported from another tool"""
+    try:
+        teacher = request.user.profile.teacher
+    except:
+        messages.error(request, 'Access denied. Teacher account required.')
+        return redirect('accounts:dashboard')
+
+    section = get_object_or_404(Section.objects.select_related('course'), id=section_id, teacher=teacher)
+    result = None
+    csv_file = request.FILES.get('csv_file')
+    if request.method == 'POST' and csv_file:
+        lines = io.TextIOWrapper(csv_file.file, encoding='utf-8-sig', newline='')
+        try:
+            result = import_grades_csv(lines, Section.objects.filter(teacher=teacher), default_section=section)
+        except ValueError as error:
+            messages.error(request, f'Import failed: {error}')
+        else:
+            messages.success(
+                request,
+                f'Imported {result["rows"] - len(result["rejected"])} of {result["rows"]} rows.'
+            )
+
+    return render(request, 'grades/import_grades.html', {
+        'section': section,
+        'columns': IMPORT_COLUMNS,
+        'result': result,
+    })
 
 @login_required
 def grade_assignments_view(request, section_id):
@@ -33,5 +146,34 @@ def grade_assignments_view(request, section_id):
 
 @login_required
 def assignment_submissions_view(request, assignment_id):
-    # Placeholder - implement assignment submissions view
-    return render(request, 'grades/assignment_submissions.html', {})
+    """
+    Grading queue of one assignment: submissions oldest first, pending
+    ones by default (?status=all for every submission), paged with a
+    keyset cursor (?after=).
+    """
+    try:
+        teacher = request.user.profile.teacher
+    except:
+        messages.error(request, 'Access denied. Teacher account required.')
+        return redirect('accounts:dashboard')
+
+    assignment = get_object_or_404(
+        Assignment.objects.select_related('section__course'), id=assignment_id, section__teacher=teacher
+    )
+    status = request.GET.get('status', 'pending')
+    if status == 'all':
+        submissions = assignment.assignmentsubmission_set.all()
+    else:
+        status = 'pending'
+        submissions = pending_submissions(assignment=assignment)
+
+    page, next_cursor = keyset_page(
+        submissions.select_related('student__profile__user'), after=request.GET.get('after')
+    )
+    return render(request, 'grades/assignment_submissions.html', {
+        'assignment': assignment,
+        'submissions': page,
+        'status': status,
+        'next_cursor': next_cursor,
+        'pending_count': pending_submissions(assignment=assignment).count(),
+    })
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -83,11 +84,27 @@ WSGI_APPLICATION = 'sams.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('SAMS_DATABASE', BASE_DIR / 'db.sqlite3'),
     }
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Shared by every process on the host, so cache invalidations and grade
+# version bumps made by one worker are seen by all of them
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('SAMS_CACHE_DIR', BASE_DIR / 'cache'),
+    }
+}
+
+# Runs the tests against a cache directory of their own
+TEST_RUNNER = 'sams.test_runner.TestRunner'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -0,0 +1,27 @@
+import tempfile
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Test runner that points the file cache at a temporary directory, so
+    tests never read entries left by the development server or by an
+    earlier run.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.cache_dir = tempfile.TemporaryDirectory(prefix='sams-cache-')
+        self.cache_settings = override_settings(CACHES={
+            alias: {**config, 'LOCATION': f'{self.cache_dir.name}/{alias}'}
+            for alias, config in settings.CACHES.items()
+        })
+        self.cache_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.cache_settings.disable()
+        self.cache_dir.cleanup()
+        super().teardown_test_environment(**kwargs)
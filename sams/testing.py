@@ -0,0 +1,82 @@
+"""Test helpers shared by the apps' test suites"""
+import os
+import sqlite3
+import subprocess
+import sys
+from datetime import date
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+
+from accounts.models import Profile, Student, Teacher, UserRole
+from courses.models import AcademicYear, Course, Enrollment, Section, Semester
+
+# Wall-clock benchmarks only run when asked for, since timings depend on the machine
+benchmark = skipUnless(os.environ.get('SAMS_BENCHMARKS'), 'benchmark; set SAMS_BENCHMARKS=1 to run')
+
+
+class SchoolTestMixin:
+    """Builds teachers, sections and enrolled students"""
+
+    def create_teacher(self, username='teacher'):
+        user = User.objects.create_user(username=username, password='pass', first_name='Tess', last_name='Teacher')
+        profile = Profile.objects.create(user=user, role=UserRole.TEACHER)
+        return Teacher.objects.create(
+            profile=profile, employee_id=f'EMP-{username}', department='Computing',
+            qualification='PhD', join_date=date(2020, 1, 1)
+        )
+
+    def create_section(self, code='CS101', teacher=None, semester_name='Fall 2025', credits=3):
+        if teacher is None:
+            teacher = self.create_teacher(f'teacher_{code.lower()}')
+        year, _ = AcademicYear.objects.get_or_create(
+            name='2025-2026', start_date=date(2025, 9, 1), end_date=date(2026, 6, 30)
+        )
+        semester, _ = Semester.objects.get_or_create(
+            name=semester_name, academic_year=year,
+            start_date=date(2025, 9, 1), end_date=date(2025, 12, 20)
+        )
+        course = Course.objects.create(code=code, name=f'{code} Course', credits=credits, department='Computing')
+        return Section.objects.create(
+            course=course, semester=semester, teacher=teacher,
+            section_number='01', schedule='MWF 10:00-11:00 AM'
+        )
+
+    def create_student(self, username, password=None, last_name=None):
+        user = User.objects.create_user(
+            username=username, password=password, first_name='Stu', last_name=last_name or username
+        )
+        profile = Profile.objects.create(user=user, role=UserRole.STUDENT)
+        return Student.objects.create(
+            profile=profile, student_id=f'S-{username}',
+            registration_number=f'R-{username}', admission_date=date(2025, 9, 1)
+        )
+
+    def enroll_students(self, section, count, prefix='student'):
+        """``count`` new students enrolled in ``section``, whose last names sort in creation order"""
+        students = []
+        for i in range(count):
+            student = self.create_student(f'{prefix}{section.id}_{i}', last_name=f'Dent{i:04d}')
+            Enrollment.objects.create(student=student, section=section)
+            students.append(student)
+        return students
+
+    def copy_database(self, path):
+        """Write the test database to ``path``; fresh processes cannot open the in-memory one"""
+        copy = sqlite3.connect(path)
+        connection.ensure_connection()
+        connection.connection.backup(copy)
+        copy.close()
+
+    def manage(self, database, *args):
+        """Run manage.py in a fresh process against the database file ``database``, returning its output"""
+        result = subprocess.run(
+            [sys.executable, 'manage.py', *args],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, env={
+                **os.environ, 'SAMS_DATABASE': database, 'SAMS_CACHE_DIR': str(settings.CACHES['default']['LOCATION']),
+            },
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return result.stdout